@@ -4,6 +4,7 @@ from parser.email_parser import EmailParser
 from database.email_database import EmailDatabase
 import os
 from config.file_constants import FileConstants
+from config.db_constants import DBConstants
 
 def paths_to_dict():
     """This is a temporary function for project development..."""
@@ -23,7 +24,7 @@ def create_and_fill_database():
     file_retriever = FileRetriever(path=path)
     attachments_path = paths_to_dict()['attachments']
     email_parser = EmailParser(attachments_directory=attachments_path)
-    email_database = EmailDatabase()
+    email_database = EmailDatabase(profile=DBConstants.BULK_LOAD_PROFILE)
     mbox_temp_directory = paths_to_dict()['tmp']
     aggregator = EmailAggregator(file_retriever=file_retriever, email_parser=email_parser,
                                  email_database=email_database, temp_eml_storage_dir=mbox_temp_directory)
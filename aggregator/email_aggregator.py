@@ -14,6 +14,7 @@ from config.db_constants import DBConstants
 from config.email_constants import *
 # Personal libraries
 from utils.string_cleaner import StringCleaner
+from utils.run_metrics import run_metrics
 from utils.logging_setup import log_email_aggregator_info, log_email_aggregator_debug, log_email_aggregator_error
 from aggregator.file_retriever import FileRetriever
 from aggregator.mbox_extractor import MboxExtractor
@@ -39,17 +40,21 @@ class EmailAggregator(IEmailAggregator):
         self._retrieve_and_process_all_email_types()
 
     def _retrieve_and_process_all_email_types(self) -> None:
+        run_metrics.reset()
         self._file_retriever.retrieve_files_path()
         email_list = self._file_retriever.filepath_dict().get('emails', [])
         mbox_list = self._file_retriever.filepath_dict().get('mbox', [])
 
-        log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, Start process mbox files")
-        self._process_mbox_files(mbox_list=mbox_list)
-        log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, End process mbox files")
+        with self._db.bulk_load():
+            log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, Start process mbox files")
+            self._process_mbox_files(mbox_list=mbox_list)
+            log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, End process mbox files")
 
-        log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, Start process email files")
-        self._process_email_files(email_files=email_list)
-        log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, End process email files")
+            log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, Start process email files")
+            self._process_email_files(email_files=email_list)
+            log_email_aggregator_info.info("Func: retrieve_and_aggregate_emails, End process email files")
+        log_email_aggregator_info.info(f"Extraction cache: {self._ep.extraction_cache.stats()}")
+        log_email_aggregator_info.info(f"Run metrics: {run_metrics.snapshot()}")
 
     def _aggregate_emails_to_database(self, emails: list) -> None:
         log_email_aggregator_info.info("Start aggregating emails to database")
@@ -83,6 +88,9 @@ class EmailAggregator(IEmailAggregator):
             self._aggregate_emails_to_database(emails=emails)
 
     def _process_email_file(self, file_path: str) -> tuple[str, dict]:
+        if os.path.getsize(file_path) > SystemConfig.LARGE_EMAIL_THRESHOLD:
+            log_email_aggregator_debug.debug(f"Func: process_email_file, large email parsed incrementally: {file_path}")
+            return file_path, self._ep.parse_large_email(file_path=file_path)
         with open(file_path, 'rb') as f:
             email_content = f.read()
             email = self._ep.parse_email(email_content=email_content)
@@ -120,12 +128,14 @@ class EmailAggregator(IEmailAggregator):
                 t.join()
 
     def _add_email(self, file_path: str, email: dict) -> None:
-        email_id = self._insert_email_record(file_path, email)
-        self._insert_aliases(email)
-        self._insert_addresses(email, email_id)
-        self._insert_dates(email, email_id)
-        self._insert_timestamps(email, email_id)
-        self._insert_attachments(email, email_id)
+        # One commit per email instead of one per insert
+        with self._db.transaction():
+            email_id = self._insert_email_record(file_path, email)
+            self._insert_aliases(email)
+            self._insert_addresses(email, email_id)
+            self._insert_dates(email, email_id)
+            self._insert_timestamps(email, email_id)
+            self._insert_attachments(email, email_id)
 
     def _remove_files(self, paths_list: list) -> None:
         for file_path in paths_list:
@@ -149,7 +159,9 @@ class EmailAggregator(IEmailAggregator):
             filepath=file_path,
             filename=os.path.basename(file_path),
             subject=email[SUBJECT],
-            body=email[BODY]
+            body=email[BODY],
+            new_body=email[NEW_BODY],
+            timestamp=email[TIMESTAMP]
         )
         return email_id
 
@@ -165,15 +177,15 @@ class EmailAggregator(IEmailAggregator):
 
     def _insert_addresses(self, email: dict, email_id: str) -> None:
         address_mappings = [
-            (DBConstants.EMAIL_FROM_TABLE, DBConstants.EMAIL_FROM_COLUMNS, email[FROM_ADDRESS]),
-            (DBConstants.EMAIL_TO_TABLE, DBConstants.EMAIL_TO_COLUMNS, email[TO_ADDRESSES]),
-            (DBConstants.EMAIL_CC_TABLE, DBConstants.EMAIL_CC_COLUMNS, email[CC_ADDRESSES]),
-            (DBConstants.EMAIL_BCC_TABLE, DBConstants.EMAIL_BCC_COLUMNS, email[BCC_ADDRESSES])
+            (DBConstants.FROM_ROLE, email[FROM_ADDRESS]),
+            (DBConstants.TO_ROLE, email[TO_ADDRESSES]),
+            (DBConstants.CC_ROLE, email[CC_ADDRESSES]),
+            (DBConstants.BCC_ROLE, email[BCC_ADDRESSES])
         ]
-        for table, columns, addresses in address_mappings:
+        for role, addresses in address_mappings:
             ids = [self._db.insert_email_address(email_address=address, return_existing_id=True) for address in
                    addresses]
-            self._db.link(table=table, col_name_1=columns[0], col_name_2=columns[1], value_1=email_id, value_2=ids)
+            self._db.link_participants(email_id=email_id, email_address_ids=ids, role=role)
 
     def _insert_dates(self, email: dict, email_id: str) -> None:
         date_str_id = self._db.insert_date(date=email[DATE_STR], return_existing_id=True)
@@ -201,8 +213,13 @@ class EmailAggregator(IEmailAggregator):
             self._db.insert_attachment(
                 id=attachment_id,
                 filename=attachment[ATTACHMENT_FILENAME],
-                content=attachment[ATTACHMENT_CONTENT],
-                extracted_text=attachment[ATTACHMENT_EXTRACTED_TEXT]
+                extracted_text=attachment[ATTACHMENT_EXTRACTED_TEXT],
+                extraction_status=attachment.get(ATTACHMENT_EXTRACTION_STATUS),
+                extraction_error=attachment.get(ATTACHMENT_EXTRACTION_ERROR),
+                size=attachment.get(ATTACHMENT_SIZE),
+                mime_type=attachment.get(ATTACHMENT_MIME_TYPE),
+                extension=attachment.get(ATTACHMENT_EXTENSION),
+                page_count=attachment.get(ATTACHMENT_PAGE_COUNT)
             )
             self._db.link(
                 table=DBConstants.EMAIL_ATTACHMENTS_TABLE,
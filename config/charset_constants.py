@@ -0,0 +1,44 @@
+# charset_constants.py
+class CharsetConstants:
+    # Byte order marks, longest first (the UTF-32 LE BOM starts with the UTF-16 LE one)
+    BOMS = [
+        (b'\x00\x00\xfe\xff', 'utf-32-be'),
+        (b'\xff\xfe\x00\x00', 'utf-32-le'),
+        (b'\xef\xbb\xbf', 'utf-8-sig'),
+        (b'\xfe\xff', 'utf-16-be'),
+        (b'\xff\xfe', 'utf-16-le'),
+    ]
+
+    # Labels which are decoded with a superset, as mail clients do (windows-1252 is a superset of latin-1)
+    LABEL_ALIASES = {
+        'iso8859-1': 'cp1252',
+        'ascii': 'cp1252',
+        'gb2312': 'gbk',
+    }
+
+    # Single-byte codecs which accept any byte sequence: a declared one is not trusted over valid UTF-8
+    PERMISSIVE_ENCODINGS = {'cp1252', 'iso8859-15', 'cp850', 'mac-roman'}
+
+    # Candidates tried by the byte-frequency heuristic, by order of preference in case of a tie
+    CANDIDATE_ENCODINGS = [
+        "cp1252",  # Western European languages on Windows, superset of latin-1
+        "iso8859-15",  # Latin-9, latin-1 with the euro sign
+        "cp850",  # DOS-specific encoding, often used for legacy files
+        "mac-roman",  # Encoding used on older Macintosh computers
+        "shift_jis",  # Japanese
+        "euc_jp",  # Japanese
+        "gbk",  # Simplified Chinese
+        "big5",  # Traditional Chinese
+    ]
+    MULTIBYTE_ENCODINGS = {'shift_jis', 'euc_jp', 'gbk', 'big5'}
+
+    # Accented letters frequent in French, Dutch, German and other Western European languages
+    COMMON_ACCENTED_LETTERS = set("àâäáãåçéèêëíìîïñóòôöõøúùûüýÿœæß"
+                                  "ÀÂÄÁÃÅÇÉÈÊËÍÌÎÏÑÓÒÔÖÕØÚÙÛÜÝŸŒÆ")
+    # Punctuation produced by windows-1252 in the 0x80-0x9F range
+    COMMON_PUNCTUATION = set("€‚„…†‡‰‹›‘’“”•–—™«»°§£©®")
+
+    # Only the beginning of big documents is used to score the candidates
+    HEURISTIC_SAMPLE_SIZE = 64 * 1024
+
+    SENDER_CACHE_SIZE = 10000
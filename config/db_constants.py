@@ -7,10 +7,14 @@ class DatabaseRetrieverConstants:
     ADDRESS = 'address'
     SUBJECT = 'subject'
     BODY = 'body'
+    FULL_BODY = 'full_body'
     ATTACHMENT_NAME = 'attachment_name'
     ATTACHMENT = 'attachment'
     KEYWORD_SEARCH_FIELDS: list[str] = [EVERYWHERE_LOCALISATION, CONTACT, ALIAS, ADDRESS, SUBJECT, BODY,
-                                        ATTACHMENT_NAME, ATTACHMENT]
+                                        FULL_BODY, ATTACHMENT_NAME, ATTACHMENT]
+    # Fields searched for 'everywhere': BODY is the new text of each email, its quoted history is already
+    # searched in the emails it comes from
+    EVERYWHERE_SEARCH_FIELDS: list[str] = [CONTACT, ALIAS, ADDRESS, SUBJECT, BODY, ATTACHMENT_NAME, ATTACHMENT]
 
     DEFAULT_WORD_OPERATOR: str = 'OR'
 
@@ -20,6 +24,121 @@ class DBConstants:
     DB_NAME: str = 'database.db'
     SQL_NAME: str = 'database/database.sql'
 
+    # Columns added after the first release of a table: {table: {column: definition}}.
+    # They are added to existing databases when EmailDatabase is created.
+    ADDED_COLUMNS: dict[str, dict[str, str]] = {
+        'Emails': {'new_body': 'TEXT', 'timestamp': 'INTEGER'},
+        'EmailAddresses': {'local_part': 'TEXT', 'domain': 'TEXT', 'reversed_registrable_domain': 'TEXT'},
+        'Attachments': {'extraction_status': 'TEXT', 'extraction_error': 'TEXT', 'size': 'INTEGER',
+                        'mime_type': 'TEXT', 'extension': 'TEXT', 'page_count': 'INTEGER'},
+    }
+
+    # Values of the ADDED_COLUMNS filled for the existing rows when the column is added: {table: {column: SQL
+    # expression}}, the expression is evaluated for each row of the table. The email_*() functions are the
+    # DomainParser methods registered by EmailDatabase.
+    BACKFILLED_COLUMNS: dict[str, dict[str, str]] = {
+        'Emails': {'timestamp': "(SELECT CAST(MIN(ts.timestamp) AS INTEGER) FROM Email_Timestamp eti "
+                                "JOIN Timestamp ts ON ts.id = eti.timestamp_id WHERE eti.email_id = Emails.id)"},
+        'EmailAddresses': {'local_part': "email_local_part(email_address)",
+                           'domain': "email_domain(email_address)",
+                           'reversed_registrable_domain': "email_reversed_registrable_domain(domain)"},
+        # Text after the last dot of the filename: RTRIM() removes the trailing characters other than '.'
+        'Attachments': {'extension': "CASE WHEN INSTR(filename, '.') THEN NULLIF(LOWER(SUBSTR(filename, "
+                                     "LENGTH(RTRIM(filename, REPLACE(filename, '.', ''))) + 1)), '') END"},
+    }
+
+    # PRAGMA profiles of the connections opened by ConnectionManager.
+    # 'bulk-load' trades durability for speed while filling the database (a crash can lose the last
+    # transactions, not corrupt the file), 'serve' is for the searches and the incremental updates.
+    BULK_LOAD_PROFILE: str = 'bulk-load'
+    SERVE_PROFILE: str = 'serve'
+    PRAGMA_PROFILES: dict[str, dict[str, str | int]] = {
+        BULK_LOAD_PROFILE: {
+            'journal_mode': 'WAL',
+            'synchronous': 'OFF',
+            'cache_size': -262144,  # KiB, 256 MiB
+            'mmap_size': 1 << 30,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 30000,
+        },
+        SERVE_PROFILE: {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'cache_size': -65536,  # KiB, 64 MiB
+            'mmap_size': 256 << 20,
+            'temp_store': 'MEMORY',
+            'busy_timeout': 5000,
+        },
+    }
+    DEFAULT_PROFILE: str = SERVE_PROFILE
+    # Selects the profile of every connection manager of the process when none is given
+    PROFILE_ENV_VAR: str = 'MESSAGETRACK_DB_PROFILE'
+
+    # Secondary indexes managed by IndexManager: {name: (table, columns)}. The UNIQUE constraints of
+    # database.sql only index the link tables by their first column, these serve the reverse lookups.
+    # They are dropped during a bulk load and built again afterwards.
+    SECONDARY_INDEXES: dict[str, tuple[str, tuple[str, ...]]] = {
+        'idx_email_addresses_domain': ('EmailAddresses', ('domain',)),
+        'idx_email_addresses_registrable_domain': ('EmailAddresses', ('reversed_registrable_domain', 'domain')),
+        'idx_contacts_alias_alias': ('Contacts_Alias', ('alias_id', 'contact_id')),
+        'idx_contacts_email_addresses_address': ('Contacts_EmailAddresses', ('email_address_id', 'contact_id')),
+        'idx_emails_timestamp': ('Emails', ('timestamp', 'id')),
+        'idx_email_date_date': ('Email_Date', ('date_id', 'email_id')),
+        'idx_email_timestamp_timestamp': ('Email_Timestamp', ('timestamp_id', 'email_id')),
+        'idx_email_participants_address': ('Email_Participants', ('email_address_id', 'role', 'email_id')),
+        'idx_email_attachments_attachment': ('Email_Attachments', ('attachment_id', 'email_id')),
+        'idx_attachments_mime_type': ('Attachments', ('mime_type', 'id')),
+        'idx_attachments_extension': ('Attachments', ('extension', 'id')),
+    }
+
+    # Full-text search (FTS5) tables kept by SearchIndex. They are contentless, the rowids are those of
+    # the Emails and Attachments rows. 'body' is the new text of the email, 'full_body' the whole body.
+    EMAILS_FTS_TABLE: str = 'EmailsFts'
+    EMAILS_FTS_COLUMNS: list[str] = ['subject', 'body', 'full_body']
+    ATTACHMENTS_FTS_TABLE: str = 'AttachmentsFts'
+    ATTACHMENTS_FTS_COLUMNS: list[str] = ['filename', 'extracted_text']
+    # Case and diacritic folding ("Été", "ete" and "été" are the same token), for French and Dutch mail
+    FTS_TOKENIZER: str = 'unicode61 remove_diacritics 2'
+
+    # Substring indexes (FTS5 'trigram' tokenizer) kept by TrigramIndex, used for LIKE '%x%' searches of
+    # at least TRIGRAM_MIN_LENGTH characters: {index table: (content table, content rowid, column)}.
+    # Remove SubjectsTrigram to search subjects by words only.
+    EMAIL_ADDRESSES_TRIGRAM_TABLE: str = 'EmailAddressesTrigram'
+    ALIAS_TRIGRAM_TABLE: str = 'AliasTrigram'
+    ATTACHMENT_NAMES_TRIGRAM_TABLE: str = 'AttachmentNamesTrigram'
+    SUBJECTS_TRIGRAM_TABLE: str = 'SubjectsTrigram'
+    TRIGRAM_INDEXES: dict[str, tuple[str, str, str]] = {
+        EMAIL_ADDRESSES_TRIGRAM_TABLE: ('EmailAddresses', 'id', 'email_address'),
+        ALIAS_TRIGRAM_TABLE: ('Alias', 'id', 'alias'),
+        ATTACHMENT_NAMES_TRIGRAM_TABLE: ('Attachments', 'rowid', 'filename'),
+        SUBJECTS_TRIGRAM_TABLE: ('Emails', 'rowid', 'subject'),
+    }
+    TRIGRAM_MIN_LENGTH: int = 3
+
+    # Transparent compression of Emails.body, Emails.new_body and Attachments.extracted_text by TextCompressor.
+    # Compressed values are stored as BLOBs (raw deflate with a preset dictionary trained on the stored
+    # texts), uncompressed ones stay TEXT, both can be mixed in a column. Searches always decompress.
+    TEXT_COMPRESSION: bool = False
+    COMPRESSED_COLUMNS: dict[str, list[str]] = {
+        'Emails': ['body', 'new_body'],
+        'Attachments': ['extracted_text'],
+    }
+    COMPRESSION_DICTIONARIES_TABLE: str = 'CompressionDictionaries'
+    COMPRESSION_LEVEL: int = 6
+    COMPRESSION_MIN_LENGTH: int = 128  # bytes, shorter texts are kept as TEXT
+    COMPRESSION_DICTIONARY_SIZE: int = 32 * 1024  # the deflate window, a larger dictionary is never used
+    COMPRESSION_TRAINING_SAMPLES: int = 2000
+    COMPRESSION_BATCH_SIZE: int = 500
+
+    # Attachments.content BLOBs moved to the attachment store per transaction by AttachmentBlobMigration
+    BLOB_MIGRATION_BATCH_SIZE: int = 200
+    # Deferred attachments extracted per batch by DeferredExtraction
+    DEFERRED_EXTRACTION_BATCH_SIZE: int = 50
+
+    # Queries executed by DatabaseRetriever, replayed by the index advisor
+    QUERY_LOG_PATH: str = 'logs/database_queries.jsonl'
+    QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+
 
 
 
@@ -41,6 +160,8 @@ class DBConstants:
     # EmailAddresses
     EMAIL_ADDRESSES_TABLE: str = 'EmailAddresses'
     EMAIL_ADDRESSES_COLUMNS: list[str] = ['email_address']
+    # Parsed from the address by EmailDatabase.insert_email_address
+    EMAIL_ADDRESSES_DOMAIN_COLUMNS: list[str] = ['local_part', 'domain', 'reversed_registrable_domain']
 
     # Contacts_EmailAddresses
     CONTACT_EMAIL_ADDRESSES_TABLE: str = 'Contacts_EmailAddresses'
@@ -48,7 +169,7 @@ class DBConstants:
 
     # Emails
     EMAILS_TABLE: str = 'Emails'
-    EMAILS_COLUMNS: list[str] = ['id', 'filepath', 'filename', 'subject', 'body']
+    EMAILS_COLUMNS: list[str] = ['id', 'filepath', 'filename', 'subject', 'body', 'new_body', 'timestamp']
 
     # Date
     DATE_TABLE: str = 'Date'
@@ -66,25 +187,26 @@ class DBConstants:
     EMAIL_TIMESTAMP_TABLE: str = 'Email_Timestamp'
     EMAIL_TIMESTAMP_COLUMNS: list[str] = ['email_id', 'timestamp_id']
 
-    # Email_From
-    EMAIL_FROM_TABLE: str = 'Email_From'
-    EMAIL_FROM_COLUMNS: list[str] = ['email_id', 'email_address_id']
-
-    # Email_To
-    EMAIL_TO_TABLE: str = 'Email_To'
-    EMAIL_TO_COLUMNS: list[str] = ['email_id', 'email_address_id']
-
-    # Email_Cc
-    EMAIL_CC_TABLE: str = 'Email_Cc'
-    EMAIL_CC_COLUMNS: list[str] = ['email_id', 'email_address_id']
-
-    # Email_Bcc
-    EMAIL_BCC_TABLE: str = 'Email_Bcc'
-    EMAIL_BCC_COLUMNS: list[str] = ['email_id', 'email_address_id']
+    # Email_Participants
+    EMAIL_PARTICIPANTS_TABLE: str = 'Email_Participants'
+    EMAIL_PARTICIPANTS_COLUMNS: list[str] = ['email_id', 'email_address_id', 'role']
+    FROM_ROLE: str = 'from'
+    TO_ROLE: str = 'to'
+    CC_ROLE: str = 'cc'
+    BCC_ROLE: str = 'bcc'
+    # Link tables of the versions before Email_Participants: {table: role}.
+    # Their rows are moved to Email_Participants when EmailDatabase is created, then they are dropped.
+    LEGACY_PARTICIPANT_TABLES: dict[str, str] = {
+        'Email_From': FROM_ROLE,
+        'Email_To': TO_ROLE,
+        'Email_Cc': CC_ROLE,
+        'Email_Bcc': BCC_ROLE,
+    }
 
     # Attachments
     ATTACHMENTS_TABLE: str = 'Attachments'
-    ATTACHMENTS_COLUMNS: list[str] = ['id', 'filename', 'content', 'extracted_text']
+    ATTACHMENTS_COLUMNS: list[str] = ['id', 'filename', 'size', 'mime_type', 'extension', 'page_count',
+                                      'extracted_text', 'extraction_status', 'extraction_error']
 
     # Email_Attachments
     EMAIL_ATTACHMENTS_TABLE: str = 'Email_Attachments'
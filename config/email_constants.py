@@ -14,11 +14,18 @@ CC_ADDRESSES = 'cc_addresses'
 BCC_NAMES = 'bcc_names'
 BCC_ADDRESSES = 'bcc_addresses'
 BODY = 'body'
+NEW_BODY = 'new_body'
 ATTACHMENTS = 'attachments'
 
 ATTACHMENT_ID = 'attachment_id'
 ATTACHMENT_FILENAME = 'filename'
-ATTACHMENT_CONTENT = 'content'
+ATTACHMENT_SIZE = 'size'
+ATTACHMENT_MIME_TYPE = 'mime_type'
+ATTACHMENT_EXTENSION = 'extension'
+ATTACHMENT_PAGE_COUNT = 'page_count'
 ATTACHMENT_EXTRACTED_TEXT = 'extracted_text'
+ATTACHMENT_FILEPATH = 'filepath'
+ATTACHMENT_EXTRACTION_STATUS = 'extraction_status'
+ATTACHMENT_EXTRACTION_ERROR = 'extraction_error'
 
 DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
\ No newline at end of file
@@ -1,4 +1,69 @@
 # email_parser_constants.py
 class EmailParserConstants:
     ATTACHMENTS_DIRECTORY = 'attachments'
-    DATE = 'date'
\ No newline at end of file
+    DATE = 'date'
+    # Directory for attachments of large emails decoded to disk (None: system temporary directory)
+    SPOOL_DIRECTORY = None
+    SPILLABLE_TRANSFER_ENCODINGS = ('base64', 'quoted-printable', '7bit', '8bit', 'binary', '')
+    # Attachments are stored as <directory>/ab/cd/<digest>: SHARD_LEVELS directories of SHARD_WIDTH
+    # characters taken from the start of the digest
+    ATTACHMENT_SHARD_LEVELS = 2
+    ATTACHMENT_SHARD_WIDTH = 2
+    # Compression of the stored attachments: None or 'gzip' (files named <digest>.gz). The
+    # extractors read a temporary decompressed copy.
+    ATTACHMENT_COMPRESSION = None
+    ATTACHMENT_COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class ReplyStripperConstants:
+    # "On ... wrote:" lines introducing the quoted history, they are often wrapped on two lines
+    REPLY_HEADER_PATTERNS = [
+        r'^On\b.+\bwrote\s*:$',  # English
+        r'^Le\b.+\ba [ée]crit\s*:$',  # French
+        r'^Op\b.+\bschreef\b.*:$',  # Dutch
+        r'^Am\b.+\bschrieb\b.*:$',  # German
+        r'^El\b.+\bescribi[óo]\s*:$',  # Spanish
+        r'^Il\b.+\bha scritto\s*:$',  # Italian
+        r'^Em\b.+\bescreveu\s*:$',  # Portuguese
+    ]
+    ORIGINAL_MESSAGE_PATTERN = (r"^-{2,}\s*(Original Message|Message d'origine|Message original|Oorspronkelijk bericht|"
+                                r"Ursprüngliche Nachricht|Mensaje original|Messaggio originale|Mensagem original)"
+                                r"\s*-{2,}$")
+    # Outlook quotes the previous message under a From / Sent header block
+    OUTLOOK_FROM_PATTERN = r'^\*?(From|De|Van|Von|Da)\s*:\*?\s'
+    OUTLOOK_SENT_PATTERN = r'^\*?(Sent|Envoyé|Verzonden|Gesendet|Enviado|Inviato|Date|Datum|Data)\s*:\*?\s'
+    OUTLOOK_HEADER_LINES = 4
+
+    # Signature delimiters (RFC 3676 "-- " and Outlook separator lines)
+    SIGNATURE_PATTERN = r'^(--\s?|_{10,})$'
+    MOBILE_SIGNATURE_PATTERN = (r'^(Sent from my|Envoyé de mon|Verzonden (vanaf|met) mijn|Von meinem .* gesendet|'
+                                r'Enviado desde mi|Inviato da)\b')
+    LEGAL_FOOTER_PATTERN = (r'(this (e-?mail|message|communication)( and any attachments?)?( \w+)? (is|are|may be) '
+                            r'(strictly )?(confidential|privileged|intended)|'
+                            r'ce (message|courriel|mail)( et (toutes )?les pi[èe]ces jointes)?( \w+)? (est|sont) '
+                            r'(strictement )?(confidentiel|destin)|'
+                            r'(dit|deze) (e-?mail|bericht)( en eventuele bijlagen)?( \w+)? (is|zijn) '
+                            r'(uitsluitend|vertrouwelijk|bestemd)|'
+                            r'disclaimer\s*:)')
+
+    # A trailing paragraph seen this many times in the previous messages of a sender is a signature or footer
+    REPEATED_BLOCK_THRESHOLD = 3
+    REPEATED_BLOCK_MIN_LENGTH = 20
+    SENDER_HISTORY_SIZE = 5000
+    BLOCKS_PER_SENDER = 200
+
+
+class DomainConstants:
+    # Public suffixes of more than one label, the registrable domain of 'mail.client.co.uk' is 'client.co.uk'.
+    # Other domains are registered directly under their last label. This is the part of the Public Suffix
+    # List seen in our mail, add the suffixes of new correspondents here.
+    MULTI_LABEL_PUBLIC_SUFFIXES = {
+        'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'ltd.uk', 'plc.uk', 'me.uk', 'nhs.uk',
+        'com.au', 'net.au', 'org.au', 'edu.au', 'gov.au',
+        'co.nz', 'org.nz', 'govt.nz', 'co.za', 'org.za', 'gov.za',
+        'co.jp', 'ne.jp', 'or.jp', 'ac.jp', 'go.jp', 'co.kr', 'or.kr',
+        'com.cn', 'net.cn', 'org.cn', 'gov.cn', 'com.hk', 'com.sg', 'com.tw', 'co.in', 'gov.in',
+        'com.br', 'net.br', 'org.br', 'gov.br', 'com.ar', 'com.mx', 'com.tr', 'gov.tr', 'co.il', 'gov.il',
+        'gouv.fr', 'asso.fr', 'com.pl', 'org.pl', 'co.at', 'or.at', 'gv.at', 'com.es', 'org.es', 'com.pt',
+        'com.gr', 'gov.gr', 'com.cy', 'com.mt', 'co.hu', 'com.ua', 'com.ru', 'eu.com', 'uk.com', 'us.com',
+    }
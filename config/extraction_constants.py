@@ -0,0 +1,59 @@
+# extraction_constants.py
+class ExtractionConstants:
+    # Version of the text extractors, bump it when they change so cached texts are extracted again
+    EXTRACTOR_VERSION = 1
+
+    # Persistent cache of the extracted texts, keyed by attachment digest
+    CACHE_PATH = 'extraction_cache.db'
+    CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+    # When the cache is full, the least recently used texts are evicted down to this fraction of its size
+    CACHE_EVICTION_RATIO = 0.9
+
+    # Extraction worker pool
+    POOL_SIZE = 4
+    # Wall-clock time allowed to extract one attachment, in seconds
+    JOB_TIMEOUT = 120
+    # Address space limit (RLIMIT_AS) of a worker process, in bytes. None disables the limit.
+    WORKER_MEMORY_LIMIT = 2 * 1024 * 1024 * 1024
+    # A worker process is replaced after this number of extractions, which bounds fragmentation and leaks
+    JOBS_PER_WORKER = 200
+    POOL_START_METHOD = 'fork'
+
+    # Extraction status stored on the attachment rows
+    STATUS_OK = 'ok'
+    STATUS_TIMEOUT = 'timeout'
+    STATUS_CRASHED = 'crashed'
+    STATUS_MEMORY_LIMIT = 'memory_limit'
+    STATUS_ERROR = 'error'
+    # Set by the attachment policy when the text is not extracted
+    STATUS_NOT_EXTRACTED = 'not_extracted'
+    STATUS_DEFERRED = 'deferred'
+
+
+class AttachmentPolicyConstants:
+    # Actions decided for an attachment
+    EXTRACT = 'extract'  # Stored and its text extracted
+    STORE = 'store'  # Stored, no text extraction
+    DEFER = 'defer'  # Stored, text extraction left to DeferredExtraction (extraction_status 'deferred')
+    SKIP = 'skip'  # Neither stored nor extracted
+    ACTIONS = (EXTRACT, STORE, DEFER, SKIP)
+
+    # Optional JSON file overriding the policy below for a deployment, same keys as DEFAULT_POLICY
+    CONFIG_PATH = 'attachment_policy.json'
+
+    # Rules are checked in order, the first one matching the declared MIME type (shell-style patterns) and
+    # the size (bytes, bounds included) gives the action. Time budgets are in seconds of extraction, None
+    # means unlimited: once a budget is spent, 'extract' becomes 'defer'. Mail clients often declare
+    # documents and archives as application/octet-stream, so big ones are deferred rather than skipped.
+    DEFAULT_POLICY = {
+        'rules': [
+            {'mime_types': ['video/*', 'audio/*', 'application/x-iso9660-image', 'application/x-cd-image'],
+             'min_size': 50 * 1024 * 1024, 'action': SKIP},
+            {'mime_types': ['application/octet-stream'], 'min_size': 50 * 1024 * 1024, 'action': DEFER},
+            {'mime_types': ['image/*', 'video/*', 'audio/*', 'font/*'], 'action': STORE},
+            {'min_size': 100 * 1024 * 1024, 'action': DEFER},
+        ],
+        'default_action': EXTRACT,
+        'email_time_budget': 300,
+        'run_time_budget': None,
+    }
@@ -20,21 +20,100 @@ class FileConstants:
 
     TEMP_EML_STORAGE_DIR = '/tmp'
 
-    # Encoding types for text extraction
-    SUPPORTED_ENCODINGS = [
-        "utf-8",  # Most common encoding for modern text files
-        "latin-1",  # Common in Western Europe and the Americas
-        "ascii",  # Basic English encoding
-        "windows-1252",  # Common in Western European languages on Windows
-        "iso-8859-1",  # Latin alphabet part 1
-        "iso-8859-15",  # Similar to iso-8859-1 with some additional characters
-        "shift_jis",  # Common in Japanese
-        "euc-jp",  # Japanese encoding
-        "big5",  # Traditional Chinese encoding
-        "gb2312",  # Simplified Chinese encoding
-        "gbk",  # Extended Chinese encoding
-        "utf-16",  # Unicode Transformation Format
-        "utf-32",  # Unicode Transformation Format (32-bit)
-        "cp850",  # DOS-specific encoding, often used for legacy files
-        "mac-roman",  # Encoding used on older Macintosh computers
-    ]
+
+class MimeConstants:
+    # Detected types telling nothing about the content, the declared type is kept instead
+    GENERIC_MIME_TYPES = {'application/octet-stream', 'inode/x-empty', 'application/x-empty'}
+    # Non-standard names of a type: alias -> type stored in Attachments.mime_type
+    ALIASES = {
+        'application/x-pdf': 'application/pdf',
+        'application/acrobat': 'application/pdf',
+        'image/jpg': 'image/jpeg',
+        'image/pjpeg': 'image/jpeg',
+        'image/x-png': 'image/png',
+        'application/x-zip-compressed': 'application/zip',
+        'application/x-zip': 'application/zip',
+        'application/x-gzip': 'application/gzip',
+        'application/x-rar-compressed': 'application/vnd.rar',
+        'application/x-rar': 'application/vnd.rar',
+        'text/xml': 'application/xml',
+    }
+    # Bytes read from the start of an attachment to detect its type
+    SNIFF_SIZE = 8192
+
+
+class HtmlConstants:
+    # Elements whose content is never displayed as text
+    SKIPPED_TAGS = {'script', 'style', 'head', 'title', 'noscript', 'template', 'svg', 'object', 'iframe'}
+    # Elements rendered on their own line
+    BLOCK_TAGS = {'p', 'div', 'br', 'hr', 'li', 'tr', 'table', 'ul', 'ol', 'dl', 'dt', 'dd', 'blockquote',
+                  'pre', 'section', 'article', 'header', 'footer', 'nav', 'aside', 'address', 'form',
+                  'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'center', 'caption'}
+    CELL_TAGS = {'td', 'th'}
+    VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+                 'source', 'track', 'wbr'}
+    # Inline styles hiding an element (preheaders, tracking blocks)
+    HIDDEN_STYLES = ('display:none', 'visibility:hidden', 'mso-hide:all')
+
+
+class PdfConstants:
+    # Backends tried in this order, the fastest first: (name, modules providing it)
+    BACKENDS = (('pymupdf', ('pymupdf', 'fitz')), ('pypdf', ('pypdf', 'PyPDF2')), ('pdfminer', ('pdfminer.high_level',)))
+    # Extraction budgets, the text of the pages beyond them is not extracted
+    MAX_PAGES = 2000
+    MAX_CHARS = 10 * 1024 * 1024
+    # Documents with at least this number of pages are split into page ranges extracted in parallel
+    PARALLEL_PAGE_THRESHOLD = 200
+    PAGE_RANGE_SIZE = 100
+    MAX_WORKERS = 2
+
+
+class ArchiveConstants:
+    ZIP_MIME_TYPES = {'application/zip', 'application/x-zip-compressed'}
+    TAR_MIME_TYPES = {'application/x-tar'}
+    # Compressed streams: a tar archive or a single compressed file
+    COMPRESSED_MIME_TYPES = {'application/gzip', 'application/x-gzip', 'application/x-bzip2', 'application/x-xz'}
+    SEVEN_ZIP_MIME_TYPES = {'application/x-7z-compressed'}
+    # Formats only handled by patool, extracted to a temporary directory
+    PATOOL_MIME_TYPES = {'application/x-rar', 'application/x-rar-compressed', 'application/vnd.rar'}
+
+    # Limits protecting against archive bombs
+    MAX_DEPTH = 3  # Archives nested deeper are not opened
+    MAX_MEMBERS = 1000
+    MAX_MEMBER_SIZE = 100 * 1024 * 1024  # Bigger members are skipped
+    MAX_TOTAL_SIZE = 512 * 1024 * 1024
+    # Expanded size / archive size, only checked once RATIO_CHECK_SIZE bytes are expanded
+    MAX_EXPANSION_RATIO = 100
+    RATIO_CHECK_SIZE = 16 * 1024 * 1024
+    READ_CHUNK_SIZE = 1024 * 1024
+    # Seconds between two checks of the directory patool extracts to
+    PATOOL_POLL_INTERVAL = 0.05
+
+
+class OfficeConstants:
+    # LibreOffice executables, the first one found in the PATH is used
+    BINARIES = ('soffice', 'libreoffice')
+    # Legacy formats converted before extraction: MIME type -> (source extension, target extension)
+    CONVERSIONS = {
+        'application/msword': ('doc', 'docx'),
+        'application/vnd.ms-excel': ('xls', 'xlsx'),
+        'application/vnd.ms-powerpoint': ('ppt', 'pdf'),
+    }
+    # Conversions submitted within this delay (seconds) are run by the same LibreOffice invocation
+    BATCH_WINDOW = 0.2
+    MAX_BATCH_SIZE = 50
+    # Timeout of a LibreOffice invocation: base + per file, in seconds
+    BATCH_TIMEOUT = 60
+    FILE_TIMEOUT = 30
+
+
+class SpreadsheetConstants:
+    # Extraction budgets, counted over all the sheets of a workbook
+    MAX_ROWS = 200000
+    MAX_CELLS = 5000000
+    MAX_CHARS = 10 * 1024 * 1024
+    # ODS stores runs of identical cells and rows as one element with a repeat count, which can be huge
+    # for empty trailing cells. Non-empty runs are expanded up to this count.
+    MAX_REPEATED = 1000
+    ODS_TABLE_NAMESPACE = 'urn:oasis:names:tc:opendocument:xmlns:table:1.0'
+    ODS_TEXT_NAMESPACE = 'urn:oasis:names:tc:opendocument:xmlns:text:1.0'
@@ -4,4 +4,11 @@ class SystemConfig:
     Configuration settings for system performance related parameters.
     """
     MAX_WORKERS = 4
-    DEFAULT_BATCH_SIZE = 799
\ No newline at end of file
+    DEFAULT_BATCH_SIZE = 799
+
+    # Emails larger than this (in bytes) are fed incrementally to the parser instead of being read at once
+    LARGE_EMAIL_THRESHOLD = 32 * 1024 * 1024
+    # Size of the chunks read from disk and fed to the incremental parser
+    FEED_CHUNK_SIZE = 1024 * 1024
+    # Attachments of large emails bigger than this (encoded size, in bytes) are decoded to disk
+    SPILL_PART_THRESHOLD = 4 * 1024 * 1024
@@ -0,0 +1,87 @@
+# attachment_blob_migration.py
+# Libraries
+import argparse
+import sqlite3
+# Interfaces
+from database.iattachment_blob_migration import IAttachmentBlobMigration
+from utils.iblob_store import IBlobStore
+# Constants
+from config.db_constants import DBConstants
+from config.email_parser_constants import EmailParserConstants
+# Personal libraries
+from database.connection_manager import ConnectionManager, get_connection_manager
+from utils.attachment_store import AttachmentStore
+from utils.logging_setup import log_email_database
+
+
+class AttachmentBlobMigration(IAttachmentBlobMigration):
+    """
+    Moves the attachment contents stored in Attachments.content by earlier versions into the blob store,
+    then drops the column.
+
+    Each BLOB is streamed from SQLite to the store, it is never loaded whole in memory. The rows are
+    processed by batches of batch_size, one transaction each, so an interrupted migration resumes where
+    it stopped. The file is only shrunk by a VACUUM afterwards.
+    """
+
+    def __init__(self, connection_manager: ConnectionManager, blob_store: IBlobStore,
+                 batch_size: int = DBConstants.BLOB_MIGRATION_BATCH_SIZE):
+        self.connections = connection_manager
+        self.blob_store = blob_store
+        self.batch_size = batch_size
+
+    def pending(self) -> int:
+        if not self._has_content_column():
+            return 0
+        return self.connections.reader().execute(
+            f"SELECT COUNT(*) FROM {DBConstants.ATTACHMENTS_TABLE} WHERE content IS NOT NULL").fetchone()[0]
+
+    def run(self) -> int:
+        if not self._has_content_column():
+            return 0
+        moved = 0
+        while True:
+            with self.connections.writer() as conn:
+                rows = conn.execute(f"SELECT rowid, id FROM {DBConstants.ATTACHMENTS_TABLE} "
+                                    f"WHERE content IS NOT NULL LIMIT ?", (self.batch_size,)).fetchall()
+                for rowid, digest in rows:
+                    with conn.blobopen(DBConstants.ATTACHMENTS_TABLE, 'content', rowid, readonly=True) as blob:
+                        size = len(blob)
+                        self.blob_store.store_stream(digest=digest, stream=blob)
+                    conn.execute(f"UPDATE {DBConstants.ATTACHMENTS_TABLE} SET content = NULL, "
+                                 f"size = COALESCE(size, ?) WHERE rowid = ?", (size, rowid))
+            if not rows:
+                break
+            moved += len(rows)
+            log_email_database.info(f"Func: run, {moved} attachment contents moved to the blob store")
+        self._drop_content_column()
+        return moved
+
+    def _has_content_column(self) -> bool:
+        columns = {row[1] for row in self.connections.reader().execute(
+            f"PRAGMA table_info({DBConstants.ATTACHMENTS_TABLE})")}
+        return 'content' in columns
+
+    def _drop_content_column(self) -> None:
+        try:
+            with self.connections.writer() as conn:
+                conn.execute(f"ALTER TABLE {DBConstants.ATTACHMENTS_TABLE} DROP COLUMN content")
+        except sqlite3.OperationalError as e:
+            # SQLite before 3.35, the column stays empty
+            log_email_database.warning(f"Func: _drop_content_column, column kept: {e}")
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Moves the attachment BLOBs of the database to the attachment store.")
+    parser.add_argument('--db', default=DBConstants.DB_NAME, help="Database file")
+    parser.add_argument('--attachments-directory', default=EmailParserConstants.ATTACHMENTS_DIRECTORY,
+                        help="Attachment store directory")
+    args = parser.parse_args(argv)
+    migration = AttachmentBlobMigration(connection_manager=get_connection_manager(args.db),
+                                        blob_store=AttachmentStore(directory=args.attachments_directory))
+    moved = migration.run()
+    print(f"{moved} attachment contents moved to {args.attachments_directory}, run VACUUM to shrink {args.db}")
+
+
+if __name__ == "__main__":
+    main()
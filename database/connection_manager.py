@@ -0,0 +1,151 @@
+# connection_manager.py
+# Libraries
+import atexit
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterator
+# Interfaces
+from database.iconnection_manager import IConnectionManager
+# Constants
+from config.db_constants import DBConstants
+# Personal libraries
+from utils.logging_setup import log_email_database
+
+
+class ConnectionManager(IConnectionManager):
+    """
+    Long-lived SQLite connections of one database: one read-only connection per thread and a single
+    writer connection shared by all the threads.
+
+    Every connection is configured with a PRAGMA profile of DBConstants.PRAGMA_PROFILES. Both profiles use
+    WAL, so the searches keep reading the last committed state while the writer inserts. Writes are
+    serialized by a reentrant lock: nested writer() blocks of the same thread form one transaction,
+    committed when the outermost block exits.
+
+    Connections are never shared with a forked child, which opens its own on first use.
+    """
+
+    def __init__(self, db_name: str = DBConstants.DB_NAME, profile: str = None):
+        profile = profile or os.environ.get(DBConstants.PROFILE_ENV_VAR) or DBConstants.DEFAULT_PROFILE
+        if profile not in DBConstants.PRAGMA_PROFILES:
+            raise ValueError(f"Unknown PRAGMA profile '{profile}', expected one of "
+                             f"{list(DBConstants.PRAGMA_PROFILES)}")
+        self.db_name = db_name
+        self._profile = profile
+        self._write_lock = threading.RLock()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._writer = None
+        self._write_depth = 0
+        self._local = threading.local()
+        self._readers = []
+        self._inherited = []
+        self._functions = {}
+
+    @property
+    def profile(self) -> str:
+        return self._profile
+
+    def reader(self) -> sqlite3.Connection:
+        """Returns the read-only connection of the calling thread."""
+        self._check_process()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Holds the writer connection, commits on exit or rolls back if an exception is raised."""
+        self._check_process()
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+            self._write_depth += 1
+            try:
+                yield self._writer
+            except BaseException:
+                self._write_depth -= 1
+                if self._write_depth == 0:
+                    self._writer.rollback()
+                raise
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer.commit()
+
+    def create_function(self, name: str, narg: int, func: Callable) -> None:
+        """Registers an SQL function on the open connections and on those opened later."""
+        with self._lock:
+            self._functions[name] = (narg, func)
+            connections = self._readers + ([self._writer] if self._writer is not None else [])
+        for conn in connections:
+            conn.create_function(name, narg, func, deterministic=True)
+
+    def close(self) -> None:
+        with self._write_lock, self._lock:
+            if self._writer is not None:
+                if self._profile == DBConstants.BULK_LOAD_PROFILE:
+                    # Fold the WAL back into the database, it can be large after a bulk load
+                    self._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                self._writer.close()
+                self._writer = None
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        for pragma, value in DBConstants.PRAGMA_PROFILES[self._profile].items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        for name, (narg, func) in list(self._functions.items()):
+            conn.create_function(name, narg, func, deterministic=True)
+        log_email_database.info(f"Func: _connect, {self.db_name} opened with the '{self._profile}' profile")
+        return conn
+
+    def _check_process(self) -> None:
+        if os.getpid() == self._pid:
+            return
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Closing the parent's connections here would release its file locks, they are only dropped
+                self._inherited.extend(conn for conn in self._readers + [self._writer] if conn is not None)
+                self._pid = os.getpid()
+                self._writer = None
+                self._write_depth = 0
+                self._write_lock = threading.RLock()
+                self._readers = []
+                self._local = threading.local()
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_name: str = DBConstants.DB_NAME, profile: str = None) -> ConnectionManager:
+    """
+    Returns the connection manager of a database, shared by all the EmailDatabase and DatabaseRetriever of
+    the process. The profile is set by the first caller.
+    """
+    key = os.path.abspath(db_name)
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = ConnectionManager(db_name=db_name, profile=profile)
+        elif profile and profile != manager.profile:
+            log_email_database.warning(f"Func: get_connection_manager, {db_name} already uses the "
+                                       f"'{manager.profile}' profile, '{profile}' ignored")
+        return manager
+
+
+@atexit.register
+def _close_managers() -> None:
+    with _managers_lock:
+        for manager in _managers.values():
+            manager.close()
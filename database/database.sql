@@ -20,7 +20,10 @@ CREATE TABLE IF NOT EXISTS Contacts_Alias(
 
 CREATE TABLE IF NOT EXISTS EmailAddresses(
     id INTEGER PRIMARY KEY,
-    email_address TEXT UNIQUE NOT NULL COLLATE NOCASE
+    email_address TEXT UNIQUE NOT NULL COLLATE NOCASE,
+    local_part TEXT,
+    domain TEXT, -- lower case, ex. 'mail.client.be'
+    reversed_registrable_domain TEXT -- labels reversed, ex. 'be.client', for the domain and subdomain filters
 );
 
 CREATE TABLE IF NOT EXISTS Contacts_EmailAddresses(
@@ -36,7 +39,9 @@ CREATE TABLE IF NOT EXISTS Emails (
     filepath TEXT,
     filename TEXT,
     subject TEXT,
-    body TEXT
+    body TEXT,
+    new_body TEXT, -- body without quoted history, footers and signature, used for searching
+    timestamp INTEGER -- UTC epoch of the date, for the date range searches (idx_emails_timestamp)
 );
 
 -- Putting dates in a specific table will make it easier to aggregate all types of data:
@@ -69,43 +74,27 @@ CREATE TABLE IF NOT EXISTS Email_Timestamp(
     UNIQUE(email_id, timestamp_id)
 );
 
-CREATE TABLE IF NOT EXISTS Email_From(
-    email_id TEXT,
-    email_address_id INTEGER,
+-- Senders and recipients of the emails, role is 'from', 'to', 'cc' or 'bcc'.
+-- The primary key serves the lookups by email, idx_email_participants_address those by address.
+CREATE TABLE IF NOT EXISTS Email_Participants(
+    email_id TEXT NOT NULL,
+    email_address_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
     FOREIGN KEY(email_id) REFERENCES Emails(id),
     FOREIGN KEY(email_address_id) REFERENCES EmailAddresses(id),
-    UNIQUE(email_id, email_address_id)
-);
-
-CREATE TABLE IF NOT EXISTS Email_To(
-    email_id TEXT,
-    email_address_id INTEGER,
-    FOREIGN KEY(email_id) REFERENCES Emails(id),
-    FOREIGN KEY(email_address_id) REFERENCES EmailAddresses(id),
-    UNIQUE(email_id, email_address_id)
-);
-
-CREATE TABLE IF NOT EXISTS Email_Cc(
-    email_id TEXT,
-    email_address_id INTEGER,
-    FOREIGN KEY(email_id) REFERENCES Emails(id),
-    FOREIGN KEY(email_address_id) REFERENCES EmailAddresses(id),
-    UNIQUE(email_id, email_address_id)
-);
-
-CREATE TABLE IF NOT EXISTS Email_Bcc(
-    email_id TEXT,
-    email_address_id INTEGER,
-    FOREIGN KEY(email_id) REFERENCES Emails(id),
-    FOREIGN KEY(email_address_id) REFERENCES EmailAddresses(id),
-    UNIQUE(email_id, email_address_id)
-);
+    PRIMARY KEY(email_id, email_address_id, role)
+) WITHOUT ROWID;
 
 CREATE TABLE IF NOT EXISTS Attachments(
     id TEXT PRIMARY KEY,
     filename TEXT,
-    content BLOB,
-    extracted_text TEXT
+    size INTEGER,
+    mime_type TEXT, -- the content is in the attachment store, under the digest (id)
+    extension TEXT, -- lower case, without the dot
+    page_count INTEGER,
+    extracted_text TEXT,
+    extraction_status TEXT,
+    extraction_error TEXT
 );
 
 CREATE TABLE IF NOT EXISTS Email_Attachments(
@@ -115,3 +104,10 @@ CREATE TABLE IF NOT EXISTS Email_Attachments(
     FOREIGN KEY(attachment_id) REFERENCES Attachments(id),
     UNIQUE(email_id, attachment_id)
 );
+
+
+-- Preset dictionaries of the compressed texts, see TextCompressor
+CREATE TABLE IF NOT EXISTS CompressionDictionaries(
+    id INTEGER PRIMARY KEY,
+    dictionary BLOB NOT NULL
+);
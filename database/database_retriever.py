@@ -4,22 +4,31 @@ from database.idatabase_retriever import IDatabaseRetriever
 
 # Constants
 from config.db_constants import DBConstants, DatabaseRetrieverConstants
+from config.file_constants import MimeConstants
 from config.sql_constants import *
+from config.email_constants import (EMAIL_ID, SUBJECT, BODY, NEW_BODY, ATTACHMENTS, ATTACHMENT_ID,
+                                    ATTACHMENT_FILENAME, ATTACHMENT_EXTRACTED_TEXT)
 
 # Personal libraries
+from database.connection_manager import get_connection_manager
+from database.query_log import query_log
+from database.search_index import SearchIndex
+from database.text_compressor import TextCompressor
+from database.trigram_index import TrigramIndex
 from utils.date_transformer import DateTransformer
+from utils.domain_parser import domain_parser
 from utils.string_cleaner import StringCleaner
 
 # Libraries
-from abc import abstractmethod
-import sqlite3
+import mimetypes
 from typing import Self
 
 
 class DatabaseRetriever(IDatabaseRetriever):
     def __init__(self, db_name: str = DBConstants.DB_NAME, contacts: list = [], aliases: list = [],
                  addresses: list = [], start_date: str = "", end_date: str = "", words: list = [],
-                 words_localization: list = [], word_operator: str = 'OR', attachment_types: list = []):
+                 words_localization: list = [], word_operator: str = 'OR', attachment_types: list = [],
+                 domains: list = [], subdomains: list = []):
         """
         : contacts: filtering on specific contacts
         : aliases: filtering on specific aliases
@@ -28,13 +37,22 @@ class DatabaseRetriever(IDatabaseRetriever):
         : end_date: filtering on end date,ex. str(YYYY-MM-DD hh:mm:ss)
         : words: list of words to find
         :words_localization: list of words localization ['everywhere', 'contact', 'alias', 'address',
-                                'subject', 'body', 'attachment_name', 'attachment']
+                                'subject', 'body', 'full_body', 'attachment_name', 'attachment']
+                             'body' searches the new text of each email, 'full_body' includes its quoted history
         :word_operator: "AND" or "OR"
         :attachment_types: filtering on attachment types
+        :domains: filtering on the exact domain of the addresses, ex. 'client.be'
+        :subdomains: filtering on a domain and all its subdomains, ex. 'client.be' also finds 'mail.client.be',
+                     'be' finds every organisation under .be
 
         """
         # region args
         self.db_name = db_name
+        self.connections = get_connection_manager(db_name)
+        self.compressor = TextCompressor(connection_manager=self.connections)
+        self.search_index = SearchIndex(connection_manager=self.connections, text_compressor=self.compressor)
+        self.full_text = self.search_index.available
+        self.trigram_index = TrigramIndex(connection_manager=self.connections)
         self.contacts = contacts
         self.aliases = aliases
         self.addresses = addresses
@@ -44,6 +62,8 @@ class DatabaseRetriever(IDatabaseRetriever):
         self.words_localization = words_localization
         self.word_operator = word_operator
         self.attachment_types = attachment_types
+        self.domains = domains
+        self.subdomains = subdomains
         # endregion
         # region constants
         self.valid_localizations = DatabaseRetrieverConstants.KEYWORD_SEARCH_FIELDS  # todo
@@ -59,8 +79,9 @@ class DatabaseRetriever(IDatabaseRetriever):
 
         self.sc = StringCleaner()
         self.join_clauses = []
-        self.where_clauses = set()
-        self.where_and_clauses = set()  # mandatory clauses (AND) ex. dates
+        self.where_clauses = {}  # condition: its bound parameters, in the order of the query
+        self.where_and_clauses = {}  # mandatory clauses (AND) ex. dates
+        self.params = []
         self.order_by_clause = ""
         self.limit_clause = ""
         self.request = ""
@@ -71,7 +92,7 @@ class DatabaseRetriever(IDatabaseRetriever):
                 raise TypeError(f'{arg} must be a string')
 
         for arg in [self.contacts, self.aliases, self.addresses, self.words, self.words_localization,
-                    self.attachment_types]:
+                    self.attachment_types, self.domains, self.subdomains]:
             if not isinstance(arg, list):
                 raise TypeError(f'{arg} must be a list')
 
@@ -79,7 +100,6 @@ class DatabaseRetriever(IDatabaseRetriever):
         if self.word_operator not in ["AND", "OR"]:
             raise TypeError(f'word operator must be OR or AND, value: {self.word_operator}')
 
-    @abstractmethod
     def configure_localization(self, everywhere, words_localization, valid_localizations) -> list:
         if words_localization == []:
             return words_localization
@@ -92,12 +112,11 @@ class DatabaseRetriever(IDatabaseRetriever):
                         f"{localization} is not a valid words localization, valid values are: {valid_localizations}")
         return words_localization
 
-    @abstractmethod
     def date_settings(self, start_date: str, end_date: str) -> tuple[int, int]:
         dt = DateTransformer()
-        start_date = start_date if start_date else 0
-        end_date = end_date if end_date else None
-        return dt.convert_to_timestamp(start_date), dt.convert_to_timestamp(end_date)
+        start_timestamp = dt.convert_to_timestamp(start_date) if start_date else 0
+        end_timestamp = dt.convert_to_timestamp(end_date) if end_date else None
+        return start_timestamp, end_timestamp
 
     def select(self) -> Self:
         self.request = f"""SELECT DISTINCT {E_ID} FROM {TABLE_EMAILS} {ALIAS_EMAILS}"""
@@ -110,12 +129,12 @@ class DatabaseRetriever(IDatabaseRetriever):
             self.request += f" {join_clause}"
             self.join_clauses.append(join_clause)
 
-    def add_where(self, condition: str) -> Self:
-        self.where_clauses.add(condition)
+    def add_where(self, condition: str, params: list = None) -> Self:
+        self.where_clauses[condition] = list(params or [])
         return self
 
-    def add_where_and(self, condition: str) -> Self:
-        self.where_and_clauses.add(f"({condition})")
+    def add_where_and(self, condition: str, params: list = None) -> Self:
+        self.where_and_clauses[f"({condition})"] = list(params or [])
         return self
 
     def add_order_by(self, columns: list, ascending=True) -> None:
@@ -128,6 +147,8 @@ class DatabaseRetriever(IDatabaseRetriever):
 
     def build_query(self) -> str:
         self.select()
+        self.params = [param for clauses in (self.where_and_clauses, self.where_clauses)
+                       for params in clauses.values() for param in params]
         if self.join_clauses:
             self.request += " " + " ".join(self.join_clauses)
 
@@ -151,166 +172,162 @@ class DatabaseRetriever(IDatabaseRetriever):
         return self.request
 
     def join(self) -> Self:
-        if self.everywhere in self.words_localization and self.words:
-            self._join_email_addresses()
-            self._join_contacts()
-            self._join_aliases()
-            self._join_dates()
-            self._join_attachments()
-        if self.contacts or (DatabaseRetrieverConstants.CONTACT in self.words_localization and self.words):
-            self._join_email_addresses()
-            self._join_contacts()
-        if self.aliases or (DatabaseRetrieverConstants.ALIAS in self.words_localization and self.words):
-            self._join_email_addresses()
-            self._join_contacts()
-            self._join_aliases()
-        if self.addresses or (DatabaseRetrieverConstants.ADDRESS in self.words_localization and self.words):
-            self._join_email_addresses()
-        if self.start_date or self.end_date:
-            self._join_dates()
-        if self.attachment_types or (
-                DatabaseRetrieverConstants.ATTACHMENT in self.words_localization and self.words) or (
-                DatabaseRetrieverConstants.ATTACHMENT_NAME in self.words_localization and self.words):
-            self._join_attachments()
+        # Nothing to join: the conditions on participants and attachments are subqueries, see
+        # _participant_condition and _attachment_condition, so that an email is never repeated once per
+        # participant, contact, alias or attachment
         return self
 
-    def _join_email_addresses(self) -> None:
-        self.add_join(f"LEFT JOIN {TABLE_EMAIL_FROM} {ALIAS_EMAIL_FROM} ON {E_ID} = {EF_EMAIL_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_EMAIL_TO} {ALIAS_EMAIL_TO} ON {E_ID} = {ET_EMAIL_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_EMAIL_CC} {ALIAS_EMAIL_CC} ON {E_ID} = {EC_EMAIL_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_EMAIL_BCC} {ALIAS_EMAIL_BCC} ON {E_ID} = {EB_EMAIL_ID}")
-
-        self.add_join(
-            f"LEFT JOIN {TABLE_EMAIL_ADDRESSES} {ALIAS_EMAIL_ADDRESSES_FROM} ON {EA1_ID} = {EF_EMAIL_ADDRESS_ID}")
-        self.add_join(
-            f"LEFT JOIN {TABLE_EMAIL_ADDRESSES} {ALIAS_EMAIL_ADDRESSES_TO} ON {EA2_ID} = {ET_EMAIL_ADDRESS_ID}")
-        self.add_join(
-            f"LEFT JOIN {TABLE_EMAIL_ADDRESSES} {ALIAS_EMAIL_ADDRESSES_CC} ON {EA3_ID} = {EC_EMAIL_ADDRESS_ID}")
-        self.add_join(
-            f"LEFT JOIN {TABLE_EMAIL_ADDRESSES} {ALIAS_EMAIL_ADDRESSES_BCC} ON {EA4_ID} = {EB_EMAIL_ADDRESS_ID}")
-
-    def _join_contacts(self) -> None:
-        self.add_join(
-            f"LEFT JOIN {TABLE_CONTACTS_EMAIL_ADDRESSES} {ALIAS_CONTACTS_EMAIL_ADDRESSES_FROM} ON {EA1_ID} = {CEA1_EMAIL_ADDRESS_ID}")
-        self.add_join(
-            f"LEFT JOIN {TABLE_CONTACTS_EMAIL_ADDRESSES} {ALIAS_CONTACTS_EMAIL_ADDRESSES_TO} ON {EA2_ID} = {CEA2_EMAIL_ADDRESS_ID}")
-        self.add_join(
-            f"LEFT JOIN {TABLE_CONTACTS_EMAIL_ADDRESSES} {ALIAS_CONTACTS_EMAIL_ADDRESSES_CC} ON {EA3_ID} = {CEA3_EMAIL_ADDRESS_ID}")
-        self.add_join(
-            f"LEFT JOIN {TABLE_CONTACTS_EMAIL_ADDRESSES} {ALIAS_CONTACTS_EMAIL_ADDRESSES_BCC} ON {EA4_ID} = {CEA4_EMAIL_ADDRESS_ID}")
-
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS} {ALIAS_CONTACTS_FROM} ON {CEA1_CONTACT_ID} = {C1_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS} {ALIAS_CONTACTS_TO} ON {CEA2_CONTACT_ID} = {C2_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS} {ALIAS_CONTACTS_CC} ON {CEA3_CONTACT_ID} = {C3_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS} {ALIAS_CONTACTS_BCC} ON {CEA4_CONTACT_ID} = {C4_ID}")
-
-    def _join_aliases(self) -> None:
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS_ALIAS} {ALIAS_CONTACTS_ALIAS_FROM} ON {C1_ID} = {CA1_CONTACT_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS_ALIAS} {ALIAS_CONTACTS_ALIAS_TO} ON {C2_ID} = {CA2_CONTACT_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS_ALIAS} {ALIAS_CONTACTS_ALIAS_CC} ON {C3_ID} = {CA3_CONTACT_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_CONTACTS_ALIAS} {ALIAS_CONTACTS_ALIAS_BCC} ON {C4_ID} = {CA4_CONTACT_ID}")
-
-        self.add_join(f"LEFT JOIN {TABLE_ALIAS} {ALIAS_ALIAS_FROM} ON {CA1_ALIAS_ID} = {A1_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_ALIAS} {ALIAS_ALIAS_TO} ON {CA2_ALIAS_ID} = {A2_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_ALIAS} {ALIAS_ALIAS_CC} ON {CA3_ALIAS_ID} = {A3_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_ALIAS} {ALIAS_ALIAS_BCC} ON {CA4_ALIAS_ID} = {A4_ID}")
-
-    def _join_dates(self) -> None:
-        self.add_join(f"LEFT JOIN {TABLE_EMAIL_TIMESTAMP} {ALIAS_EMAIL_TIMESTAMP} ON {E_ID} = {ETI_EMAIL_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_TIMESTAMP} {ALIAS_TIMESTAMP} ON {ETI_TIMESTAMP_ID} = {TS_ID}")
-
-    def _join_attachments(self) -> None:
-        self.add_join(f"LEFT JOIN {TABLE_EMAIL_ATTACHMENTS} {ALIAS_EMAIL_ATTACHMENTS} ON {E_ID} = {EA_EMAIL_ID}")
-        self.add_join(f"LEFT JOIN {TABLE_ATTACHMENTS} {ALIAS_ATTACHMENTS} ON {EA_ATTACHMENT_ID} = {A_ID}")
-
     def where(self) -> Self:
         self._where_date()
         self._where_contacts()
         self._where_aliases()
         self._where_addresses()
+        self._where_domains()
         self._where_attachments_types()
         self._where_words()
         return self
 
     def _where_date(self) -> None:
+        # Numeric range on idx_emails_timestamp, the timestamps are integers
         date_conditions = []
         if self.start_date and self.end_date:
-            date_conditions.append(f"{TS_TIMESTAMP} BETWEEN '{self.__start_timestamp}' AND '{self.__end_timestamp}'")
+            date_conditions.append(f"{E_TIMESTAMP} BETWEEN {self.__start_timestamp} AND {self.__end_timestamp}")
         elif self.start_date:
-            date_conditions.append(f"{TS_TIMESTAMP} >= '{self.__start_timestamp}'")
+            date_conditions.append(f"{E_TIMESTAMP} >= {self.__start_timestamp}")
         elif self.end_date:
-            date_conditions.append(f"{TS_TIMESTAMP} <= '{self.__end_timestamp}'")
+            date_conditions.append(f"{E_TIMESTAMP} <= {self.__end_timestamp}")
         if date_conditions:
             self.add_where_and(condition=" AND ".join(date_conditions))
 
     def _where_contacts(self) -> None:
         if self.contacts:
-            FIRST_NAMES = [C1_FIRST_NAME, C2_FIRST_NAME, C3_FIRST_NAME, C4_FIRST_NAME]
-            LAST_NAMES = [C1_LAST_NAME, C2_LAST_NAME, C3_LAST_NAME, C4_LAST_NAME]
+            # Names are compared case-insensitively by their NOCASE collation
             contact_conditions = " OR ".join(
-                [f"LOWER({first}) = LOWER('{first_name}') AND LOWER({last}) = LOWER('{last_name}')"
-                 for first_name, last_name in self.contacts for first, last in zip(FIRST_NAMES, LAST_NAMES)])
-            self.add_where(f"({contact_conditions})")
+                [f"({C_FIRST_NAME} = '{first_name}' AND {C_LAST_NAME} = '{last_name}')"
+                 for first_name, last_name in self.contacts])
+            self.add_where(self._contact_condition(contact_conditions))
 
     def _where_aliases(self) -> None:
         if self.aliases:
-            ALIASES = [A1_ALIAS, A2_ALIAS, A3_ALIAS, A4_ALIAS]
-            alias_conditions = " OR ".join(
-                [f"LOWER({alias}) = LOWER('{request_alias}')" for request_alias in self.aliases for alias in ALIASES])
-            self.add_where(f"({alias_conditions})")
+            aliases = ", ".join(f"'{alias}'" for alias in self.aliases)
+            self.add_where(self._alias_condition(f"{AL_ALIAS} IN ({aliases})"))
 
     def _where_addresses(self) -> None:
         if self.addresses:
-            EMAIL_ADDRESSES = [EA1_EMAIL_ADDRESS, EA2_EMAIL_ADDRESS, EA3_EMAIL_ADDRESS, EA4_EMAIL_ADDRESS]
-            address_conditions = " OR ".join(
-                [f"LOWER({email_address}) = LOWER('{address}')" for address in self.addresses for email_address in
-                 EMAIL_ADDRESSES])
-            self.add_where(f"({address_conditions})")
+            addresses = ", ".join(f"'{address}'" for address in self.addresses)
+            self.add_where(self._address_condition(f"{EAD_EMAIL_ADDRESS} IN ({addresses})"))
+
+    def _where_domains(self) -> None:
+        """
+        Domain filters on idx_email_addresses_domain and idx_email_addresses_registrable_domain. A subdomain
+        filter is an equality on the reversed registrable domain, or a prefix range on it for a public suffix
+        ('be' is 'be.' <= value < 'be/', '/' follows '.'). The domains are bound parameters.
+        """
+        conditions, params = [], []
+        domains = [domain for domain in map(domain_parser.normalize, self.domains) if domain]
+        if domains:
+            conditions.append(f"{EAD_DOMAIN} IN ({', '.join('?' for _ in domains)})")
+            params.extend(domains)
+        for domain in filter(None, map(domain_parser.normalize, self.subdomains)):
+            registrable = domain_parser.registrable_domain(domain)
+            if registrable is None:
+                prefix = domain_parser.reverse(domain)
+                conditions.append(f"({EAD_REVERSED_REGISTRABLE_DOMAIN} >= ? AND {EAD_REVERSED_REGISTRABLE_DOMAIN} < ?)")
+                params.extend([f"{prefix}.", f"{prefix}/"])
+            elif registrable == domain:
+                conditions.append(f"{EAD_REVERSED_REGISTRABLE_DOMAIN} = ?")
+                params.append(domain_parser.reverse(domain))
+            else:
+                conditions.append(f"({EAD_REVERSED_REGISTRABLE_DOMAIN} = ? "
+                                  f"AND ({EAD_DOMAIN} = ? OR {EAD_DOMAIN} LIKE ? ESCAPE '\\'))")
+                params.extend([domain_parser.reverse(registrable), domain, f"%.{self._escape_like(domain)}"])
+        if conditions:
+            self.add_where(self._address_condition(' OR '.join(conditions)), params)
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        """Escapes the LIKE wildcards of the value, for a LIKE with ESCAPE '\\'."""
+        return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+    def _participant_condition(self, joins_and_where: str) -> str:
+        """
+        Condition on the emails having a participant matching the subquery. Contacts, aliases and addresses are
+        looked up by their unique index, then their emails by idx_email_participants_address, without joining
+        the participants of every email.
+        """
+        return (f"{E_ID} IN (SELECT {EP_EMAIL_ID} FROM {TABLE_EMAIL_PARTICIPANTS} {ALIAS_EMAIL_PARTICIPANTS} "
+                f"{joins_and_where})")
+
+    def _contact_condition(self, condition: str) -> str:
+        return self._participant_condition(
+            f"JOIN {TABLE_CONTACTS_EMAIL_ADDRESSES} {ALIAS_CONTACTS_EMAIL_ADDRESSES} "
+            f"ON {CEA_EMAIL_ADDRESS_ID} = {EP_EMAIL_ADDRESS_ID} "
+            f"JOIN {TABLE_CONTACTS} {ALIAS_CONTACTS} ON {C_ID} = {CEA_CONTACT_ID} WHERE {condition}")
+
+    def _alias_condition(self, condition: str) -> str:
+        return self._participant_condition(
+            f"JOIN {TABLE_CONTACTS_EMAIL_ADDRESSES} {ALIAS_CONTACTS_EMAIL_ADDRESSES} "
+            f"ON {CEA_EMAIL_ADDRESS_ID} = {EP_EMAIL_ADDRESS_ID} "
+            f"JOIN {TABLE_CONTACTS_ALIAS} {ALIAS_CONTACTS_ALIAS} ON {CA_CONTACT_ID} = {CEA_CONTACT_ID} "
+            f"JOIN {TABLE_ALIAS} {ALIAS_ALIAS} ON {AL_ID} = {CA_ALIAS_ID} WHERE {condition}")
+
+    def _address_condition(self, condition: str) -> str:
+        return self._participant_condition(
+            f"JOIN {TABLE_EMAIL_ADDRESSES} {ALIAS_EMAIL_ADDRESSES} ON {EAD_ID} = {EP_EMAIL_ADDRESS_ID} "
+            f"WHERE {condition}")
+
+    def _attachment_condition(self, condition: str) -> str:
+        """Condition on the emails having an attachment matching the condition, through idx_email_attachments."""
+        return (f"{E_ID} IN (SELECT {EA_EMAIL_ID} FROM {TABLE_EMAIL_ATTACHMENTS} {ALIAS_EMAIL_ATTACHMENTS} "
+                f"JOIN {TABLE_ATTACHMENTS} {ALIAS_ATTACHMENTS} ON {A_ID} = {EA_ATTACHMENT_ID} WHERE {condition})")
 
     def _where_attachments_types(self) -> None:
+        """
+        Attachment types are extensions ('pdf') or MIME types ('application/pdf'). An extension also matches the
+        attachments detected as its MIME type whatever their name, both are looked up in their index.
+        """
         if self.attachment_types:
-            attachment_conditions = " OR ".join(
-                [f"LOWER({A_FILENAME}) LIKE '%.{file_type.lower()}'" for file_type in self.attachment_types]
-            )
-            self.add_where(f"({attachment_conditions})")
+            extensions, mime_types = set(), set()
+            for attachment_type in self.attachment_types:
+                attachment_type = attachment_type.strip().lower()
+                if '/' in attachment_type:
+                    mime_types.add(attachment_type)
+                    continue
+                extension = attachment_type.lstrip('.')
+                extensions.add(extension)
+                mime_type = mimetypes.guess_type(f"file.{extension}", strict=False)[0]
+                if mime_type:
+                    mime_types.add(MimeConstants.ALIASES.get(mime_type, mime_type))
+            conditions, params = [], []
+            for column, values in ((A_EXTENSION, extensions), (A_MIME_TYPE, mime_types)):
+                if values:
+                    conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+                    params.extend(sorted(values))
+            self.add_where(self._attachment_condition(' OR '.join(conditions)), params)
 
     def _where_words(self) -> None:
         if self.words:
             word_conditions = []
             added_conditions = set()
+            if self.everywhere in self.words_localization:
+                localizations = DatabaseRetrieverConstants.EVERYWHERE_SEARCH_FIELDS
+            else:
+                localizations = self.words_localization
 
             for word in self.words:
                 word = word.lower()
                 conditions = []
 
-                if DatabaseRetrieverConstants.CONTACT in self.localizations:
-                    FIRST_NAMES = [C1_FIRST_NAME, C2_FIRST_NAME, C3_FIRST_NAME, C4_FIRST_NAME]
-                    LAST_NAMES = [C1_LAST_NAME, C2_LAST_NAME, C3_LAST_NAME, C4_LAST_NAME]
-                    conditions.extend(
-                        [f"LOWER({first_name}) LIKE '%{word}%' OR LOWER({last_name}) LIKE '%{word}%'" for
-                         first_name, last_name in zip(FIRST_NAMES, LAST_NAMES)])
-
-                if DatabaseRetrieverConstants.ALIAS in self.localizations:
-                    ALIASES = [A1_ALIAS, A2_ALIAS, A3_ALIAS, A4_ALIAS]
-                    conditions.extend([f"LOWER({alias}) LIKE '%{word}%'" for alias in ALIASES])
-
-                if DatabaseRetrieverConstants.ADDRESS in self.localizations:
-                    EMAIL_ADDRESSES = [EA1_EMAIL_ADDRESS, EA2_EMAIL_ADDRESS, EA3_EMAIL_ADDRESS, EA4_EMAIL_ADDRESS]
-                    conditions.extend([f"LOWER({email_address}) LIKE '%{word}%'" for email_address in EMAIL_ADDRESSES])
+                if DatabaseRetrieverConstants.CONTACT in localizations:
+                    conditions.append(self._contact_condition(
+                        f"LOWER({C_FIRST_NAME}) LIKE '%{word}%' OR LOWER({C_LAST_NAME}) LIKE '%{word}%'"))
 
-                if DatabaseRetrieverConstants.SUBJECT in self.localizations:
-                    conditions.append(f"LOWER({E_SUBJECT}) LIKE '%{word}%'")
+                conditions.extend(self._substring_conditions(word, localizations))
 
-                if DatabaseRetrieverConstants.BODY in self.localizations:
-                    conditions.append(f"LOWER({E_BODY}) LIKE '%{word}%'")
-
-                if DatabaseRetrieverConstants.ATTACHMENT_NAME in self.localizations:
-                    conditions.append(f"LOWER({A_FILENAME}) LIKE '%{word}%'")
-
-                if DatabaseRetrieverConstants.ATTACHMENT in self.localizations:
-                    # ToDo: I need to develop a class which, depending on the type of extension,
-                    #  will try to retrieve the text from EmailParser and add a column to the db to display the extracted text.
-                    conditions.append(f"LOWER({A_EXTRACTED_TEXT}) LIKE '%{word}%'")
+                if self.full_text:
+                    conditions.extend(self._full_text_conditions(word, localizations))
+                else:
+                    conditions.extend(self._like_text_conditions(word, localizations))
 
                 if conditions:
                     # word_conditions.append(f"({' OR '.join(conditions)})")
@@ -323,13 +340,109 @@ class DatabaseRetriever(IDatabaseRetriever):
             if word_conditions:
                 self.add_where(f" {self.word_operator} ".join(word_conditions))
 
+    def _full_text_conditions(self, word: str, localizations: list) -> list:
+        """Conditions on the FTS5 index: word, prefix, phrase and NEAR queries, see SearchIndex.match_query."""
+        expression = self.search_index.match_query(word).replace("'", "''")
+        fields = [(DatabaseRetrieverConstants.SUBJECT, E_ROWID, DBConstants.EMAILS_FTS_TABLE, 'subject'),
+                  (DatabaseRetrieverConstants.BODY, E_ROWID, DBConstants.EMAILS_FTS_TABLE, 'body'),
+                  (DatabaseRetrieverConstants.FULL_BODY, E_ROWID, DBConstants.EMAILS_FTS_TABLE, 'full_body'),
+                  (DatabaseRetrieverConstants.ATTACHMENT, A_ROWID, DBConstants.ATTACHMENTS_FTS_TABLE,
+                   'extracted_text')]
+        conditions = []
+        for localization, rowid, table, column in fields:
+            if localization not in localizations:
+                continue
+            condition = f"{rowid} IN (SELECT rowid FROM {table} WHERE {table} MATCH '{column} : ({expression})')"
+            conditions.append(self._attachment_condition(condition) if rowid == A_ROWID else condition)
+        return conditions
+
+    def _like_text_conditions(self, word: str, localizations: list) -> list:
+        """Substring conditions, used when SQLite has no FTS5. The texts can be stored compressed."""
+        decompress = self.compressor.SQL_FUNCTION
+        conditions = []
+        if DatabaseRetrieverConstants.SUBJECT in localizations:
+            conditions.append(f"LOWER({E_SUBJECT}) LIKE '%{word}%'")
+
+        if DatabaseRetrieverConstants.BODY in localizations:
+            # New text of the email only, emails stored before it existed fall back to the full body
+            conditions.append(f"LOWER({decompress}(COALESCE({E_NEW_BODY}, {E_BODY}))) LIKE '%{word}%'")
+
+        if DatabaseRetrieverConstants.FULL_BODY in localizations:
+            conditions.append(f"LOWER({decompress}({E_BODY})) LIKE '%{word}%'")
+
+        if DatabaseRetrieverConstants.ATTACHMENT in localizations:
+            conditions.append(self._attachment_condition(f"LOWER({decompress}({A_EXTRACTED_TEXT})) LIKE '%{word}%'"))
+        return conditions
+
+    def _substring_conditions(self, word: str, localizations: list) -> list:
+        """
+        Substring conditions on the aliases, addresses and attachment names, looked up in the trigram
+        indexes when the word is long enough. Subjects are also searched by substring if they are indexed.
+        """
+        fields = [(DatabaseRetrieverConstants.ALIAS, DBConstants.ALIAS_TRIGRAM_TABLE, AL_ID, AL_ALIAS,
+                   self._alias_condition),
+                  (DatabaseRetrieverConstants.ADDRESS, DBConstants.EMAIL_ADDRESSES_TRIGRAM_TABLE, EAD_ID,
+                   EAD_EMAIL_ADDRESS, self._address_condition),
+                  (DatabaseRetrieverConstants.ATTACHMENT_NAME, DBConstants.ATTACHMENT_NAMES_TRIGRAM_TABLE, A_ROWID,
+                   A_FILENAME, self._attachment_condition)]
+        conditions = []
+        for localization, table, row_id, column, subquery in fields:
+            if localization not in localizations:
+                continue
+            query = self.trigram_index.substring_query(table, word)
+            if query:
+                conditions.append(subquery(f"{row_id} IN ({query})"))
+            else:
+                conditions.append(subquery(f"LOWER({column}) LIKE '%{word}%'"))
+
+        if DatabaseRetrieverConstants.SUBJECT in localizations:
+            query = self.trigram_index.substring_query(DBConstants.SUBJECTS_TRIGRAM_TABLE, word)
+            if query:
+                conditions.append(f"{E_ROWID} IN ({query})")
+        return conditions
+
     def execute(self, params=None) -> list:
         query = self.build_query()
-        with sqlite3.connect(self.db_name) as conn:
-            c = conn.cursor()
-            c.execute(query, params or [])
-            results = c.fetchall()
+        params = self.params if params is None else params
+        query_log.append(query, params)
+        c = self.connections.reader().cursor()
+        c.execute(query, params)
+        results = c.fetchall()
+        c.close()
         return results
 
+    def hydrate(self, email_ids: list) -> list[dict]:
+        """
+        Loads the emails found by execute(), with their attachments, texts decompressed.
+
+        :return: One dict per email found, in the order of email_ids.
+        """
+        if not email_ids:
+            return []
+        placeholders = ', '.join('?' for _ in email_ids)
+        reader = self.connections.reader()
+        emails = {}
+        for email_id, subject, body, new_body in reader.execute(
+                f"SELECT {E_ID}, {E_SUBJECT}, {E_BODY}, {E_NEW_BODY} FROM {TABLE_EMAILS} {ALIAS_EMAILS} "
+                f"WHERE {E_ID} IN ({placeholders})", email_ids):
+            emails[email_id] = {EMAIL_ID: email_id, SUBJECT: subject, BODY: self.compressor.decompress(body),
+                                NEW_BODY: self.compressor.decompress(new_body), ATTACHMENTS: []}
+        for email_id, attachment_id, filename, extracted_text in reader.execute(
+                f"SELECT {EA_EMAIL_ID}, {A_ID}, {A_FILENAME}, {A_EXTRACTED_TEXT} "
+                f"FROM {TABLE_EMAIL_ATTACHMENTS} {ALIAS_EMAIL_ATTACHMENTS} "
+                f"JOIN {TABLE_ATTACHMENTS} {ALIAS_ATTACHMENTS} ON {EA_ATTACHMENT_ID} = {A_ID} "
+                f"WHERE {EA_EMAIL_ID} IN ({placeholders})", email_ids):
+            emails[email_id][ATTACHMENTS].append({
+                ATTACHMENT_ID: attachment_id, ATTACHMENT_FILENAME: filename,
+                ATTACHMENT_EXTRACTED_TEXT: self.compressor.decompress(extracted_text)})
+        return [emails[email_id] for email_id in email_ids if email_id in emails]
+
+    def attachment_type_counts(self) -> dict[str, int]:
+        """Number of attachments per MIME type, counted on idx_attachments_mime_type."""
+        rows = self.connections.reader().execute(
+            f"SELECT {A_MIME_TYPE}, COUNT(*) FROM {TABLE_ATTACHMENTS} {ALIAS_ATTACHMENTS} GROUP BY {A_MIME_TYPE} "
+            f"ORDER BY COUNT(*) DESC").fetchall()
+        return dict(rows)
+
     def show_query(self) -> str:
         return self.build_query()
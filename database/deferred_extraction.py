@@ -0,0 +1,105 @@
+# deferred_extraction.py
+# Libraries
+import argparse
+from contextlib import ExitStack
+# Interfaces
+from database.ideferred_extraction import IDeferredExtraction
+from utils.iattachment_store import IAttachmentStore
+# Constants
+from config.db_constants import DBConstants
+from config.email_parser_constants import EmailParserConstants
+from config.extraction_constants import ExtractionConstants
+# Personal libraries
+from database.email_database import EmailDatabase
+from utils.attachment_store import AttachmentStore
+from utils.extraction_cache import ExtractionCache
+from utils.extraction_pool import ExtractionPool, ExtractionResult
+from utils.logging_setup import log_email_database
+
+
+class DeferredExtraction(IDeferredExtraction):
+    """
+    Extracts the text of the attachments the attachment policy deferred (extraction_status 'deferred'),
+    typically in a quieter run after the ingest.
+
+    The stored contents are extracted in the worker pool by batches of batch_size, so the legacy Office
+    documents of a batch share a LibreOffice invocation. Each row gets its final status, an attachment
+    missing from the store is marked as an error. The texts are indexed for the full-text search and
+    kept in the extraction cache, like the ones extracted during the ingest.
+    """
+
+    def __init__(self, email_database: EmailDatabase, attachment_store: IAttachmentStore,
+                 extraction_pool: ExtractionPool = None, extraction_cache: ExtractionCache = None,
+                 batch_size: int = DBConstants.DEFERRED_EXTRACTION_BATCH_SIZE):
+        self.db = email_database
+        self.attachment_store = attachment_store
+        self.extraction_pool = extraction_pool if extraction_pool else ExtractionPool()
+        self.extraction_cache = extraction_cache if extraction_cache else ExtractionCache()
+        self.batch_size = batch_size
+
+    def pending(self) -> int:
+        return self.db.connections.reader().execute(
+            f"SELECT COUNT(*) FROM {DBConstants.ATTACHMENTS_TABLE} WHERE extraction_status = ?",
+            (ExtractionConstants.STATUS_DEFERRED,)).fetchone()[0]
+
+    def run(self, limit: int = None) -> int:
+        done = 0
+        last_rowid = 0
+        while limit is None or done < limit:
+            size = self.batch_size if limit is None else min(self.batch_size, limit - done)
+            rows = self.db.connections.reader().execute(
+                f"SELECT rowid, id, extension FROM {DBConstants.ATTACHMENTS_TABLE} "
+                f"WHERE rowid > ? AND extraction_status = ? ORDER BY rowid LIMIT ?",
+                (last_rowid, ExtractionConstants.STATUS_DEFERRED, size)).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            for digest, result in self._extract(rows):
+                self.db.update_attachment_extraction(id=digest, extracted_text=result.text,
+                                                     extraction_status=result.status,
+                                                     extraction_error=result.error, page_count=result.page_count)
+            done += len(rows)
+            log_email_database.info(f"Func: run, {done} deferred attachments extracted")
+        return done
+
+    def _extract(self, rows: list) -> list:
+        results = {}
+        missing = []
+        for _, digest, extension in rows:
+            found, extracted_text = self.extraction_cache.lookup(digest=digest)
+            if found:
+                results[digest] = ExtractionResult(ExtractionConstants.STATUS_OK, extracted_text)
+            elif not self.attachment_store.exists(digest=digest):
+                results[digest] = ExtractionResult(ExtractionConstants.STATUS_ERROR,
+                                                   error="Content not found in the attachment store")
+            else:
+                missing.append((digest, extension))
+        if missing:
+            with ExitStack() as stack:
+                store = self.attachment_store
+                paths = [stack.enter_context(store.readable_path(store.path_for(digest), extension=extension))
+                         for digest, extension in missing]
+                extractions = self.extraction_pool.extract_many(file_paths=paths)
+            for (digest, _), result in zip(missing, extractions):
+                if result.status == ExtractionConstants.STATUS_OK:
+                    self.extraction_cache.store(digest=digest, text=result.text)
+                results[digest] = result
+        return [(digest, results[digest]) for _, digest, _ in rows]
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Extracts the text of the attachments deferred by the attachment "
+                                                 "policy.")
+    parser.add_argument('--db', default=DBConstants.DB_NAME, help="Database file")
+    parser.add_argument('--attachments-directory', default=EmailParserConstants.ATTACHMENTS_DIRECTORY,
+                        help="Attachment store directory")
+    parser.add_argument('--limit', type=int, help="Maximum number of attachments to extract")
+    args = parser.parse_args(argv)
+    extraction = DeferredExtraction(email_database=EmailDatabase(db_name=args.db),
+                                    attachment_store=AttachmentStore(directory=args.attachments_directory))
+    done = extraction.run(limit=args.limit)
+    print(f"{done} deferred attachments extracted, {extraction.pending()} left")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,20 @@
 # email_database.py
 # Libraries
 import sqlite3
+from contextlib import contextmanager
+from typing import Iterator
 # Interfaces
 from database.iemail_database import IEmailDatabase
 # Constants
 from config.db_constants import DBConstants
 # Personal libraries
 from database.sql_request import SQLRequest
+from database.connection_manager import get_connection_manager
+from database.index_manager import IndexManager
+from database.search_index import SearchIndex
+from database.text_compressor import TextCompressor
+from database.trigram_index import TrigramIndex
+from utils.domain_parser import domain_parser
 from utils.string_cleaner import StringCleaner
 from utils.logging_setup import log_email_database
 
@@ -14,33 +22,97 @@ from utils.logging_setup import log_email_database
 
 class EmailDatabase(IEmailDatabase):
     def __init__(self, db_name=DBConstants.DB_NAME, sql_file=DBConstants.SQL_NAME, string_cleaner=None,
-                 sql_requests=None):
+                 sql_requests=None, profile: str = None, connection_manager=None, compression: bool = None):
+        """
+        : profile: PRAGMA profile of DBConstants.PRAGMA_PROFILES, 'bulk-load' while filling the database
+        : connection_manager: ConnectionManager to use, the one shared for db_name by default
+        : compression: compress the bodies and extracted texts, DBConstants.TEXT_COMPRESSION by default
+        """
         self.string_cleaner = string_cleaner if string_cleaner else StringCleaner()
         self.db_name = db_name
         self.sql_file = sql_file
         self.sql_requests = sql_requests if sql_requests else SQLRequest()
+        self.connections = connection_manager if connection_manager else get_connection_manager(db_name, profile)
+        self.indexes = IndexManager(connection_manager=self.connections)
+        self.domain_parser = domain_parser
+        for name, func in (('email_local_part', self.domain_parser.local_part),
+                           ('email_domain', self.domain_parser.domain),
+                           ('email_reversed_registrable_domain', self.domain_parser.reversed_registrable_domain)):
+            self.connections.create_function(name, 1, func)
         self._create_tables()
+        self.compressor = TextCompressor(connection_manager=self.connections,
+                                         enabled=DBConstants.TEXT_COMPRESSION if compression is None else compression)
+        self.search_index = SearchIndex(connection_manager=self.connections, text_compressor=self.compressor)
+        self.trigram_index = TrigramIndex(connection_manager=self.connections)
+        self.search_index.create_tables()
+        self.trigram_index.create_tables()
+        self._full_text = self.search_index.available
+        if self.connections.profile != DBConstants.BULK_LOAD_PROFILE:
+            self.indexes.create_indexes()
 
     def _create_tables(self) -> None:
         log_email_database.info(f"Func: _create_tables, database creation")
-        conn = sqlite3.connect(self.db_name)
-        c = conn.cursor()
         with open(self.sql_file, 'r') as f:
             sql = f.read()
-        c.executescript(sql)
-        conn.commit()
-        conn.close()
+        with self.connections.writer() as conn:
+            c = conn.cursor()
+            c.executescript(sql)
+            self._add_missing_columns(cursor=c)
+            self._migrate_participants(cursor=c)
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[None]:
+        """
+        With the 'bulk-load' profile, defers the secondary indexes until the end of the block and merges
+        the full-text index afterwards.
+        """
+        if self.connections.profile != DBConstants.BULK_LOAD_PROFILE:
+            yield
+            return
+        with self.indexes.deferred():
+            yield
+        self.search_index.optimize()
+
+    def transaction(self):
+        """Groups the inserts made in the block into one transaction, committed at the end of the block."""
+        return self.connections.writer()
+
+    def _add_missing_columns(self, cursor: sqlite3.Cursor) -> None:
+        """Adds the columns of DBConstants.ADDED_COLUMNS to databases created before they existed."""
+        for table, columns in DBConstants.ADDED_COLUMNS.items():
+            existing_columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+            for column, definition in columns.items():
+                if column not in existing_columns:
+                    log_email_database.info(f"Func: _add_missing_columns, add {table}.{column}")
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+                    backfill = DBConstants.BACKFILLED_COLUMNS.get(table, {}).get(column)
+                    if backfill:
+                        cursor.execute(f"UPDATE {table} SET {column} = {backfill}")
+
+    def _migrate_participants(self, cursor: sqlite3.Cursor) -> None:
+        """Moves the rows of the link tables of DBConstants.LEGACY_PARTICIPANT_TABLES to Email_Participants."""
+        tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, role in DBConstants.LEGACY_PARTICIPANT_TABLES.items():
+            if table in tables:
+                log_email_database.info(f"Func: _migrate_participants, {table} moved to "
+                                        f"{DBConstants.EMAIL_PARTICIPANTS_TABLE}")
+                cursor.execute(f"INSERT OR IGNORE INTO {DBConstants.EMAIL_PARTICIPANTS_TABLE} "
+                               f"({', '.join(DBConstants.EMAIL_PARTICIPANTS_COLUMNS)}) "
+                               f"SELECT email_id, email_address_id, ? FROM {table} "
+                               f"WHERE email_id IS NOT NULL AND email_address_id IS NOT NULL", (role,))
+                cursor.execute(f"DROP TABLE {table}")
 
     def insert_contact(self, first_name: str, last_name: str, return_existing_id=False) -> int | None:
         # log_email_database.info(f"Func: insert_contact")
         first_name = self.string_cleaner.to_lower_and_strip(first_name)
         last_name = self.string_cleaner.to_lower_and_strip(last_name)
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.writer() as conn:
             c = conn.cursor()
             c.execute(self.sql_requests.insert(table=DBConstants.CONTACTS_TABLE,
                                                columns=DBConstants.CONTACTS_COLUMNS)
                       , (first_name, last_name))
-            contact_id = c.lastrowid
+            # lastrowid is not reset by an ignored insert on a long-lived connection
+            contact_id = c.lastrowid if c.rowcount else 0
             if contact_id == 0 and return_existing_id:
                 c.execute(self.sql_requests.select_primary_key_from(table=DBConstants.CONTACTS_TABLE,
                                                                     columns=DBConstants.CONTACTS_COLUMNS),
@@ -51,11 +123,13 @@ class EmailDatabase(IEmailDatabase):
     def insert_alias(self, alias: str, return_existing_id=False) -> int | None:
         # log_email_database.info(f"Func: insert_alias")
         alias = self.string_cleaner.to_lower_and_strip(alias)
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.writer() as conn:
             c = conn.cursor()
             c.execute(self.sql_requests.insert(table=DBConstants.ALIAS_TABLE,
                                                columns=DBConstants.ALIAS_COLUMNS), (alias,))
-            alias_id = c.lastrowid
+            alias_id = c.lastrowid if c.rowcount else 0
+            if alias_id:
+                self.trigram_index.index(conn, table=DBConstants.ALIAS_TRIGRAM_TABLE, rowid=alias_id, value=alias)
             if alias_id == 0 and return_existing_id:
                 c.execute(self.sql_requests.select_primary_key_from(table=DBConstants.ALIAS_TABLE,
                                                                     columns=DBConstants.ALIAS_COLUMNS),
@@ -66,12 +140,18 @@ class EmailDatabase(IEmailDatabase):
     def insert_email_address(self, email_address: str, return_existing_id=False) -> int | None:
         # log_email_database.info(f"Func: insert_email_address")
         email_address = self.string_cleaner.to_lower_and_strip(email_address)
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.writer() as conn:
             c = conn.cursor()
+            domain = self.domain_parser.domain(email_address)
             c.execute(self.sql_requests.insert(table=DBConstants.EMAIL_ADDRESSES_TABLE,
-                                               columns=DBConstants.EMAIL_ADDRESSES_COLUMNS)
-                      , (email_address,))
-            address_id = c.lastrowid
+                                               columns=DBConstants.EMAIL_ADDRESSES_COLUMNS +
+                                                       DBConstants.EMAIL_ADDRESSES_DOMAIN_COLUMNS)
+                      , (email_address, self.domain_parser.local_part(email_address), domain,
+                         self.domain_parser.reversed_registrable_domain(domain)))
+            address_id = c.lastrowid if c.rowcount else 0
+            if address_id:
+                self.trigram_index.index(conn, table=DBConstants.EMAIL_ADDRESSES_TRIGRAM_TABLE, rowid=address_id,
+                                         value=email_address)
             if address_id == 0 and return_existing_id:
                 c.execute(self.sql_requests.select_primary_key_from(table=DBConstants.EMAIL_ADDRESSES_TABLE,
                                                                     columns=DBConstants.EMAIL_ADDRESSES_COLUMNS)
@@ -79,23 +159,32 @@ class EmailDatabase(IEmailDatabase):
                 address_id = c.fetchone()[0]
             return address_id
 
-    def insert_email(self, id: str, filepath: str, filename: str, subject: str, body: str) -> str:
+    def insert_email(self, id: str, filepath: str, filename: str, subject: str, body: str,
+                     new_body: str = None, timestamp: float = None) -> str:
+        """: timestamp: UTC epoch of the email date"""
         log_email_database.info(f"Func: insert_email")
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.writer() as conn:
             c = conn.cursor()
             c.execute(self.sql_requests.insert(table=DBConstants.EMAILS_TABLE,
                                                columns=DBConstants.EMAILS_COLUMNS)
-                      , (id, filepath, filename, subject, body))
-            conn.commit()
+                      , (id, filepath, filename, subject, self.compressor.compress(body),
+                         self.compressor.compress(new_body), int(timestamp) if timestamp is not None else None))
+            if c.rowcount:
+                # The full-text index is fed the uncompressed texts
+                if self._full_text:
+                    self.search_index.index_email(conn, rowid=c.lastrowid, subject=subject, body=new_body,
+                                                  full_body=body)
+                self.trigram_index.index(conn, table=DBConstants.SUBJECTS_TRIGRAM_TABLE, rowid=c.lastrowid,
+                                         value=subject)
             return id
 
     def insert_date(self, date: str, return_existing_id=False) -> int | None:
         # log_email_database.info(f"Func: insert_date")
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.writer() as conn:
             c = conn.cursor()
             c.execute(self.sql_requests.insert(table=DBConstants.DATE_TABLE,
                                                columns=DBConstants.DATE_COLUMNS), (date,))
-            date_id = c.lastrowid
+            date_id = c.lastrowid if c.rowcount else 0
             if date_id == 0 and return_existing_id:
                 c.execute(self.sql_requests.select_primary_key_from(table=DBConstants.DATE_TABLE,
                                                                     columns=DBConstants.DATE_COLUMNS)
@@ -109,11 +198,11 @@ class EmailDatabase(IEmailDatabase):
 
     def insert_timestamp(self, timestamp: int, return_existing_id=False) -> int | None:
         # log_email_database.info(f"Func: insert_timestamp")
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.writer() as conn:
             c = conn.cursor()
             c.execute(self.sql_requests.insert(table=DBConstants.TIMESTAMP_TABLE,
                                                columns=DBConstants.TIMESTAMP_COLUMNS), (timestamp,))
-            timestamp_id = c.lastrowid
+            timestamp_id = c.lastrowid if c.rowcount else 0
             if timestamp_id == 0 and return_existing_id:
                 c.execute(self.sql_requests.select_primary_key_from(table=DBConstants.TIMESTAMP_TABLE,
                                                                     columns=DBConstants.TIMESTAMP_COLUMNS)
@@ -125,27 +214,59 @@ class EmailDatabase(IEmailDatabase):
                     return None
             return timestamp_id
 
-    def insert_attachment(self, id: str, filename: str, content: str, extracted_text: str, return_existing_id=False) -> str:
+    def insert_attachment(self, id: str, filename: str, extracted_text: str, return_existing_id=False,
+                          extraction_status: str = None, extraction_error: str = None, size: int = None,
+                          mime_type: str = None, extension: str = None, page_count: int = None) -> str:
+        """The content is not stored in the database, id is its digest in the attachment store."""
         log_email_database.info(f"Func: insert_attachment")
-        with sqlite3.connect(self.db_name) as conn:
+        with self.connections.writer() as conn:
             c = conn.cursor()
             c.execute(self.sql_requests.insert(table=DBConstants.ATTACHMENTS_TABLE,
                                                columns=DBConstants.ATTACHMENTS_COLUMNS)
-                      , (id, filename, content, extracted_text))
-            conn.commit()
+                      , (id, filename, size, mime_type, extension, page_count,
+                         self.compressor.compress(extracted_text), extraction_status, extraction_error))
+            if c.rowcount:
+                if self._full_text:
+                    self.search_index.index_attachment(conn, rowid=c.lastrowid, filename=filename,
+                                                       extracted_text=extracted_text)
+                self.trigram_index.index(conn, table=DBConstants.ATTACHMENT_NAMES_TRIGRAM_TABLE, rowid=c.lastrowid,
+                                         value=filename)
             return id
 
+    def update_attachment_extraction(self, id: str, extracted_text: str, extraction_status: str,
+                                     extraction_error: str = None, page_count: int = None) -> None:
+        """Stores the result of an extraction done after the attachment was inserted, deferred ones."""
+        with self.connections.writer() as conn:
+            row = conn.execute(f"SELECT rowid, filename, extracted_text FROM {DBConstants.ATTACHMENTS_TABLE} "
+                               f"WHERE id = ?", (id,)).fetchone()
+            if row is None:
+                return
+            rowid, filename, old_text = row
+            conn.execute(f"UPDATE {DBConstants.ATTACHMENTS_TABLE} SET extracted_text = ?, extraction_status = ?, "
+                         f"extraction_error = ?, page_count = COALESCE(?, page_count) WHERE rowid = ?",
+                         (self.compressor.compress(extracted_text), extraction_status, extraction_error, page_count,
+                          rowid))
+            if self._full_text:
+                self.search_index.reindex_attachment(conn, rowid=rowid, filename=filename,
+                                                     old_text=self.compressor.decompress(old_text),
+                                                     extracted_text=extracted_text)
+
     def link(self, table: str, col_name_1: str, col_name_2: str, value_1: int | str, value_2: int | str) -> None:
         """Only 'value_2' can be of type (list, tuple, set) in addition to being of type int or str"""
         # log_email_database.info(f"Func: link, Table: {table}")
         request = self.sql_requests.link(table=table, col_name_1=col_name_1, col_name_2=col_name_2)
         if isinstance(value_2, (list, tuple, set)):
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connections.writer() as conn:
                 c = conn.cursor()
                 c.executemany(request, [(value_1, value) for value in value_2])
-                conn.commit()
         else:
-            with sqlite3.connect(self.db_name) as conn:
+            with self.connections.writer() as conn:
                 c = conn.cursor()
                 c.execute(request, (value_1, value_2))
-                conn.commit()
+
+    def link_participants(self, email_id: str, email_address_ids: list, role: str) -> None:
+        """Links the addresses to the email with the role DBConstants.FROM_ROLE, TO_ROLE, CC_ROLE or BCC_ROLE."""
+        with self.connections.writer() as conn:
+            conn.executemany(self.sql_requests.insert(table=DBConstants.EMAIL_PARTICIPANTS_TABLE,
+                                                      columns=DBConstants.EMAIL_PARTICIPANTS_COLUMNS),
+                             [(email_id, email_address_id, role) for email_address_id in email_address_ids])
@@ -0,0 +1,13 @@
+# iattachment_blob_migration.py
+# Libraries
+from abc import ABC, abstractmethod
+
+
+class IAttachmentBlobMigration(ABC):
+    @abstractmethod
+    def pending(self) -> int:
+        pass
+
+    @abstractmethod
+    def run(self) -> int:
+        pass
@@ -0,0 +1,29 @@
+# iconnection_manager.py
+# Libraries
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from typing import Callable
+
+
+class IConnectionManager(ABC):
+    @property
+    @abstractmethod
+    def profile(self) -> str:
+        pass
+
+    @abstractmethod
+    def reader(self) -> sqlite3.Connection:
+        pass
+
+    @abstractmethod
+    def writer(self) -> AbstractContextManager[sqlite3.Connection]:
+        pass
+
+    @abstractmethod
+    def create_function(self, name: str, narg: int, func: Callable) -> None:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
@@ -27,11 +27,11 @@ class IDatabaseRetriever(ABC):
         pass
 
     @abstractmethod
-    def add_where(self, condition: str) -> Self:
+    def add_where(self, condition: str, params: list = None) -> Self:
         pass
 
     @abstractmethod
-    def add_where_and(self, condition: str) -> Self:
+    def add_where_and(self, condition: str, params: list = None) -> Self:
         pass
 
     @abstractmethod
@@ -51,55 +51,47 @@ class IDatabaseRetriever(ABC):
         pass
 
     @abstractmethod
-    def _join_email_addresses(self) -> None:
-        pass
-
-    @abstractmethod
-    def _join_contacts(self) -> None:
-        pass
-
-    @abstractmethod
-    def _join_aliases(self) -> None:
+    def where(self) -> Self:
         pass
 
     @abstractmethod
-    def _join_dates(self) -> None:
+    def _where_date(self) -> None:
         pass
 
     @abstractmethod
-    def _join_attachments(self) -> None:
+    def _where_contacts(self) -> None:
         pass
 
     @abstractmethod
-    def where(self) -> Self:
+    def _where_aliases(self) -> None:
         pass
 
     @abstractmethod
-    def _where_date(self) -> None:
+    def _where_addresses(self) -> None:
         pass
 
     @abstractmethod
-    def _where_contacts(self) -> None:
+    def _where_domains(self) -> None:
         pass
 
     @abstractmethod
-    def _where_aliases(self) -> None:
+    def _where_attachments_types(self) -> None:
         pass
 
     @abstractmethod
-    def _where_addresses(self) -> None:
+    def _where_words(self) -> None:
         pass
 
     @abstractmethod
-    def _where_attachments_types(self) -> None:
+    def execute(self, params=None) -> list:
         pass
 
     @abstractmethod
-    def _where_words(self) -> None:
+    def hydrate(self, email_ids: list) -> list[dict]:
         pass
 
     @abstractmethod
-    def execute(self, params=None) -> list:
+    def attachment_type_counts(self) -> dict[str, int]:
         pass
 
     @abstractmethod
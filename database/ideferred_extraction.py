@@ -0,0 +1,13 @@
+# ideferred_extraction.py
+# Libraries
+from abc import ABC, abstractmethod
+
+
+class IDeferredExtraction(ABC):
+    @abstractmethod
+    def pending(self) -> int:
+        pass
+
+    @abstractmethod
+    def run(self, limit: int = None) -> int:
+        pass
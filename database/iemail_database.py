@@ -9,6 +9,14 @@ class IEmailDatabase(ABC):
     def _create_tables(self) -> None:
         pass
 
+    @abstractmethod
+    def bulk_load(self):
+        pass
+
+    @abstractmethod
+    def transaction(self):
+        pass
+
     @abstractmethod
     def insert_contact(self, first_name: str, last_name: str, return_existing_id=False) -> int | None:
         pass
@@ -22,7 +30,8 @@ class IEmailDatabase(ABC):
         pass
 
     @abstractmethod
-    def insert_email(self, id: str, filepath: str, filename: str, subject: str, body: str) -> str:
+    def insert_email(self, id: str, filepath: str, filename: str, subject: str, body: str,
+                     new_body: str = None, timestamp: float = None) -> str:
         pass
 
     @abstractmethod
@@ -34,10 +43,20 @@ class IEmailDatabase(ABC):
         pass
 
     @abstractmethod
-    def insert_attachment(self, id: str, filename: str, content: str, extracted_text: str,
-                          return_existing_id=False) -> str:
+    def insert_attachment(self, id: str, filename: str, extracted_text: str, return_existing_id=False,
+                          extraction_status: str = None, extraction_error: str = None, size: int = None,
+                          mime_type: str = None, extension: str = None, page_count: int = None) -> str:
+        pass
+
+    @abstractmethod
+    def update_attachment_extraction(self, id: str, extracted_text: str, extraction_status: str,
+                                     extraction_error: str = None, page_count: int = None) -> None:
         pass
 
     @abstractmethod
     def link(self, table: str, col_name_1: str, col_name_2: str, value_1: int | str, value_2: int | str) -> None:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    def link_participants(self, email_id: str, email_address_ids: list, role: str) -> None:
+        pass
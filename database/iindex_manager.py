@@ -0,0 +1,31 @@
+# iindex_manager.py
+# Libraries
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from typing import Iterable
+
+
+class IIndexManager(ABC):
+    @abstractmethod
+    def missing_indexes(self) -> list[str]:
+        pass
+
+    @abstractmethod
+    def create_indexes(self) -> list[str]:
+        pass
+
+    @abstractmethod
+    def drop_indexes(self) -> None:
+        pass
+
+    @abstractmethod
+    def deferred(self) -> AbstractContextManager[None]:
+        pass
+
+    @abstractmethod
+    def explain(self, query: str, params: list = None) -> list[str]:
+        pass
+
+    @abstractmethod
+    def advise(self, queries: Iterable[tuple[str, list]]) -> list[dict]:
+        pass
@@ -0,0 +1,174 @@
+# index_manager.py
+# Libraries
+import argparse
+import re
+import sqlite3
+from contextlib import closing, contextmanager
+from typing import Iterable, Iterator
+# Interfaces
+from database.iindex_manager import IIndexManager
+# Constants
+from config.db_constants import DBConstants
+# Personal libraries
+from database.connection_manager import ConnectionManager, get_connection_manager
+from database.query_log import query_log
+from utils.logging_setup import log_email_database
+
+
+class IndexManager(IIndexManager):
+    """
+    Creates and drops the secondary indexes of DBConstants.SECONDARY_INDEXES, and advises on the
+    indexes missing for the logged DatabaseRetriever queries.
+
+    Maintaining the indexes row by row during a bulk load costs a random B-tree insertion per row and
+    index. deferred() drops them for the duration of the load, CREATE INDEX then builds each of them in
+    a single sorted pass over the loaded table.
+    """
+
+    _TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+    _PLAN_STEP = re.compile(r'^(SCAN|SEARCH) (\w+)(?: USING (.*))?$')
+    _AUTOMATIC_INDEX_COLUMNS = re.compile(r'\((.*)\)')
+    _KEYWORDS = {'ON', 'LEFT', 'INNER', 'CROSS', 'JOIN', 'WHERE', 'USING', 'GROUP', 'ORDER', 'LIMIT'}
+
+    def __init__(self, connection_manager: ConnectionManager,
+                 indexes: dict[str, tuple[str, tuple[str, ...]]] = DBConstants.SECONDARY_INDEXES):
+        self.connections = connection_manager
+        self.indexes = indexes
+
+    def missing_indexes(self) -> list[str]:
+        existing = {row[0] for row in self.connections.reader().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        return [name for name in self.indexes if name not in existing]
+
+    def create_indexes(self) -> list[str]:
+        missing = self.missing_indexes()
+        if not missing:
+            return missing
+        with self.connections.writer() as conn:
+            for name in missing:
+                table, columns = self.indexes[name]
+                log_email_database.info(f"Func: create_indexes, {name} on {table}({', '.join(columns)})")
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({', '.join(columns)})")
+            # Statistics for the query planner, the new indexes are unknown to it until then
+            conn.execute("ANALYZE")
+        return missing
+
+    def drop_indexes(self) -> None:
+        with self.connections.writer() as conn:
+            for name in self.indexes:
+                conn.execute(f"DROP INDEX IF EXISTS {name}")
+
+    @contextmanager
+    def deferred(self) -> Iterator[None]:
+        """Drops the indexes during the block and builds them at the end, even if the block fails."""
+        self.drop_indexes()
+        try:
+            yield
+        finally:
+            self.create_indexes()
+
+    def explain(self, query: str, params: list = None) -> list[str]:
+        with closing(self._explain_connection()) as conn:
+            return self._explain(conn, query, params)
+
+    def _explain_connection(self) -> sqlite3.Connection:
+        # Not the shared readers: an EXPLAIN statement in their statement cache keeps the plan it was
+        # prepared with, even after an index is created
+        return sqlite3.connect(self.connections.db_name)
+
+    def _explain(self, conn: sqlite3.Connection, query: str, params: list = None) -> list[str]:
+        rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params or []).fetchall()
+        return [row[3] for row in rows]
+
+    def advise(self, queries: Iterable[tuple[str, list]]) -> list[dict]:
+        """
+        Runs each distinct query through EXPLAIN QUERY PLAN and reports the tables scanned inside a join
+        and the automatic indexes built by SQLite, with the managed index that would avoid them or the
+        columns to index.
+        """
+        advice = []
+        seen = set()
+        missing = set(self.missing_indexes())
+        with closing(self._explain_connection()) as conn:
+            plans = []
+            for query, params in queries:
+                if query in seen:
+                    continue
+                seen.add(query)
+                try:
+                    plans.append((query, self._explain(conn, query, params)))
+                except sqlite3.Error as e:
+                    log_email_database.warning(f"Func: advise, query skipped: {e}")
+        for query, plan in plans:
+            tables = self._tables_by_alias(query)
+            steps = [self._PLAN_STEP.match(detail) for detail in plan]
+            steps = [(step.group(0), *step.groups()) for step in steps if step]
+            for position, (detail, operation, alias, using) in enumerate(steps):
+                automatic = bool(using) and 'AUTOMATIC' in using
+                # The outer loop has to read its table anyway, only the inner loops are reported
+                if not automatic and (operation != 'SCAN' or position == 0):
+                    continue
+                table = tables.get(alias, alias)
+                columns = self._automatic_index_columns(using) if automatic else self._columns(query, alias)
+                advice.append({
+                    'query': query,
+                    'table': table,
+                    'detail': detail,
+                    'columns': columns,
+                    'index': self._matching_index(query, tables, table, columns, missing),
+                })
+        return advice
+
+    def _tables_by_alias(self, query: str) -> dict[str, str]:
+        tables = {}
+        for table, alias in self._TABLE_REFERENCE.findall(query):
+            tables[table] = table
+            if alias and alias.upper() not in self._KEYWORDS:
+                tables[alias] = table
+        return tables
+
+    def _automatic_index_columns(self, using: str) -> list[str]:
+        match = self._AUTOMATIC_INDEX_COLUMNS.search(using)
+        return re.findall(r'(\w+)[=<>]', match.group(1)) if match else []
+
+    def _columns(self, query: str, alias: str) -> list[str]:
+        columns = []
+        for column in re.findall(rf'\b{re.escape(alias)}\.(\w+)', query):
+            if column not in columns:
+                columns.append(column)
+        return columns
+
+    def _matching_index(self, query: str, tables: dict[str, str], table: str, columns: list[str],
+                        missing: set) -> str:
+        for name, (index_table, index_columns) in self.indexes.items():
+            if name in missing and index_table == table and index_columns[0] in columns:
+                return name
+        # Without an index on the joined table, SQLite prefers scanning this one in the inner loop
+        for alias, other_table in tables.items():
+            for name, (index_table, index_columns) in self.indexes.items():
+                if name in missing and index_table == other_table and index_columns[0] in self._columns(query, alias):
+                    return name
+        return f"CREATE INDEX ON {table}({', '.join(columns)})"
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Builds or drops the secondary indexes, or advises on the missing "
+                                                 "ones from the logged queries.")
+    parser.add_argument('command', choices=['build', 'drop', 'advise'])
+    parser.add_argument('--db', default=DBConstants.DB_NAME, help="Database file")
+    args = parser.parse_args(argv)
+    index_manager = IndexManager(get_connection_manager(args.db))
+    if args.command == 'build':
+        print(f"Indexes created: {index_manager.create_indexes()}")
+    elif args.command == 'drop':
+        index_manager.drop_indexes()
+        print("Secondary indexes dropped")
+    else:
+        advice = index_manager.advise(query_log.read())
+        for item in advice:
+            print(f"{item['table']}: {item['detail']}\n    -> {item['index']}\n    {item['query']}")
+        print(f"{len(advice)} suggestions")
+
+
+if __name__ == "__main__":
+    main()
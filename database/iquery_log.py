@@ -0,0 +1,14 @@
+# iquery_log.py
+# Libraries
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+class IQueryLog(ABC):
+    @abstractmethod
+    def append(self, query: str, params: list = None) -> None:
+        pass
+
+    @abstractmethod
+    def read(self) -> Iterator[tuple[str, list]]:
+        pass
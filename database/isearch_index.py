@@ -0,0 +1,40 @@
+# isearch_index.py
+# Libraries
+import sqlite3
+from abc import ABC, abstractmethod
+
+
+class ISearchIndex(ABC):
+    @property
+    @abstractmethod
+    def available(self) -> bool:
+        pass
+
+    @abstractmethod
+    def create_tables(self) -> None:
+        pass
+
+    @abstractmethod
+    def index_email(self, conn: sqlite3.Connection, rowid: int, subject: str, body: str, full_body: str) -> None:
+        pass
+
+    @abstractmethod
+    def index_attachment(self, conn: sqlite3.Connection, rowid: int, filename: str, extracted_text: str) -> None:
+        pass
+
+    @abstractmethod
+    def reindex_attachment(self, conn: sqlite3.Connection, rowid: int, filename: str, old_text: str,
+                           extracted_text: str) -> None:
+        pass
+
+    @abstractmethod
+    def rebuild(self) -> None:
+        pass
+
+    @abstractmethod
+    def optimize(self) -> None:
+        pass
+
+    @abstractmethod
+    def match_query(self, word: str) -> str:
+        pass
@@ -0,0 +1,21 @@
+# itext_compressor.py
+# Libraries
+from abc import ABC, abstractmethod
+
+
+class ITextCompressor(ABC):
+    @abstractmethod
+    def compress(self, text: str | None) -> str | bytes | None:
+        pass
+
+    @abstractmethod
+    def decompress(self, value: str | bytes | None) -> str | None:
+        pass
+
+    @abstractmethod
+    def train(self, samples: int) -> int | None:
+        pass
+
+    @abstractmethod
+    def recompress(self) -> int:
+        pass
@@ -0,0 +1,27 @@
+# itrigram_index.py
+# Libraries
+import sqlite3
+from abc import ABC, abstractmethod
+
+
+class ITrigramIndex(ABC):
+    @property
+    @abstractmethod
+    def tables(self) -> set[str]:
+        pass
+
+    @abstractmethod
+    def create_tables(self) -> None:
+        pass
+
+    @abstractmethod
+    def index(self, conn: sqlite3.Connection, table: str, rowid: int, value: str) -> None:
+        pass
+
+    @abstractmethod
+    def rebuild(self) -> None:
+        pass
+
+    @abstractmethod
+    def substring_query(self, table: str, word: str) -> str | None:
+        pass
@@ -0,0 +1,51 @@
+# query_log.py
+# Libraries
+import json
+import os
+import threading
+from typing import Iterator
+# Interfaces
+from database.iquery_log import IQueryLog
+# Constants
+from config.db_constants import DBConstants
+
+
+class QueryLog(IQueryLog):
+    """
+    Append-only JSON lines file of the queries executed by DatabaseRetriever with their parameters.
+
+    When the file exceeds max_bytes it is renamed with a '.1' suffix, which replaces the previous one.
+    read() returns the queries of both files, oldest first.
+    """
+
+    def __init__(self, path: str = DBConstants.QUERY_LOG_PATH, max_bytes: int = DBConstants.QUERY_LOG_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def append(self, query: str, params: list = None) -> None:
+        line = json.dumps({'query': query, 'params': list(params or [])}, default=str) + '\n'
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+    def read(self) -> Iterator[tuple[str, list]]:
+        for path in (f"{self.path}.1", self.path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Line cut by a crash
+                    yield entry['query'], entry['params']
+
+
+# Shared instance, written by every DatabaseRetriever of the process
+query_log = QueryLog()
@@ -0,0 +1,129 @@
+# search_index.py
+# Libraries
+import argparse
+import re
+import sqlite3
+# Interfaces
+from database.isearch_index import ISearchIndex
+# Constants
+from config.db_constants import DBConstants
+# Personal libraries
+from database.connection_manager import ConnectionManager, get_connection_manager
+from database.text_compressor import TextCompressor
+from utils.logging_setup import log_email_database
+
+
+class SearchIndex(ISearchIndex):
+    """
+    FTS5 full-text index of the subjects, bodies, attachment names and attachment texts.
+
+    The tables are contentless: the texts stay in Emails and Attachments only and the index rows share
+    their rowids, so a match is joined back with 'e.rowid IN (SELECT rowid FROM EmailsFts WHERE ...)'.
+    Rows are indexed by EmailDatabase in the transaction that inserts them, a database created before
+    the index existed is indexed when the tables are created. If SQLite is built without FTS5, the index
+    is not available and DatabaseRetriever keeps its LIKE conditions.
+    """
+
+    _NEAR = re.compile(r'^near\((.+?)(?:,\s*(\d+))?\)$', re.IGNORECASE)
+
+    def __init__(self, connection_manager: ConnectionManager, text_compressor: TextCompressor = None):
+        self.connections = connection_manager
+        # Registers decompress_text(), the stored texts can be compressed
+        self.compressor = text_compressor if text_compressor else TextCompressor(connection_manager=connection_manager)
+
+    @property
+    def available(self) -> bool:
+        row = self.connections.reader().execute("SELECT COUNT(*) FROM sqlite_master WHERE name IN (?, ?)",
+                                                (DBConstants.EMAILS_FTS_TABLE,
+                                                 DBConstants.ATTACHMENTS_FTS_TABLE)).fetchone()
+        return row[0] == 2
+
+    def create_tables(self) -> None:
+        if self.available:
+            return
+        try:
+            with self.connections.writer() as conn:
+                self._create_tables(conn)
+                self._fill(conn)
+        except sqlite3.OperationalError as e:
+            log_email_database.warning(f"Func: create_tables, full-text search disabled: {e}")
+
+    def index_email(self, conn: sqlite3.Connection, rowid: int, subject: str, body: str, full_body: str) -> None:
+        conn.execute(f"INSERT INTO {DBConstants.EMAILS_FTS_TABLE} "
+                     f"(rowid, {', '.join(DBConstants.EMAILS_FTS_COLUMNS)}) VALUES (?, ?, ?, ?)",
+                     (rowid, subject, body if body is not None else full_body, full_body))
+
+    def index_attachment(self, conn: sqlite3.Connection, rowid: int, filename: str, extracted_text: str) -> None:
+        conn.execute(f"INSERT INTO {DBConstants.ATTACHMENTS_FTS_TABLE} "
+                     f"(rowid, {', '.join(DBConstants.ATTACHMENTS_FTS_COLUMNS)}) VALUES (?, ?, ?)",
+                     (rowid, filename, extracted_text))
+
+    def reindex_attachment(self, conn: sqlite3.Connection, rowid: int, filename: str, old_text: str,
+                           extracted_text: str) -> None:
+        """Replaces the indexed text of an attachment, a contentless table needs the old values to delete a row."""
+        table, columns = DBConstants.ATTACHMENTS_FTS_TABLE, ', '.join(DBConstants.ATTACHMENTS_FTS_COLUMNS)
+        conn.execute(f"INSERT INTO {table} ({table}, rowid, {columns}) VALUES ('delete', ?, ?, ?)",
+                     (rowid, filename, old_text))
+        self.index_attachment(conn, rowid=rowid, filename=filename, extracted_text=extracted_text)
+
+    def rebuild(self) -> None:
+        """Indexes all the rows again, contentless tables cannot update or delete a single row."""
+        with self.connections.writer() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {DBConstants.EMAILS_FTS_TABLE}")
+            conn.execute(f"DROP TABLE IF EXISTS {DBConstants.ATTACHMENTS_FTS_TABLE}")
+            self._create_tables(conn)
+            self._fill(conn)
+
+    def optimize(self) -> None:
+        """Merges the index segments written during a bulk load into one b-tree per table."""
+        if not self.available:
+            return
+        with self.connections.writer() as conn:
+            for table in (DBConstants.EMAILS_FTS_TABLE, DBConstants.ATTACHMENTS_FTS_TABLE):
+                conn.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+
+    def match_query(self, word: str) -> str:
+        """
+        FTS5 query of a search word: a term, a prefix ending with '*', a phrase (several words, with or
+        without double quotes) or 'NEAR(first second, distance)'.
+        """
+        word = word.strip()
+        near = self._NEAR.match(word)
+        if near:
+            terms = ' '.join(self._quote(term) for term in near.group(1).split())
+            return f"NEAR({terms}, {near.group(2)})" if near.group(2) else f"NEAR({terms})"
+        prefix = word.endswith('*')
+        phrase = self._quote(word.rstrip('*').strip('"'))
+        return f"{phrase}*" if prefix else phrase
+
+    def _quote(self, text: str) -> str:
+        return '"' + text.replace('"', '""') + '"'
+
+    def _create_tables(self, conn: sqlite3.Connection) -> None:
+        for table, columns in ((DBConstants.EMAILS_FTS_TABLE, DBConstants.EMAILS_FTS_COLUMNS),
+                               (DBConstants.ATTACHMENTS_FTS_TABLE, DBConstants.ATTACHMENTS_FTS_COLUMNS)):
+            conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, "
+                         f"content='', tokenize='{DBConstants.FTS_TOKENIZER}')")
+
+    def _fill(self, conn: sqlite3.Connection) -> None:
+        log_email_database.info(f"Func: _fill, indexing the existing emails and attachments")
+        decompress = self.compressor.SQL_FUNCTION
+        conn.execute(f"INSERT INTO {DBConstants.EMAILS_FTS_TABLE} "
+                     f"(rowid, {', '.join(DBConstants.EMAILS_FTS_COLUMNS)}) "
+                     f"SELECT rowid, subject, {decompress}(COALESCE(new_body, body)), {decompress}(body) "
+                     f"FROM {DBConstants.EMAILS_TABLE}")
+        conn.execute(f"INSERT INTO {DBConstants.ATTACHMENTS_FTS_TABLE} "
+                     f"(rowid, {', '.join(DBConstants.ATTACHMENTS_FTS_COLUMNS)}) "
+                     f"SELECT rowid, filename, {decompress}(extracted_text) FROM {DBConstants.ATTACHMENTS_TABLE}")
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuilds the full-text search index.")
+    parser.add_argument('--db', default=DBConstants.DB_NAME, help="Database file")
+    args = parser.parse_args(argv)
+    SearchIndex(get_connection_manager(args.db)).rebuild()
+    print(f"Full-text index of {args.db} rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# text_compressor.py
+# Libraries
+import argparse
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+# Interfaces
+from database.itext_compressor import ITextCompressor
+# Constants
+from config.db_constants import DBConstants
+# Personal libraries
+from database.connection_manager import ConnectionManager, get_connection_manager
+from utils.logging_setup import log_email_database
+
+
+class TextCompressor(ITextCompressor):
+    """
+    Transparent compression of the columns of DBConstants.COMPRESSED_COLUMNS.
+
+    A compressed value is a BLOB: the id of its dictionary on two bytes, then a raw deflate stream using
+    that dictionary as preset (0 means no dictionary). Mails repeat the same greetings, quoted headers,
+    signatures and disclaimers, a dictionary trained on them is what makes the short mails compress.
+    Dictionaries are never modified, train() adds a new one and later values use it.
+
+    decompress() is registered on the connections as the SQL function decompress_text(), so the LIKE
+    searches and the full-text backfill read the texts whether they are compressed or not.
+    """
+
+    SQL_FUNCTION = 'decompress_text'
+
+    def __init__(self, connection_manager: ConnectionManager, enabled: bool = DBConstants.TEXT_COMPRESSION,
+                 columns: dict[str, list[str]] = DBConstants.COMPRESSED_COLUMNS):
+        """
+        : enabled: compress the texts given to compress(), they are returned unchanged otherwise
+        """
+        self.connections = connection_manager
+        self.enabled = enabled
+        self.columns = columns
+        self._dictionaries = None
+        self._lock = threading.Lock()
+        self.connections.create_function(self.SQL_FUNCTION, 1, self.decompress)
+
+    def compress(self, text: str | None) -> str | bytes | None:
+        if not self.enabled or text is None:
+            return text
+        data = text.encode('utf-8')
+        if len(data) < DBConstants.COMPRESSION_MIN_LENGTH:
+            return text
+        dictionary_id = max(self._load(), default=0)
+        compressor = self._compressobj(dictionary_id)
+        value = dictionary_id.to_bytes(2, 'big') + compressor.compress(data) + compressor.flush()
+        return value if len(value) < len(data) else text
+
+    def decompress(self, value: str | bytes | None) -> str | None:
+        if not isinstance(value, bytes):
+            return value
+        dictionary_id = int.from_bytes(value[:2], 'big')
+        if dictionary_id:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS, zdict=self._dictionary(dictionary_id))
+        else:
+            decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        return (decompressor.decompress(value[2:]) + decompressor.flush()).decode('utf-8')
+
+    def train(self, samples: int = DBConstants.COMPRESSION_TRAINING_SAMPLES) -> int | None:
+        """
+        Trains a dictionary on a random sample of the stored texts: the lines found in several texts,
+        the most frequent last since deflate references the end of the dictionary with the shortest codes.
+
+        :return: Id of the new dictionary, None if the sample has no repeated line.
+        """
+        frequencies = Counter()
+        reader = self.connections.reader()
+        for table, columns in self.columns.items():
+            for column in columns:
+                rows = reader.execute(f"SELECT {column} FROM {table} WHERE {column} IS NOT NULL "
+                                      f"ORDER BY RANDOM() LIMIT ?", (samples,)).fetchall()
+                for row in rows:
+                    lines = {line.strip() for line in self.decompress(row[0]).splitlines()}
+                    frequencies.update(line.encode('utf-8') for line in lines if len(line) > 3)
+        scored = sorted(((count * len(line), line) for line, count in frequencies.items() if count > 1),
+                        reverse=True)
+        selected, size = [], 0
+        for _, line in scored:
+            if size + len(line) + 1 > DBConstants.COMPRESSION_DICTIONARY_SIZE:
+                continue
+            selected.append(line)
+            size += len(line) + 1
+        if not selected:
+            log_email_database.warning("Func: train, no repeated text to train a dictionary on")
+            return None
+        dictionary = b'\n'.join(reversed(selected)) + b'\n'
+        with self.connections.writer() as conn:
+            dictionary_id = conn.execute(f"INSERT INTO {DBConstants.COMPRESSION_DICTIONARIES_TABLE} (dictionary) "
+                                         f"VALUES (?)", (dictionary,)).lastrowid
+        with self._lock:
+            self._load()[dictionary_id] = dictionary
+        log_email_database.info(f"Func: train, dictionary {dictionary_id} of {len(dictionary)} bytes")
+        return dictionary_id
+
+    def recompress(self) -> int:
+        """
+        Stores every text again: compressed with the latest dictionary if enabled, uncompressed otherwise.
+        Rows are processed by batches of DBConstants.COMPRESSION_BATCH_SIZE, one transaction each.
+
+        :return: Number of values rewritten.
+        """
+        rewritten = 0
+        for table, columns in self.columns.items():
+            last_rowid = 0
+            while True:
+                with self.connections.writer() as conn:
+                    rows = conn.execute(f"SELECT rowid, {', '.join(columns)} FROM {table} WHERE rowid > ? "
+                                        f"ORDER BY rowid LIMIT ?",
+                                        (last_rowid, DBConstants.COMPRESSION_BATCH_SIZE)).fetchall()
+                    for rowid, *values in rows:
+                        new_values = [self.compress(self.decompress(value)) for value in values]
+                        if new_values != values:
+                            conn.execute(f"UPDATE {table} SET {', '.join(f'{column} = ?' for column in columns)} "
+                                         f"WHERE rowid = ?", (*new_values, rowid))
+                            rewritten += sum(new != old for new, old in zip(new_values, values))
+                if not rows:
+                    break
+                last_rowid = rows[-1][0]
+            log_email_database.info(f"Func: recompress, {table} done, {rewritten} values rewritten")
+        return rewritten
+
+    def _compressobj(self, dictionary_id: int):
+        if dictionary_id:
+            return zlib.compressobj(DBConstants.COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS,
+                                    zdict=self._dictionary(dictionary_id))
+        return zlib.compressobj(DBConstants.COMPRESSION_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        dictionary = self._load().get(dictionary_id)
+        if dictionary is None:
+            # Trained by another process since the dictionaries were loaded
+            with self._lock:
+                self._dictionaries = None
+            dictionary = self._load()[dictionary_id]
+        return dictionary
+
+    def _load(self) -> dict[int, bytes]:
+        if self._dictionaries is None:
+            # Own connection: this runs inside decompress_text() calls of the shared connections
+            conn = sqlite3.connect(self.connections.db_name)
+            try:
+                rows = conn.execute(f"SELECT id, dictionary FROM {DBConstants.COMPRESSION_DICTIONARIES_TABLE}")
+                self._dictionaries = dict(rows.fetchall())
+            except sqlite3.OperationalError:
+                self._dictionaries = {}
+            finally:
+                conn.close()
+        return self._dictionaries
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Trains a compression dictionary on the stored texts, or compresses "
+                                                 "or decompresses all of them.")
+    parser.add_argument('command', choices=['train', 'compress', 'decompress'])
+    parser.add_argument('--db', default=DBConstants.DB_NAME, help="Database file")
+    args = parser.parse_args(argv)
+    compressor = TextCompressor(get_connection_manager(args.db), enabled=args.command != 'decompress')
+    if args.command == 'train':
+        print(f"Dictionary trained: {compressor.train()}")
+    else:
+        print(f"{compressor.recompress()} texts rewritten, run VACUUM to shrink {args.db}")
+
+
+if __name__ == "__main__":
+    main()
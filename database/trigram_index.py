@@ -0,0 +1,95 @@
+# trigram_index.py
+# Libraries
+import argparse
+import sqlite3
+# Interfaces
+from database.itrigram_index import ITrigramIndex
+# Constants
+from config.db_constants import DBConstants
+# Personal libraries
+from database.connection_manager import ConnectionManager, get_connection_manager
+from utils.logging_setup import log_email_database
+
+
+class TrigramIndex(ITrigramIndex):
+    """
+    Substring indexes of DBConstants.TRIGRAM_INDEXES, for the searches of order number fragments or
+    partial addresses that the full-text index cannot match.
+
+    Each table is an external content FTS5 table with the 'trigram' tokenizer: it stores the trigrams
+    only, the values stay in their table. SQLite answers LIKE '%x%' on it from the index when x has at
+    least three characters. Rows are indexed by EmailDatabase when they are inserted. The tables need
+    SQLite 3.34 or later, without them DatabaseRetriever keeps its LIKE conditions.
+    """
+
+    def __init__(self, connection_manager: ConnectionManager,
+                 indexes: dict[str, tuple[str, str, str]] = DBConstants.TRIGRAM_INDEXES):
+        self.connections = connection_manager
+        self.indexes = indexes
+        self._tables = None
+
+    @property
+    def tables(self) -> set[str]:
+        """Names of the trigram tables present in the database."""
+        if self._tables is None:
+            rows = self.connections.reader().execute(
+                f"SELECT name FROM sqlite_master WHERE name IN ({', '.join('?' for _ in self.indexes)})",
+                list(self.indexes)).fetchall()
+            self._tables = {row[0] for row in rows}
+        return self._tables
+
+    def create_tables(self) -> None:
+        missing = [table for table in self.indexes if table not in self.tables]
+        if not missing:
+            return
+        try:
+            with self.connections.writer() as conn:
+                for table in missing:
+                    self._create_table(conn, table)
+        except sqlite3.OperationalError as e:
+            log_email_database.warning(f"Func: create_tables, substring indexes disabled: {e}")
+        self._tables = None
+
+    def index(self, conn: sqlite3.Connection, table: str, rowid: int, value: str) -> None:
+        if table not in self.tables or value is None:
+            return
+        column = self.indexes[table][2]
+        conn.execute(f"INSERT INTO {table} (rowid, {column}) VALUES (?, ?)", (rowid, value))
+
+    def rebuild(self) -> None:
+        with self.connections.writer() as conn:
+            for table in self.indexes:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._create_table(conn, table)
+        self._tables = None
+
+    def substring_query(self, table: str, word: str) -> str | None:
+        """
+        Returns the query of the rowids whose value contains word, or None if the table is missing or the
+        word too short to be looked up by trigrams.
+        """
+        if table not in self.tables or len(word) < DBConstants.TRIGRAM_MIN_LENGTH:
+            return None
+        column = self.indexes[table][2]
+        word = word.replace("'", "''")
+        return f"SELECT rowid FROM {table} WHERE {column} LIKE '%{word}%'"
+
+    def _create_table(self, conn: sqlite3.Connection, table: str) -> None:
+        content_table, content_rowid, column = self.indexes[table]
+        log_email_database.info(f"Func: _create_table, {table} on {content_table}.{column}")
+        conn.execute(f"CREATE VIRTUAL TABLE {table} USING fts5({column}, content='{content_table}', "
+                     f"content_rowid='{content_rowid}', tokenize='trigram')")
+        # Indexes the rows already in the content table
+        conn.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuilds the substring (trigram) indexes.")
+    parser.add_argument('--db', default=DBConstants.DB_NAME, help="Database file")
+    args = parser.parse_args(argv)
+    TrigramIndex(get_connection_manager(args.db)).rebuild()
+    print(f"Substring indexes of {args.db} rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # hasher.py
 # Libraries
 import hashlib
+from typing import Iterable
 # Interfaces
 from .ihasher import IHasher
 
@@ -26,3 +27,10 @@ class Hasher(IHasher):
             for chunk in iter(lambda: file.read(4096), b""):
                 hasher.update(chunk)
         return hasher.hexdigest()
+
+    def hash_chunks(self, chunks: Iterable[bytes]) -> str:
+        """Hashes data given in chunks, same value as hash_string on the joined chunks."""
+        hasher = hashlib.new(self.algorithm)
+        for chunk in chunks:
+            hasher.update(chunk)
+        return hasher.hexdigest()
@@ -11,3 +11,7 @@ class IHasher(ABC):
     @abstractmethod
     def hash_file(self, file_path: str) -> str:
         pass
+
+    @abstractmethod
+    def hash_chunks(self, chunks) -> str:
+        pass
@@ -2,6 +2,8 @@
 # Libraries
 import gc
 import os
+import time
+from contextlib import ExitStack
 from email import policy
 from email.parser import BytesParser
 from datetime import datetime
@@ -10,11 +12,24 @@ from abc import abstractmethod
 from email.message import Message
 # Interfaces
 from .iemail_parser import IEmailParser
+# Records
+from .parsed_email import ParsedEmail
+from .part_spooler import PartSpooler, SpooledPart
 # Constants
 from config.email_parser_constants import EmailParserConstants
+from config.extraction_constants import ExtractionConstants, AttachmentPolicyConstants
+from config.file_constants import MimeConstants, OfficeConstants
 from config.email_constants import *
 # Personal libraries
-from utils.file_content_extractor import FileContentExtractor
+from utils.charset_detector import charset_detector
+from utils.html_to_text import HtmlToText
+from utils.reply_stripper import ReplyStripper
+from utils.extraction_cache import ExtractionCache
+from utils.extraction_pool import ExtractionPool, ExtractionResult
+from utils.attachment_policy import AttachmentPolicy
+from utils.attachment_store import AttachmentStore
+from utils.backend_registry import backends
+from utils.run_metrics import run_metrics
 from utils.string_cleaner import StringCleaner
 from utils.date_transformer import DateTransformer
 from utils.logging_setup import log_email_parser_info, log_email_parser_debug, log_email_parser_warning
@@ -22,32 +37,65 @@ from hasher.hasher import Hasher
 
 
 class EmailParser(IEmailParser):
-    def __init__(self, attachments_directory=None):
+    def __init__(self, attachments_directory=None, extraction_cache: ExtractionCache = None,
+                 extraction_pool: ExtractionPool = None, attachment_policy: AttachmentPolicy = None):
         self.sc = StringCleaner()
         self.dt = DateTransformer()
         self.hasher = Hasher()
+        self.charset_detector = charset_detector
+        self.reply_stripper = ReplyStripper()
         if attachments_directory:
             self.attachments_directory = attachments_directory
         else:
             self.attachments_directory = EmailParserConstants.ATTACHMENTS_DIRECTORY
-
-    def parse_email(self, email_content: bytes) -> dict:
+        self.attachment_store = AttachmentStore(directory=self.attachments_directory)
+        self.extraction_cache = extraction_cache if extraction_cache else ExtractionCache()
+        self.extraction_pool = extraction_pool if extraction_pool else ExtractionPool()
+        self.attachment_policy = attachment_policy if attachment_policy else AttachmentPolicy.from_file()
+        self.part_spooler = PartSpooler()
+        self._email_extraction_seconds = 0.0
+
+    def parse_email(self, email_content: bytes) -> ParsedEmail:
         """
-        Analyse le contenu d'un email et retourne un dictionnaire avec les données pertinentes.
+        Analyse le contenu d'un email et retourne un ParsedEmail avec les données pertinentes.
 
         Paramètres:
         email_content (bytes): Le contenu de l'email en bytes.
 
         Retourne:
-        dict: Un dictionnaire contenant les données de l'email.
+        ParsedEmail: Un enregistrement compact de l'email, lisible comme un dictionnaire.
         """
         log_email_parser_info.info("Func: parse_email")
         msg = BytesParser(policy=policy.default).parsebytes(email_content)
         email_id = self.hasher.hash_string(data=msg.as_bytes())
+        return self._parse_message(msg=msg, email_id=email_id)
+
+    def parse_large_email(self, file_path: str) -> ParsedEmail:
+        """
+        Parses a large email file without loading it at once.
+
+        The file is fed to a BytesFeedParser line by line by the PartSpooler, which writes the encoded body
+        of the attachments bigger than SystemConfig.SPILL_PART_THRESHOLD to spool files as they are read.
+        The email_id is computed by streaming the serialized message into the hasher, spooled bodies
+        included (same value as parse_email). A spooled attachment is decoded to disk chunk by chunk once
+        the attachment policy keeps it, and is returned with its stored file path.
+
+        :param file_path: Path to the email file.
+        :return: A ParsedEmail, same content as parse_email.
+        """
+        log_email_parser_info.info(f"Func: parse_large_email {file_path}")
+        spooled = self.part_spooler.parse(file_path=file_path)
+        try:
+            email_id = self.hasher.hash_chunks(chunks=self.part_spooler.serialize(spooled))
+            return self._parse_message(msg=spooled.message, email_id=email_id, spooled_parts=spooled.parts)
+        finally:
+            self.part_spooler.remove(spooled)
+
+    def _parse_message(self, msg: Message, email_id: str, spooled_parts: dict = None) -> ParsedEmail:
         log_email_parser_debug.debug(f"Func: parse_email for email_id: {email_id}")
         date = self._transform_date(msg['date'])
         log_email_parser_debug.debug(f"Func: parse_email with date: {date}")
-        body, attachments = self.extract_body_and_attachments(msg=msg)
+        body, attachments = self.extract_body_and_attachments(msg=msg, spooled_parts=spooled_parts)
 
         from_name, from_address = self._parse_names_addresses(data=msg['from'])
         to_names, to_addresses = self._parse_names_addresses(data=msg['to'])
@@ -58,76 +106,223 @@ class EmailParser(IEmailParser):
         log_email_parser_debug.debug(f"cc_names: {cc_names}")
         log_email_parser_debug.debug(f"bcc_names: {bcc_names}")
 
-        return {
-            EMAIL_ID: email_id,
-            FROM_NAME: from_name,
-            FROM_ADDRESS: from_address,
-            SUBJECT: msg['subject'],
-            DATE_STR: date.strftime(DATETIME_FORMAT) if date else None,
-            DATE_OBJ: date if date else None,
-            DATE_ISO: date.isoformat() if date else None,
-            TIMESTAMP: date.timestamp() if date else None,
-            TO_NAMES: to_names,
-            TO_ADDRESSES: to_addresses,
-            CC_NAMES: cc_names,
-            CC_ADDRESSES: cc_addresses,
-            BCC_NAMES: bcc_names,
-            BCC_ADDRESSES: bcc_addresses,
-            BODY: body,
-            ATTACHMENTS: attachments
-        }
-
-    def extract_body_and_attachments(self, msg: BytesParser) -> Tuple[Optional[str], List[Dict[str, Union[str, bytes]]]]:
+        subject = msg['subject']
+        return ParsedEmail(
+            email_id=email_id,
+            subject=str(subject) if subject is not None else None,
+            date=date,
+            from_=ParsedEmail.pairs(from_name, from_address),
+            to=ParsedEmail.pairs(to_names, to_addresses),
+            cc=ParsedEmail.pairs(cc_names, cc_addresses),
+            bcc=ParsedEmail.pairs(bcc_names, bcc_addresses),
+            body=body,
+            new_body=self.reply_stripper.strip(body, sender=from_address[0] if from_address else None),
+            attachments=attachments
+        )
+
+    def extract_body_and_attachments(self, msg: Message, spooled_parts: dict = None) -> Tuple[Optional[str], List[Dict[str, Union[str, bytes]]]]:
         log_email_parser_info.info("Func: extract_body_and_attachments")
+        spooled_parts = spooled_parts or {}
+        sender = str(msg['from']).lower() if msg['from'] else None
         body = None
+        body_is_html = False
         attachments = []
+        office_documents = []  # Legacy Office attachments, converted together once the parts are read
+        self._email_extraction_seconds = 0.0
         for part in msg.walk():
             content_disposition = part.get('Content-Disposition')
             if self._is_multipart(part=part):
                 continue  # Skip multipart container, go deeper
             elif self._is_body_part(part=part):
                 if part.get_content_type() in ["text/plain", "text/html"]:
-                    charset = part.get_content_charset()
-                    if charset:
-                        try:
-                            # Attempt to decode with the specified charset
-                            body_content = part.get_payload(decode=True).decode(charset)
-                        except (LookupError, UnicodeDecodeError):
-                            # Fallback to utf-8 if charset is unknown or decoding fails
-                            log_email_parser_warning.warning(
-                                f"Unknown or invalid charset '{charset}', falling back to 'utf-8'.")
-                            body_content = part.get_payload(decode=True).decode('utf-8', errors='replace')
-                    else:
-                        # No charset specified, default to utf-8
-                        body_content = part.get_payload(decode=True).decode('utf-8', errors='replace')
+                    # The declared charset is checked against the content, missing or wrong ones are detected
+                    body_content = self.charset_detector.decode(part.get_payload(decode=True),
+                                                                declared=part.get_content_charset(),
+                                                                sender=sender)
 
                     if part.get_content_type() == "text/plain" or body is None:
                         body = body_content
+                        body_is_html = part.get_content_type() == "text/html"
 
             elif "attachment" in content_disposition:
                 log_email_parser_info.info("Func: extract_body_and_attachments, attachment found.")
                 # This is an attachment
                 filename = part.get_filename()
+                spooled_part = spooled_parts.get(id(part))
+                if spooled_part:
+                    size = self.part_spooler.decoded_size(part=spooled_part)
+                else:
+                    size = self._payload_size(part=part)
+                action = self._attachment_action(mime_type=part.get_content_type(), size=size)
+                if action == AttachmentPolicyConstants.SKIP:
+                    log_email_parser_debug.debug(f"Func: extract_body_and_attachments, skipped: {filename}, {size} bytes")
+                    run_metrics.increment('skipped_attachment_bytes', size)
+                    continue
+                if spooled_part:
+                    # Decoded only now that the policy keeps it
+                    filepath, attachment_id, size = self._store_spooled_attachment(spooled_part=spooled_part,
+                                                                                   filename=filename)
+                    log_email_parser_debug.debug(f"Func: extract_body_and_attachments, spilled attachment_id: {attachment_id}")
+                    self._add_attachment(attachments=attachments, office_documents=office_documents, action=action,
+                                         attachment_id=attachment_id, filename=filename, size=size,
+                                         declared_mime_type=part.get_content_type(), filepath=filepath)
+                    continue
                 content = part.get_payload(decode=True)
                 if content is not None:
                     attachment_id = self.hasher.hash_string(data=content)
                     log_email_parser_debug.debug(f"Func: extract_body_and_attachments, attachment_id: {attachment_id}")
                     filepath = self._download_attachment(content=content, attachment_id=attachment_id, filename=filename)
-                    file_text_extractor = FileContentExtractor(file_path=filepath)
-                    extracted_text = file_text_extractor.extract_text()
-                    attachments.append({
-                        'attachment_id': attachment_id,
-                        'filename': filename,
-                        'content': content,
-                        'extracted_text': extracted_text  # Todo: tests à faire !
-                    })
+                    self._add_attachment(attachments=attachments, office_documents=office_documents, action=action,
+                                         attachment_id=attachment_id, filename=filename, size=len(content),
+                                         declared_mime_type=part.get_content_type(), filepath=filepath)
                     del content
                     gc.collect()
                 else:
                     # Handle the case where content is None
                     print(f"Warning: Attachment {filename} has no content and was skipped.")
+        if office_documents:
+            self._extract_office_documents(attachments=attachments, office_documents=office_documents)
+        if body_is_html:
+            # HTML-only email: store the text, not the markup, styles and tracking images
+            body = HtmlToText().convert(body)
         return body, attachments
 
+    def _add_attachment(self, attachments: list, office_documents: list, action: str, **record) -> None:
+        """
+        Appends the record of an attachment. The extraction of legacy Office documents is left to
+        _extract_office_documents, their record is appended once their text is known.
+        """
+        if action == AttachmentPolicyConstants.EXTRACT and self._is_legacy_office(
+                mime_type=record['declared_mime_type'], filename=record['filename']):
+            office_documents.append((len(attachments), record))
+            attachments.append(None)
+            return
+        extraction = self._attachment_text(action=action, attachment_id=record['attachment_id'],
+                                           filepath=record['filepath'], filename=record['filename'])
+        attachments.append(self._attachment_record(extraction=extraction, **record))
+
+    def _is_legacy_office(self, mime_type: str, filename: Optional[str]) -> bool:
+        """Declared type or extension of a doc, xls or ppt file. The pool checks the content."""
+        extensions = [source for source, _ in OfficeConstants.CONVERSIONS.values()]
+        return mime_type in OfficeConstants.CONVERSIONS or self._extension(filename=filename) in extensions
+
+    def _extract_office_documents(self, attachments: list, office_documents: list) -> None:
+        """
+        Extracts the legacy Office attachments of an email together, so that LibreOffice is started once for
+        all of them instead of once per attachment.
+        """
+        extractions = {}
+        missing = []
+        for index, record in office_documents:
+            found, extracted_text = self.extraction_cache.lookup(digest=record['attachment_id'])
+            if found:
+                extractions[index] = ExtractionResult(ExtractionConstants.STATUS_OK, extracted_text)
+            else:
+                missing.append((index, record))
+        if missing:
+            started = time.perf_counter()
+            with ExitStack() as stack:
+                paths = [stack.enter_context(self.attachment_store.readable_path(
+                    record['filepath'], extension=self._extension(filename=record['filename'])))
+                    for _, record in missing]
+                results = self.extraction_pool.extract_many(file_paths=paths)
+            elapsed = time.perf_counter() - started
+            self._email_extraction_seconds += elapsed
+            run_metrics.increment('extraction_seconds', elapsed)
+            for (index, record), result in zip(missing, results):
+                if result.status == ExtractionConstants.STATUS_OK:
+                    self.extraction_cache.store(digest=record['attachment_id'], text=result.text)
+                extractions[index] = result
+        for index, record in office_documents:
+            attachments[index] = self._attachment_record(extraction=extractions[index], **record)
+
+    def _attachment_record(self, attachment_id: str, filename: str, size: int, declared_mime_type: str,
+                           extraction: ExtractionResult, filepath: str) -> dict:
+        return {
+            ATTACHMENT_ID: attachment_id,
+            ATTACHMENT_FILENAME: filename,
+            ATTACHMENT_SIZE: size,
+            ATTACHMENT_MIME_TYPE: self._attachment_mime_type(declared=declared_mime_type, detected=extraction.mime_type,
+                                                             attachment_id=attachment_id, filename=filename),
+            ATTACHMENT_EXTENSION: self._extension(filename=filename),
+            ATTACHMENT_PAGE_COUNT: extraction.page_count,
+            ATTACHMENT_EXTRACTED_TEXT: extraction.text,
+            ATTACHMENT_EXTRACTION_STATUS: extraction.status,
+            ATTACHMENT_EXTRACTION_ERROR: extraction.error,
+            ATTACHMENT_FILEPATH: filepath
+        }
+
+    def _attachment_mime_type(self, declared: str, detected: Optional[str], attachment_id: str,
+                              filename: str) -> str:
+        """
+        Normalised MIME type of an attachment: the type detected from its content, the declared one when the
+        content tells nothing (mail clients often declare application/octet-stream).
+        """
+        if detected is None:
+            # Not extracted in this run, the start of the content is enough
+            try:
+                with self.attachment_store.open(digest=attachment_id) as f:
+                    detected = backends.detect_mime(content=f.read(MimeConstants.SNIFF_SIZE))
+            except Exception as e:
+                log_email_parser_debug.debug(f"Func: _attachment_mime_type, {filename} not detected: {e}")
+        mime_type = detected if detected and detected not in MimeConstants.GENERIC_MIME_TYPES else declared
+        mime_type = mime_type.split(';')[0].strip().lower()
+        return MimeConstants.ALIASES.get(mime_type, mime_type)
+
+    def _extension(self, filename: Optional[str]) -> Optional[str]:
+        extension = os.path.splitext(filename)[1].lstrip('.').lower() if filename else ''
+        return extension or None
+
+    def _attachment_action(self, mime_type: str, size: int) -> str:
+        """Asks the attachment policy what to do with an attachment, before it is hashed or written."""
+        action = self.attachment_policy.decide(mime_type=mime_type, size=size,
+                                               email_seconds=self._email_extraction_seconds,
+                                               run_seconds=run_metrics.get('extraction_seconds'))
+        run_metrics.increment(f"attachments_{action}")
+        return action
+
+    def _payload_size(self, part: Message) -> int:
+        """Size of the decoded attachment, estimated from its encoded payload."""
+        payload = part.get_payload()
+        if not isinstance(payload, str):
+            return 0
+        if str(part.get('Content-Transfer-Encoding', '')).strip().lower() == 'base64':
+            return len(payload) * 3 // 4
+        return len(payload)
+
+    def _attachment_text(self, action: str, attachment_id: str, filepath: str, filename: str) -> ExtractionResult:
+        if action == AttachmentPolicyConstants.EXTRACT:
+            started = time.perf_counter()
+            with self.attachment_store.readable_path(filepath, extension=self._extension(filename=filename)) as path:
+                result = self._extract_attachment_text(attachment_id=attachment_id, filepath=path)
+            elapsed = time.perf_counter() - started
+            self._email_extraction_seconds += elapsed
+            run_metrics.increment('extraction_seconds', elapsed)
+            return result
+        # A text extracted earlier is used even when the policy does not extract
+        found, extracted_text = self.extraction_cache.lookup(digest=attachment_id)
+        if found:
+            return ExtractionResult(ExtractionConstants.STATUS_OK, extracted_text)
+        status = ExtractionConstants.STATUS_DEFERRED if action == AttachmentPolicyConstants.DEFER \
+            else ExtractionConstants.STATUS_NOT_EXTRACTED
+        return ExtractionResult(status)
+
+    def _extract_attachment_text(self, attachment_id: str, filepath: str) -> ExtractionResult:
+        """
+        Returns the text of an attachment, extracted once per content thanks to the extraction cache.
+
+        The extraction runs in the worker pool, timeouts and crashes are returned as a failed ExtractionResult.
+        Only successful extractions are cached, failed ones are retried the next time the content is seen.
+        """
+        found, extracted_text = self.extraction_cache.lookup(digest=attachment_id)
+        if found:
+            log_email_parser_debug.debug(f"Func: _extract_attachment_text, cache hit for {attachment_id}")
+            return ExtractionResult(ExtractionConstants.STATUS_OK, extracted_text)
+        result = self.extraction_pool.extract(file_path=filepath)
+        if result.status == ExtractionConstants.STATUS_OK:
+            self.extraction_cache.store(digest=attachment_id, text=result.text)
+        return result
+
     def _is_multipart(self, part) -> bool:
         return part.get_content_maintype() == 'multipart'
 
@@ -198,20 +393,30 @@ class EmailParser(IEmailParser):
         return content_disposition is None
 
 
-    def _download_attachment(self, content: Any, attachment_id: str, filename: str) -> None:
+    def _download_attachment(self, content: Any, attachment_id: str, filename: str) -> str:
         try:
-            self.sc.create_directory(dir_path=self.attachments_directory)
-            new_filename = self.sc.rename_file(filename=filename, new_name=attachment_id)
-            filepath = os.path.join(self.attachments_directory, new_filename)
-            if not self.sc.file_exists(filepath):
-                log_email_parser_info.info(f"Download attachment {filepath}")
-                with open(filepath, 'wb') as f:
-                    f.write(content)
-            else:
-                log_email_parser_debug.debug(f"Attachment {filename} already exists")
-            return filepath
+            return self.attachment_store.store_bytes(digest=attachment_id, content=content)
+        except Exception as e:
+            raise Exception(f"{filename}: {e}")
+
+    def _store_spooled_attachment(self, spooled_part: SpooledPart, filename: str) -> Tuple[str, str, int]:
+        """
+        Decodes a spooled attachment to disk and moves it into the attachments directory instead of
+        rewriting its content.
+
+        :return: (stored file path, attachment_id, decoded size)
+        """
+        spool_path = self.part_spooler.decode(part=spooled_part)
+        try:
+            attachment_id = self.hasher.hash_file(file_path=spool_path)
+            size = os.path.getsize(spool_path)
+            filepath = self.attachment_store.store_file(digest=attachment_id, source_path=spool_path)
+            return filepath, attachment_id, size
         except Exception as e:
             raise Exception(f"{filename}: {e}")
+        finally:
+            if os.path.exists(spool_path):
+                os.remove(spool_path)
 
     def _parse_names_addresses(self, data: str) -> Tuple[List[str], List[str]]:
         log_email_parser_debug.debug(f"Func: _parse_names_addresses {data}")
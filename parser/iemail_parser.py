@@ -16,4 +16,12 @@ class IEmailParser(ABC):
         """
         pass
 
+    def parse_large_email(self, file_path: str) -> dict:
+        """
+        Parses a large email file incrementally, without reading it at once, and returns the same
+        dictionary as parse_email. Big attachments are decoded to disk instead of memory.
 
+        :param file_path: Path to the email file.
+        :return: A dictionary containing the email data.
+        """
+        pass
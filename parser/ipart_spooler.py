@@ -0,0 +1,46 @@
+# ipart_spooler.py
+# Libraries
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+class IPartSpooler(ABC):
+    @abstractmethod
+    def parse(self, file_path: str):
+        """
+        Parses an email file, the encoded body of its big attachments is written to spool files while the
+        file is read instead of being kept in the parsed message.
+
+        :param file_path: Path to the email file.
+        :return: A SpooledMessage(message, parts), parts maps id(part) of the spooled parts to SpooledPart.
+        """
+        pass
+
+    @abstractmethod
+    def serialize(self, spooled) -> Iterator[bytes]:
+        """
+        Yields the bytes of message.as_bytes() as if the spooled bodies had been kept in the message.
+
+        :param spooled: The SpooledMessage returned by parse.
+        """
+        pass
+
+    @abstractmethod
+    def decoded_size(self, part) -> int:
+        """Size of the decoded attachment, estimated from the size of its encoded body."""
+        pass
+
+    @abstractmethod
+    def decode(self, part) -> str:
+        """
+        Decodes a spooled body chunk by chunk to a new temporary file.
+
+        :param part: A SpooledPart.
+        :return: Path of the decoded file, removed by the caller.
+        """
+        pass
+
+    @abstractmethod
+    def remove(self, spooled) -> None:
+        """Removes the spool files of a SpooledMessage."""
+        pass
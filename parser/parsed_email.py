@@ -0,0 +1,148 @@
+# parsed_email.py
+# Libraries
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+# Constants
+from config.email_constants import *
+
+
+class ParsedEmail(Mapping):
+    """
+    Compact record of a parsed email.
+
+    Only the source data is stored in slots: the date as a single datetime and each address field as a
+    tuple of (name, address) pairs. The date strings, the timestamp and the name/address lists are
+    computed on access. The pickled form is a plain tuple of the slots, which keeps IPC between
+    processes cheap.
+
+    The record is also a read-only mapping using the keys of config.email_constants, so existing code
+    can keep using email[EMAIL_ID], email[TO_ADDRESSES], etc.
+    """
+    __slots__ = ('email_id', 'subject', 'date', 'from_', 'to', 'cc', 'bcc', 'body', 'new_body', 'attachments')
+
+    _KEYS = {
+        EMAIL_ID: 'email_id',
+        FROM_NAME: 'from_name',
+        FROM_ADDRESS: 'from_address',
+        SUBJECT: 'subject',
+        DATE_STR: 'date_str',
+        DATE_OBJ: 'date_obj',
+        DATE_ISO: 'date_iso',
+        TIMESTAMP: 'timestamp',
+        TO_NAMES: 'to_names',
+        TO_ADDRESSES: 'to_addresses',
+        CC_NAMES: 'cc_names',
+        CC_ADDRESSES: 'cc_addresses',
+        BCC_NAMES: 'bcc_names',
+        BCC_ADDRESSES: 'bcc_addresses',
+        BODY: 'body',
+        NEW_BODY: 'new_body',
+        ATTACHMENTS: 'attachments',
+    }
+
+    def __init__(self, email_id: str, subject: Optional[str], date: Optional[datetime],
+                 from_: Tuple[Tuple[str, str], ...] = (), to: Tuple[Tuple[str, str], ...] = (),
+                 cc: Tuple[Tuple[str, str], ...] = (), bcc: Tuple[Tuple[str, str], ...] = (),
+                 body: Optional[str] = None, new_body: Optional[str] = None, attachments: Optional[list] = None):
+        """
+        :param email_id: Hash of the email.
+        :param subject: Subject of the email.
+        :param date: Date of the email, None if it could not be parsed.
+        :param from_: Tuple of (name, address) pairs of the sender field.
+        :param to: Tuple of (name, address) pairs of the To field.
+        :param cc: Tuple of (name, address) pairs of the Cc field.
+        :param bcc: Tuple of (name, address) pairs of the Bcc field.
+        :param body: Body of the email.
+        :param new_body: Text written in this email, without quoted history and signature.
+        :param attachments: List of attachment dictionaries.
+        """
+        self.email_id = email_id
+        self.subject = subject
+        self.date = date
+        self.from_ = tuple(from_)
+        self.to = tuple(to)
+        self.cc = tuple(cc)
+        self.bcc = tuple(bcc)
+        self.body = body
+        self.new_body = new_body
+        self.attachments = attachments if attachments is not None else []
+
+    @staticmethod
+    def pairs(names: List[str], addresses: List[str]) -> Tuple[Tuple[str, str], ...]:
+        """Builds the (name, address) pairs stored in the record from parallel name and address lists."""
+        return tuple(zip(names or [], addresses or []))
+
+    # region derived fields
+    @property
+    def date_obj(self) -> Optional[datetime]:
+        return self.date
+
+    @property
+    def date_str(self) -> Optional[str]:
+        return self.date.strftime(DATETIME_FORMAT) if self.date else None
+
+    @property
+    def date_iso(self) -> Optional[str]:
+        return self.date.isoformat() if self.date else None
+
+    @property
+    def timestamp(self) -> Optional[float]:
+        return self.date.timestamp() if self.date else None
+
+    @property
+    def from_name(self) -> List[str]:
+        return [name for name, _ in self.from_]
+
+    @property
+    def from_address(self) -> List[str]:
+        return [address for _, address in self.from_]
+
+    @property
+    def to_names(self) -> List[str]:
+        return [name for name, _ in self.to]
+
+    @property
+    def to_addresses(self) -> List[str]:
+        return [address for _, address in self.to]
+
+    @property
+    def cc_names(self) -> List[str]:
+        return [name for name, _ in self.cc]
+
+    @property
+    def cc_addresses(self) -> List[str]:
+        return [address for _, address in self.cc]
+
+    @property
+    def bcc_names(self) -> List[str]:
+        return [name for name, _ in self.bcc]
+
+    @property
+    def bcc_addresses(self) -> List[str]:
+        return [address for _, address in self.bcc]
+    # endregion
+
+    # region dict view
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, self._KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._KEYS)
+
+    def __len__(self) -> int:
+        return len(self._KEYS)
+
+    def as_dict(self) -> dict:
+        """Returns the email as the dictionary formerly returned by EmailParser.parse_email."""
+        return {key: self[key] for key in self._KEYS}
+    # endregion
+
+    def __reduce__(self):
+        return self.__class__, tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"ParsedEmail(email_id={self.email_id!r}, subject={self.subject!r}, date={self.date_str!r})"
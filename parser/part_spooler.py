@@ -0,0 +1,259 @@
+# part_spooler.py
+# Libraries
+import binascii
+import os
+import re
+import shutil
+import tempfile
+import uuid
+from email import policy
+from email.feedparser import BytesFeedParser
+from email.message import Message
+from email.parser import BytesHeaderParser
+from typing import Iterator, NamedTuple, Optional
+# Interfaces
+from .ipart_spooler import IPartSpooler
+# Constants
+from config.email_parser_constants import EmailParserConstants
+from config.system_config import SystemConfig
+# Personal libraries
+from utils.logging_setup import log_email_parser_debug, log_email_parser_warning
+
+
+class SpooledPart(NamedTuple):
+    path: str  # Encoded body as found in the file, without the line break which belongs to the next boundary
+    transfer_encoding: str
+    encoded_size: int
+
+
+class SpooledMessage(NamedTuple):
+    message: Message
+    parts: dict  # id(part) -> SpooledPart
+    bodies: list  # SpooledParts in file order, the placeholder of the body n is token + n
+    token: bytes
+
+
+class PartSpooler(IPartSpooler):
+    """
+    Streams an email file into a BytesFeedParser and writes the encoded body of the big attachments to
+    spool files while the file is read.
+
+    The file is read line by line and the MIME structure is followed from the part headers and the
+    boundaries. The body of an attachment is buffered up to threshold bytes, past that it goes to a spool
+    file and the parser only receives a short placeholder: the memory used does not grow with the size of
+    the attachments. Spooled bodies are decoded later, only for the attachments kept by the policy.
+    Line breaks are '\\n' or '\\r\\n', a boundary after a lone '\\r' is not recognised.
+    """
+
+    _EOL = re.compile(rb'\r\n|\r|\n')
+    _FINAL_EOL = re.compile(rb'(\r\n|\r|\n)\Z')
+
+    def __init__(self, threshold: int = SystemConfig.SPILL_PART_THRESHOLD,
+                 chunk_size: int = SystemConfig.FEED_CHUNK_SIZE, directory: str = EmailParserConstants.SPOOL_DIRECTORY):
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.directory = directory
+
+    def parse(self, file_path: str) -> SpooledMessage:
+        token = f"spooled-{uuid.uuid4().hex}-".encode()
+        parser = BytesFeedParser(policy=policy.default)
+        bodies = []
+        try:
+            with open(file_path, 'rb') as f:
+                self._feed(f=f, parser=parser, token=token, bodies=bodies)
+            message = parser.close()
+        except BaseException:
+            self._remove(bodies)
+            raise
+        placeholder = re.compile(re.escape(token.decode()) + r'(\d+)')
+        parts = {}
+        for part in message.walk():
+            payload = part.get_payload() if not part.is_multipart() else None
+            match = placeholder.fullmatch(payload.strip()) if isinstance(payload, str) else None
+            if match:
+                parts[id(part)] = bodies[int(match.group(1))]
+        return SpooledMessage(message=message, parts=parts, bodies=bodies, token=token)
+
+    def serialize(self, spooled: SpooledMessage) -> Iterator[bytes]:
+        # Without the spooled bodies the serialized message is small, they are streamed from their files with
+        # the line breaks the generator would have written
+        data = spooled.message.as_bytes()
+        linesep = spooled.message.policy.linesep.encode()
+        start = 0
+        for match in re.finditer(re.escape(spooled.token) + rb'(\d+)', data):
+            yield data[start:match.start()]
+            yield from self._normalized_lines(path=spooled.bodies[int(match.group(1))].path, linesep=linesep)
+            start = match.end()
+        yield data[start:]
+
+    def decoded_size(self, part: SpooledPart) -> int:
+        if part.transfer_encoding == 'base64':
+            return part.encoded_size * 3 // 4
+        return part.encoded_size
+
+    def decode(self, part: SpooledPart) -> str:
+        fd, path = tempfile.mkstemp(prefix='spill_', dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as target, open(part.path, 'rb') as source:
+                self._decode(source=source, transfer_encoding=part.transfer_encoding, target=target)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def remove(self, spooled: SpooledMessage) -> None:
+        self._remove(spooled.bodies)
+
+    def _feed(self, f, parser: BytesFeedParser, token: bytes, bodies: list) -> None:
+        boundaries = []  # Separators of the enclosing multiparts, innermost last
+        headers = []  # Lines of the header block being read, None in a body
+        body = None  # Body of the attachment being read
+        at_line_start = True
+        try:
+            for line in iter(lambda: f.readline(self.chunk_size), b''):
+                starts_line, at_line_start = at_line_start, line.endswith(b'\n')
+                boundary = self._match_boundary(line=line, boundaries=boundaries) if starts_line else None
+                if boundary:
+                    depth, closing = boundary
+                    if body:
+                        self._end_body(body=body, parser=parser, token=token, bodies=bodies)
+                        body = None
+                    # An outer boundary also ends the inner multiparts
+                    del boundaries[depth + 1:]
+                    if closing:
+                        del boundaries[depth]
+                    headers = None if closing else []
+                    parser.feed(line)
+                elif headers is not None:
+                    parser.feed(line)
+                    headers.append(line)
+                    if starts_line and not line.strip(b'\r\n'):
+                        body = self._start_body(header_block=b''.join(headers), boundaries=boundaries)
+                        # The headers of an enclosed message follow its own headers
+                        headers = [] if body is _ENCLOSED_MESSAGE else None
+                        body = body if isinstance(body, _Body) else None
+                elif body:
+                    body.add(line)
+                else:
+                    parser.feed(line)
+            if body:
+                self._end_body(body=body, parser=parser, token=token, bodies=bodies)
+        except BaseException:
+            if body and body.file is not None:
+                body.file.close()
+                os.remove(body.path)
+            raise
+
+    def _match_boundary(self, line: bytes, boundaries: list) -> Optional[tuple]:
+        """(depth, closing) of the enclosing multipart whose boundary is on the line, None if there is none."""
+        for depth in range(len(boundaries) - 1, -1, -1):
+            if not line.startswith(boundaries[depth]):
+                continue
+            rest = line[len(boundaries[depth]):]
+            closing = rest.startswith(b'--')
+            if not (rest[2:] if closing else rest).rstrip(b'\r\n').strip(b' \t'):
+                return depth, closing
+        return None
+
+    def _start_body(self, header_block: bytes, boundaries: list):
+        part = BytesHeaderParser(policy=policy.default).parsebytes(header_block)
+        if part.get_content_maintype() == 'multipart':
+            boundary = part.get_boundary()
+            if boundary:
+                boundaries.append(b'--' + boundary.encode('ascii', 'surrogateescape'))
+            return None
+        if part.get_content_type() == 'message/rfc822':
+            return _ENCLOSED_MESSAGE
+        transfer_encoding = str(part.get('content-transfer-encoding', '')).strip().lower()
+        # Only the attachments of a multipart are spooled, with the transfer encodings decoded by chunks
+        if (boundaries and 'attachment' in str(part.get('content-disposition', ''))
+                and transfer_encoding in EmailParserConstants.SPILLABLE_TRANSFER_ENCODINGS):
+            return _Body(transfer_encoding=transfer_encoding, threshold=self.threshold, directory=self.directory)
+        return None
+
+    def _end_body(self, body: '_Body', parser: BytesFeedParser, token: bytes, bodies: list) -> None:
+        if body.file is None:
+            for line in body.lines:
+                parser.feed(line)
+            return
+        # The parser strips the line break before a boundary, the spool file does not keep it either
+        eol = self._FINAL_EOL.search(body.pending)
+        body.write(body.pending[:eol.start()] if eol else body.pending)
+        body.file.close()
+        parser.feed(token + str(len(bodies)).encode() + (eol.group() if eol else b''))
+        bodies.append(SpooledPart(path=body.path, transfer_encoding=body.transfer_encoding, encoded_size=body.size))
+        log_email_parser_debug.debug(f"Func: _end_body, {body.size} bytes spooled to {body.path}")
+
+    def _normalized_lines(self, path: str, linesep: bytes) -> Iterator[bytes]:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                # A '\r\n' line break is never split between two chunks
+                while chunk.endswith(b'\r'):
+                    following = f.read(1)
+                    if not following:
+                        break
+                    chunk += following
+                yield self._EOL.sub(linesep, chunk)
+
+    def _decode(self, source, transfer_encoding: str, target) -> None:
+        if transfer_encoding == 'base64':
+            remainder = b''
+            for chunk in iter(lambda: source.read(self.chunk_size), b''):
+                data = remainder + b''.join(chunk.split())
+                usable = len(data) - len(data) % 4
+                target.write(binascii.a2b_base64(data[:usable]))
+                remainder = data[usable:]
+            if remainder:
+                try:
+                    target.write(binascii.a2b_base64(remainder + b'==='))
+                except binascii.Error:
+                    log_email_parser_warning.warning("Func: _decode, invalid base64 padding ignored")
+        elif transfer_encoding == 'quoted-printable':
+            # Whole lines, so that soft line breaks and escapes are never split
+            for lines in iter(lambda: source.readlines(self.chunk_size), []):
+                target.write(binascii.a2b_qp(b''.join(lines)))
+        else:
+            shutil.copyfileobj(source, target, self.chunk_size)
+
+    def _remove(self, bodies: list) -> None:
+        for part in bodies:
+            if os.path.exists(part.path):
+                os.remove(part.path)
+
+
+class _Body:
+    """Body of an attachment, in memory until it is bigger than the threshold, then in a spool file."""
+
+    def __init__(self, transfer_encoding: str, threshold: int, directory: str):
+        self.transfer_encoding = transfer_encoding
+        self.threshold = threshold
+        self.directory = directory
+        self.lines = []
+        self.size = 0
+        self.file = None
+        self.path = None
+        self.pending = None  # Last line read, written once it is known not to precede a boundary
+
+    def add(self, line: bytes) -> None:
+        if self.file is not None:
+            self.write(self.pending)
+            self.pending = line
+            return
+        self.lines.append(line)
+        self.size += len(line)
+        if self.size > self.threshold:
+            fd, self.path = tempfile.mkstemp(prefix='spool_', dir=self.directory)
+            self.file = os.fdopen(fd, 'wb')
+            self.size = 0
+            for buffered in self.lines[:-1]:
+                self.write(buffered)
+            self.pending = self.lines[-1]
+            self.lines = None
+
+    def write(self, data: bytes) -> None:
+        self.file.write(data)
+        self.size += len(data)
+
+
+# Returned by _start_body for message/rfc822 parts
+_ENCLOSED_MESSAGE = object()
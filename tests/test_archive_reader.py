@@ -0,0 +1,125 @@
+import gzip
+import io
+import tarfile
+import unittest
+import zipfile
+from unittest import mock
+
+from utils.archive_reader import ArchiveReader, ArchiveLimitError
+
+
+def make_zip(files: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def make_tar_gz(files: dict, mode: str = 'w:gz') -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode=mode) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+class TestArchiveReader(unittest.TestCase):
+
+    def setUp(self):
+        self.reader = ArchiveReader()
+
+    def _members(self, mime_type, content, reader=None):
+        return {member.name: member.data for member in (reader or self.reader).members(mime_type, content=content)}
+
+    def test_zip(self):
+        members = self._members('application/zip', make_zip({'a.txt': b'first file', 'dir/b.txt': b'second file'}))
+        self.assertEqual(members, {'a.txt': b'first file', 'dir/b.txt': b'second file'})
+
+    def test_nested_archives(self):
+        inner = make_tar_gz({'inner.txt': b'inside the tar'})
+        members = self._members('application/zip', make_zip({'a.txt': b'outer text', 'inner.tar.gz': inner}))
+        self.assertEqual(members, {'a.txt': b'outer text', 'inner.tar.gz/inner.txt': b'inside the tar'})
+
+    def test_single_gzip_file(self):
+        members = self._members('application/gzip', gzip.compress(b'compressed text'))
+        self.assertEqual(list(members.values()), [b'compressed text'])
+
+    def test_depth_limit(self):
+        nested = make_zip({'deep.txt': b'too deep'})
+        for level in range(3):
+            nested = make_zip({f'level{level}.zip': nested})
+        self.assertEqual(self._members('application/zip', nested), {})
+        self.assertEqual(len(self._members('application/zip', nested, ArchiveReader(max_depth=4))), 1)
+
+    def test_member_count_limit(self):
+        content = make_zip({f'{i}.txt': b'text' for i in range(5)})
+        with self.assertRaises(ArchiveLimitError):
+            self._members('application/zip', content, ArchiveReader(max_members=4))
+
+    def test_big_member_is_skipped(self):
+        content = make_zip({'big.txt': b'x' * 1000, 'small.txt': b'small'})
+        members = self._members('application/zip', content, ArchiveReader(max_member_size=100))
+        self.assertEqual(members, {'small.txt': b'small'})
+
+    def test_zip_bomb(self):
+        content = make_zip({'bomb.txt': b'\0' * (20 * 1024 * 1024)})
+        with self.assertRaises(ArchiveLimitError):
+            self._members('application/zip', content)
+
+    def test_seven_zip(self):
+        try:
+            import py7zr
+        except ImportError:
+            self.skipTest("py7zr is not installed")
+        buffer = io.BytesIO()
+        with py7zr.SevenZipFile(buffer, 'w') as archive:
+            archive.writestr(b'seven zip text', 'a.txt')
+        self.assertEqual(self._members('application/x-7z-compressed', buffer.getvalue()), {'a.txt': b'seven zip text'})
+
+    def test_seven_zip_counts_the_decompressed_bytes(self):
+        try:
+            import py7zr
+        except ImportError:
+            self.skipTest("py7zr is not installed")
+        buffer = io.BytesIO()
+        with py7zr.SevenZipFile(buffer, 'w') as archive:
+            archive.writestr(b'x' * 1000, 'big.txt')
+            archive.writestr(b'small', 'small.txt')
+        list_members = py7zr.SevenZipFile.list
+
+        def understated_sizes(archive):
+            infos = list_members(archive)
+            for info in infos:
+                info.uncompressed = 1
+            return infos
+
+        with mock.patch.object(py7zr.SevenZipFile, 'list', understated_sizes):
+            members = self._members('application/x-7z-compressed', buffer.getvalue(),
+                                    ArchiveReader(max_member_size=100))
+            self.assertEqual(members, {'small.txt': b'small'})
+            with self.assertRaises(ArchiveLimitError):
+                self._members('application/x-7z-compressed', buffer.getvalue(), ArchiveReader(max_total_size=500))
+
+    def test_patool_output_is_capped(self):
+        try:
+            import patoolib
+        except ImportError:
+            self.skipTest("patool is not installed")
+        # patool detects the format of the file, a plain tar is extracted by its Python tarfile backend
+        content = make_tar_gz({'a.txt': b'patool text', 'big.bin': b'x' * (3 * 1024 * 1024)}, mode='w')
+        # The limits stop the extraction itself, before any member is read
+        with mock.patch.object(ArchiveReader, '_read') as read:
+            with self.assertRaises(ArchiveLimitError):
+                self._members('application/x-rar', content, ArchiveReader(max_total_size=1024 * 1024))
+            with self.assertRaises(ArchiveLimitError):
+                self._members('application/x-rar', content, ArchiveReader(max_members=1))
+        read.assert_not_called()
+        self.assertEqual(self._members('application/x-rar', make_tar_gz({'a.txt': b'patool text'}, mode='w')),
+                         {'a.txt': b'patool text'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import unittest
+from database.attachment_blob_migration import AttachmentBlobMigration
+from database.connection_manager import ConnectionManager
+from database.email_database import EmailDatabase
+from utils.attachment_store import AttachmentStore
+
+
+class TestAttachmentBlobMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.db')
+        # Attachments table of the versions storing the content in the database
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE Attachments(id TEXT PRIMARY KEY, filename TEXT, content BLOB, "
+                         "extracted_text TEXT)")
+            for i in range(5):
+                content = f'content {i}'.encode()
+                conn.execute("INSERT INTO Attachments (id, filename, content) VALUES (?, ?, ?)",
+                             (hashlib.sha256(content).hexdigest(), f'file{i}.txt', content))
+        conn.close()
+        self.connections = ConnectionManager(db_name=self.path)
+        EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        self.store = AttachmentStore(directory=os.path.join(self.directory, 'attachments'))
+
+    def tearDown(self):
+        self.connections.close()
+
+    def test_run(self):
+        migration = AttachmentBlobMigration(connection_manager=self.connections, blob_store=self.store, batch_size=2)
+        self.assertEqual(migration.pending(), 5)
+        self.assertEqual(migration.run(), 5)
+        self.assertEqual(migration.pending(), 0)
+        digest = hashlib.sha256(b'content 3').hexdigest()
+        with self.store.open(digest) as f:
+            self.assertEqual(f.read(), b'content 3')
+        columns = {row[1] for row in self.connections.reader().execute("PRAGMA table_info(Attachments)")}
+        self.assertNotIn('content', columns)
+        sizes = self.connections.reader().execute("SELECT DISTINCT size FROM Attachments").fetchall()
+        self.assertEqual(sizes, [(9,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
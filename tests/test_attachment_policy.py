@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+import unittest
+
+from config.extraction_constants import AttachmentPolicyConstants as Policy
+from utils.attachment_policy import AttachmentPolicy
+
+MB = 1024 * 1024
+
+
+class TestAttachmentPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = AttachmentPolicy()
+
+    def test_default_policy(self):
+        self.assertEqual(self.policy.decide('application/pdf', 100 * 1024), Policy.EXTRACT)
+        self.assertEqual(self.policy.decide('text/vcard', 300), Policy.EXTRACT)
+        self.assertEqual(self.policy.decide('image/png', 2 * MB), Policy.STORE)
+        self.assertEqual(self.policy.decide('video/mp4', 500 * MB), Policy.SKIP)
+        self.assertEqual(self.policy.decide('application/x-iso9660-image', 700 * MB), Policy.SKIP)
+        self.assertEqual(self.policy.decide('application/pdf', 200 * MB), Policy.DEFER)
+        # Unknown binaries are kept for the deferred extraction, small ones are extracted now
+        self.assertEqual(self.policy.decide('application/octet-stream', 60 * MB), Policy.DEFER)
+        self.assertEqual(self.policy.decide('application/octet-stream', MB), Policy.EXTRACT)
+
+    def test_time_budgets(self):
+        policy = AttachmentPolicy({'rules': [{'mime_types': ['image/*'], 'action': 'store'}],
+                                   'email_time_budget': 10, 'run_time_budget': 100})
+        self.assertEqual(policy.decide('application/pdf', 1000, email_seconds=9, run_seconds=99), Policy.EXTRACT)
+        self.assertEqual(policy.decide('application/pdf', 1000, email_seconds=10), Policy.DEFER)
+        self.assertEqual(policy.decide('application/pdf', 1000, run_seconds=100), Policy.DEFER)
+        # Only extractions are deferred
+        self.assertEqual(policy.decide('image/jpeg', 1000, email_seconds=10), Policy.STORE)
+
+    def test_from_file(self):
+        path = os.path.join(tempfile.mkdtemp(), 'policy.json')
+        with open(path, 'w') as f:
+            json.dump({'rules': [{'mime_types': ['Application/*'], 'max_size': 10, 'action': 'skip'}],
+                       'default_action': 'store'}, f)
+        policy = AttachmentPolicy.from_file(path)
+        self.assertEqual(policy.decide('application/pdf', 10), Policy.SKIP)
+        self.assertEqual(policy.decide('application/pdf', 11), Policy.STORE)
+        self.assertEqual(AttachmentPolicy.from_file(path + '.missing').decide('image/gif', 1), Policy.STORE)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            AttachmentPolicy({'rules': [{'action': 'delete'}]})
+        with self.assertRaises(ValueError):
+            AttachmentPolicy({'rules': [{'mime': ['image/*'], 'action': 'skip'}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+
+from utils.attachment_store import AttachmentStore
+
+
+class TestAttachmentStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = AttachmentStore(directory=self.directory)
+        self.digest = hashlib.sha256(b'content').hexdigest()
+
+    def test_store_bytes(self):
+        path = self.store.store_bytes(self.digest, b'content')
+        self.assertEqual(path, os.path.join(self.directory, self.digest[:2], self.digest[2:4], self.digest))
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'content')
+        # Stored once, whatever the names the content was sent under
+        self.assertEqual(self.store.store_bytes(self.digest, b'content'), path)
+        self.assertEqual(os.listdir(os.path.dirname(path)), [self.digest])
+
+    def test_store_file(self):
+        source = os.path.join(tempfile.mkdtemp(), 'spool')
+        with open(source, 'wb') as f:
+            f.write(b'content')
+        path = self.store.store_file(self.digest, source)
+        self.assertTrue(path.endswith(os.path.join(self.digest[2:4], self.digest)))
+        self.assertFalse(os.path.exists(source))
+
+    def test_migrate(self):
+        flat_path = os.path.join(self.directory, f'{self.digest}.txt')
+        with open(flat_path, 'wb') as f:
+            f.write(b'content')
+        with open(os.path.join(self.directory, 'unrelated.txt'), 'w') as f:
+            f.write('kept')
+        self.assertEqual(self.store.migrate(), 1)
+        self.assertFalse(os.path.exists(flat_path))
+        self.assertTrue(os.path.isfile(self.store.path_for(self.digest)))
+        self.assertTrue(os.path.isfile(os.path.join(self.directory, 'unrelated.txt')))
+
+    def test_migrate_compressed(self):
+        with open(os.path.join(self.directory, f'{self.digest}.pdf'), 'wb') as f:
+            f.write(b'content')
+        # Sharded file named with its extension by earlier versions
+        other = hashlib.sha256(b'other').hexdigest()
+        shard = os.path.join(self.directory, other[:2], other[2:4])
+        os.makedirs(shard)
+        with gzip.open(os.path.join(shard, f'{other}.doc.gz'), 'wb') as f:
+            f.write(b'other')
+        # An uncompressed gzip attachment is kept as it is
+        archive = gzip.compress(b'archived')
+        archive_digest = hashlib.sha256(archive).hexdigest()
+        with open(os.path.join(self.directory, f'{archive_digest}.gz'), 'wb') as f:
+            f.write(archive)
+        store = AttachmentStore(directory=self.directory, compression='gzip')
+        self.assertEqual(store.migrate(), 3)
+        for digest, content in ((self.digest, b'content'), (other, b'other'), (archive_digest, archive)):
+            self.assertTrue(store.exists(digest))
+            with store.open(digest) as f:
+                self.assertEqual(f.read(), content)
+        self.assertEqual(os.listdir(shard), [f'{other}.gz'])
+        self.assertEqual(store.migrate(), 0)
+
+    def test_compression(self):
+        store = AttachmentStore(directory=self.directory, compression='gzip')
+        path = store.store_stream(self.digest, io.BytesIO(b'content'))
+        self.assertTrue(path.endswith(f'{self.digest}.gz'))
+        with store.open(self.digest) as f:
+            self.assertEqual(f.read(), b'content')
+        with store.readable_path(path, extension='pdf') as plain_path:
+            self.assertTrue(plain_path.endswith(f'{self.digest}.pdf'))
+            with open(plain_path, 'rb') as f:
+                self.assertEqual(f.read(), b'content')
+        self.assertFalse(os.path.exists(plain_path))
+
+    def test_readable_path_with_extension(self):
+        path = self.store.store_bytes(self.digest, b'content')
+        with self.store.readable_path(path) as readable:
+            self.assertEqual(readable, path)
+        with self.store.readable_path(path, extension='pdf') as readable:
+            self.assertTrue(readable.endswith(f'{self.digest}.pdf'))
+            with open(readable, 'rb') as f:
+                self.assertEqual(f.read(), b'content')
+        self.assertFalse(os.path.exists(readable))
+        self.assertTrue(os.path.isfile(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.email_database import EmailDatabase
+
+
+class TestAttachmentTypes(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+
+    def tearDown(self):
+        self.connections.close()
+
+    def search(self, attachment_types: list) -> tuple[list, str, list]:
+        retriever = DatabaseRetriever(db_name=self.path, attachment_types=attachment_types)
+        retriever.join().where()
+        return sorted(row[0] for row in retriever.execute()), retriever.build_query(), retriever.params
+
+    def test_types_are_looked_up_in_the_indexes(self):
+        db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        for email_id, filename, mime_type, extension in [
+                ('1', 'offer.pdf', 'application/pdf', 'pdf'),
+                ('2', 'scan.bin', 'application/pdf', 'bin'),  # detected from the content
+                ('3', 'notes.docx', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+                 'docx'),
+                ('4', 'photo.jpg', 'image/jpeg', 'jpg')]:
+            db.insert_email(email_id, 'path', 'name', 'subject', 'body')
+            db.insert_attachment(f'a{email_id}', filename, None, mime_type=mime_type, extension=extension,
+                                 page_count=3 if mime_type == 'application/pdf' else None)
+            db.link('Email_Attachments', 'email_id', 'attachment_id', email_id, f'a{email_id}')
+
+        ids, query, params = self.search(['PDF'])
+        self.assertEqual(ids, ['1', '2'])
+        self.assertEqual(self.search(['.docx', 'image/jpeg'])[0], ['3', '4'])
+        plan = ' '.join(row[3] for row in self.connections.reader().execute(f"EXPLAIN QUERY PLAN {query}", params))
+        self.assertIn('idx_attachments_extension', plan)
+        self.assertIn('idx_attachments_mime_type', plan)
+        self.assertNotIn('SCAN a', plan)
+
+        counts = DatabaseRetriever(db_name=self.path).attachment_type_counts()
+        self.assertEqual(counts['application/pdf'], 2)
+        self.assertEqual(counts['image/jpeg'], 1)
+
+    def test_types_are_bound(self):
+        db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        db.insert_email('1', 'path', 'name', 'subject', 'body')
+        db.insert_attachment('a1', "o'brien.pdf", None, mime_type='application/pdf', extension='pdf')
+        db.link('Email_Attachments', 'email_id', 'attachment_id', '1', 'a1')
+
+        ids, query, params = self.search(["pdf') OR ('1'='1", "text/x-o'brien"])
+        self.assertEqual(ids, [])
+        self.assertNotIn("'1'", query)
+        self.assertIn("text/x-o'brien", params)
+
+    def test_existing_database_is_backfilled(self):
+        # Attachments table of the versions without extension
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE Attachments(id TEXT PRIMARY KEY, filename TEXT, extracted_text TEXT)")
+            conn.execute("INSERT INTO Attachments (id, filename) VALUES ('1', 'Report.v2.PDF'), ('2', 'README'), "
+                         "('3', 'archive.'), ('4', NULL)")
+        conn.close()
+        EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        self.assertEqual(self.connections.reader().execute("SELECT id, extension FROM Attachments ORDER BY id")
+                         .fetchall(), [('1', 'pdf'), ('2', None), ('3', None), ('4', None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+
+from utils.backend_registry import BackendRegistry
+
+
+class TestBackendRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = BackendRegistry()
+
+    def test_module_is_imported_once(self):
+        module = self.registry.module('json')
+        self.assertIs(module, self.registry.module('json'))
+        self.assertTrue(hasattr(module, 'loads'))
+
+    def test_unknown_module_raises(self):
+        with self.assertRaises(ImportError):
+            self.registry.module('no_such_backend_module')
+
+    def test_mime_detector_is_shared(self):
+        self.assertEqual(self.registry.detect_mime(content=b'plain text\n'), 'text/plain')
+        detector = self.registry._mime_detector
+        self.registry.detect_mime(content=b'%PDF-1.4\n')
+        self.assertIs(detector, self.registry._mime_detector)
+
+
+if __name__ == '__main__':
+    unittest.main()
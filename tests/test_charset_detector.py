@@ -0,0 +1,42 @@
+import unittest
+from utils.charset_detector import CharsetDetector
+
+FRENCH = "Bonjour, voilà le reçu de la réunion de l'été à Liège. Très cordialement, François"
+JAPANESE = "こんにちは、会議の資料を送ります。よろしくお願いします。"
+
+
+class TestCharsetDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = CharsetDetector()
+
+    def test_bom(self):
+        self.assertEqual(self.detector.detect(b'\xef\xbb\xbfabc'), 'utf-8-sig')
+        self.assertEqual(self.detector.decode(FRENCH.encode('utf-16')), FRENCH)
+
+    def test_utf8(self):
+        self.assertEqual(self.detector.detect(FRENCH.encode('utf-8')), 'utf-8')
+
+    def test_mislabelled_utf8(self):
+        self.assertEqual(self.detector.detect(FRENCH.encode('utf-8'), declared='iso-8859-1'), 'utf-8')
+
+    def test_declared_charset(self):
+        self.assertEqual(self.detector.detect(FRENCH.encode('cp1252'), declared='iso-8859-1'), 'cp1252')
+
+    def test_unknown_label(self):
+        self.assertIsNone(self.detector.normalize_label('x-unknown'))
+        self.assertEqual(self.detector.decode(b'abc', declared='x-unknown'), 'abc')
+
+    def test_heuristics(self):
+        for encoding in ['cp1252', 'cp850', 'mac-roman']:
+            self.assertEqual(self.detector.decode(FRENCH.encode(encoding)), FRENCH, encoding)
+        for encoding in ['shift_jis', 'euc_jp']:
+            self.assertEqual(self.detector.decode(JAPANESE.encode(encoding)), JAPANESE, encoding)
+
+    def test_sender_cache(self):
+        self.detector.detect(FRENCH.encode('cp850'), sender='bob@example.com')
+        self.assertEqual(self.detector.detect('é'.encode('cp850'), sender='bob@example.com'), 'cp850')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import threading
+import unittest
+from config.db_constants import DBConstants
+from database.connection_manager import ConnectionManager, get_connection_manager
+from database.email_database import EmailDatabase
+
+
+class TestConnectionManager(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.manager = ConnectionManager(db_name=self.path, profile=DBConstants.BULK_LOAD_PROFILE)
+        with self.manager.writer() as conn:
+            conn.execute("CREATE TABLE T(value INTEGER)")
+
+    def tearDown(self):
+        self.manager.close()
+
+    def test_profile(self):
+        with self.manager.writer() as conn:
+            self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+            self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 0)
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -262144)
+        with self.assertRaises(ValueError):
+            ConnectionManager(db_name=self.path, profile='unknown')
+
+    def test_nested_writers_form_one_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with self.manager.writer() as conn:
+                conn.execute("INSERT INTO T VALUES (1)")
+                with self.manager.writer() as inner:
+                    inner.execute("INSERT INTO T VALUES (2)")
+                raise RuntimeError
+        self.assertEqual(self.manager.reader().execute("SELECT COUNT(*) FROM T").fetchone()[0], 0)
+
+    def test_readers_are_per_thread_and_read_only(self):
+        readers = []
+        thread = threading.Thread(target=lambda: readers.append(self.manager.reader()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(readers[0], self.manager.reader())
+        self.assertIs(self.manager.reader(), self.manager.reader())
+        with self.assertRaises(Exception):
+            self.manager.reader().execute("INSERT INTO T VALUES (1)")
+
+    def test_reader_sees_committed_writes(self):
+        reader = self.manager.reader()
+        with self.manager.writer() as conn:
+            conn.execute("INSERT INTO T VALUES (1)")
+            self.assertEqual(reader.execute("SELECT COUNT(*) FROM T").fetchone()[0], 0)
+        self.assertEqual(reader.execute("SELECT COUNT(*) FROM T").fetchone()[0], 1)
+
+    def test_shared_manager(self):
+        self.assertIs(get_connection_manager(self.path), get_connection_manager(self.path))
+
+
+class TestEmailDatabaseIds(unittest.TestCase):
+
+    def test_ignored_insert_returns_existing_id(self):
+        path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        db = EmailDatabase(db_name=path)
+        first = db.insert_email_address('a@example.com', return_existing_id=True)
+        db.insert_email_address('b@example.com')
+        self.assertEqual(db.insert_email_address('a@example.com', return_existing_id=True), first)
+        self.assertEqual(db.insert_email_address('a@example.com'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
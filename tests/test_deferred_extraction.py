@@ -0,0 +1,91 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from config.extraction_constants import ExtractionConstants
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.deferred_extraction import DeferredExtraction
+from database.email_database import EmailDatabase
+from utils.attachment_store import AttachmentStore
+from utils.extraction_cache import ExtractionCache
+from utils.extraction_pool import ExtractionResult
+
+
+class _ReadingPool:
+    """Returns the content of the files as their text."""
+
+    def __init__(self):
+        self.batches = []
+
+    def extract_many(self, file_paths: list) -> list:
+        self.batches.append(len(file_paths))
+        results = []
+        for file_path in file_paths:
+            with open(file_path, 'rb') as f:
+                results.append(ExtractionResult(ExtractionConstants.STATUS_OK, f.read().decode(), page_count=1))
+        return results
+
+
+class TestDeferredExtraction(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+        self.db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        self.store = AttachmentStore(directory=os.path.join(self.directory, 'attachments'))
+        self.cache = ExtractionCache(path=os.path.join(self.directory, 'cache.db'))
+        self.pool = _ReadingPool()
+        self.db.insert_email('1', 'path', 'name', 'Backup', 'See the attached dump')
+        self.digests = []
+        for i, text in enumerate(['Kwartaalcijfers van de leverancier', 'Inventaris van het magazijn',
+                                  'Jaarverslag zonder bestand']):
+            digest = hashlib.sha256(text.encode()).hexdigest()
+            if i < 2:
+                self.store.store_bytes(digest, text.encode())
+            self.db.insert_attachment(digest, f'dump{i}.bin', None,
+                                      extraction_status=ExtractionConstants.STATUS_DEFERRED)
+            self.db.link('Email_Attachments', 'email_id', 'attachment_id', '1', digest)
+            self.digests.append(digest)
+
+    def tearDown(self):
+        self.cache.close()
+        self.connections.close()
+
+    def search(self, word: str) -> list:
+        retriever = DatabaseRetriever(db_name=self.path, words=[word], words_localization=['attachment'])
+        retriever.join().where()
+        return sorted(row[0] for row in retriever.execute())
+
+    def statuses(self) -> list:
+        return self.connections.reader().execute(
+            "SELECT extraction_status, extraction_error IS NOT NULL, page_count FROM Attachments "
+            "ORDER BY rowid").fetchall()
+
+    def test_run(self):
+        extraction = DeferredExtraction(email_database=self.db, attachment_store=self.store,
+                                        extraction_pool=self.pool, extraction_cache=self.cache, batch_size=2)
+        self.assertEqual(extraction.pending(), 3)
+        self.assertEqual(self.search('magazijn'), [])
+        self.assertEqual(extraction.run(), 3)
+        self.assertEqual(extraction.pending(), 0)
+        self.assertEqual(self.pool.batches, [2])
+        self.assertEqual(self.statuses(), [(ExtractionConstants.STATUS_OK, 0, 1), (ExtractionConstants.STATUS_OK, 0, 1),
+                                           (ExtractionConstants.STATUS_ERROR, 1, None)])
+        self.assertEqual(self.search('magazijn'), ['1'])
+        self.assertEqual(self.search('kwartaalcijfers'), ['1'])
+        self.assertEqual(self.cache.lookup(self.digests[1]), (True, 'Inventaris van het magazijn'))
+
+    def test_limit_and_cache(self):
+        self.cache.store(self.digests[0], 'Cached text')
+        extraction = DeferredExtraction(email_database=self.db, attachment_store=self.store,
+                                        extraction_pool=self.pool, extraction_cache=self.cache)
+        self.assertEqual(extraction.run(limit=1), 1)
+        self.assertEqual(self.pool.batches, [])
+        self.assertEqual(extraction.pending(), 2)
+        self.assertEqual(self.search('cached'), ['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.email_database import EmailDatabase
+from utils.domain_parser import DomainParser
+
+
+class TestDomainParser(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = DomainParser()
+
+    def test_parse(self):
+        self.assertEqual(self.parser.local_part('jan.peeters@mail.client.be'), 'jan.peeters')
+        self.assertEqual(self.parser.domain('jan.peeters@Mail.Client.be'), 'mail.client.be')
+        self.assertIsNone(self.parser.domain('undisclosed-recipients'))
+        self.assertEqual(self.parser.reversed_registrable_domain('mail.client.be'), 'be.client')
+        self.assertEqual(self.parser.registrable_domain('sales.client.co.uk'), 'client.co.uk')
+        self.assertIsNone(self.parser.registrable_domain('co.uk'))
+        self.assertEqual(self.parser.normalize('@Client.be.'), 'client.be')
+
+
+class TestDomainFilters(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+
+    def tearDown(self):
+        self.connections.close()
+
+    def search(self, **kwargs) -> tuple[list, tuple]:
+        retriever = DatabaseRetriever(db_name=self.path, **kwargs)
+        retriever.join().where()
+        return sorted(row[0] for row in retriever.execute()), (retriever.build_query(), retriever.params)
+
+    def plan(self, query: tuple) -> str:
+        query, params = query
+        return ' '.join(row[3] for row in self.connections.reader().execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+    def test_filters(self):
+        db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        for email_id, address in [('1', 'bob@client.be'), ('2', 'jan@mail.client.be'), ('3', 'eva@eu.sales.client.be'),
+                                  ('4', 'alice@example.be'), ('5', 'carol@client.co.uk'), ('6', 'dave@notclient.be')]:
+            db.insert_email(email_id, 'path', 'name', 'subject', 'body')
+            db.link_participants(email_id, [db.insert_email_address(address, return_existing_id=True)], 'from')
+
+        ids, query = self.search(domains=['@Client.be'])
+        self.assertEqual(ids, ['1'])
+        self.assertIn('idx_email_addresses_domain', self.plan(query))
+        ids, query = self.search(subdomains=['client.be'])
+        self.assertEqual(ids, ['1', '2', '3'])
+        self.assertIn('idx_email_addresses_registrable_domain', self.plan(query))
+        self.assertEqual(self.search(subdomains=['sales.client.be'])[0], ['3'])
+        ids, query = self.search(subdomains=['be'])
+        self.assertEqual(ids, ['1', '2', '3', '4', '6'])
+        self.assertIn('idx_email_addresses_registrable_domain', self.plan(query))
+        self.assertEqual(self.search(subdomains=['co.uk'], domains=['example.be'])[0], ['4', '5'])
+
+    def test_values_are_bound(self):
+        db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        for email_id, address in [('1', 'bob@mail.client.be'), ('2', 'jan@eu.mailxclient.client.be')]:
+            db.insert_email(email_id, 'path', 'name', 'subject', 'body')
+            db.link_participants(email_id, [db.insert_email_address(address, return_existing_id=True)], 'from')
+
+        ids, (query, params) = self.search(domains=["client.be' OR '1'='1"], subdomains=["o'brien.be"])
+        self.assertEqual(ids, [])
+        self.assertNotIn("o'brien", query)
+        self.assertIn("be.o'brien", params)
+        # '_' is not a LIKE wildcard
+        self.assertEqual(self.search(subdomains=['mail_client.client.be'])[0], [])
+        self.assertEqual(self.search(subdomains=['mailxclient.client.be'])[0], ['2'])
+
+    def test_existing_database_is_backfilled(self):
+        # EmailAddresses table of the versions without the parsed domain
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE EmailAddresses(id INTEGER PRIMARY KEY, email_address TEXT UNIQUE NOT NULL "
+                         "COLLATE NOCASE)")
+            conn.execute("INSERT INTO EmailAddresses (email_address) VALUES ('jan@mail.client.be'), ('nobody')")
+        conn.close()
+        EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        rows = self.connections.reader().execute("SELECT local_part, domain, reversed_registrable_domain "
+                                                 "FROM EmailAddresses ORDER BY id").fetchall()
+        self.assertEqual(rows, [('jan', 'mail.client.be', 'be.client'), (None, None, None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
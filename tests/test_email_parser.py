@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+from email.message import EmailMessage
+from unittest import mock
+
+from config.email_constants import (ATTACHMENT_FILENAME, ATTACHMENT_EXTRACTED_TEXT, ATTACHMENT_ID, ATTACHMENT_MIME_TYPE,
+                                    ATTACHMENT_SIZE, ATTACHMENTS, BODY, EMAIL_ID)
+from config.extraction_constants import ExtractionConstants
+from parser.email_parser import EmailParser
+from parser.part_spooler import PartSpooler
+from utils.attachment_policy import AttachmentPolicy
+from utils.extraction_cache import ExtractionCache
+from utils.extraction_pool import ExtractionResult
+
+
+class _RecordingPool:
+    """Returns the content of the files as their text and records the extensions of the files it was given."""
+
+    def __init__(self):
+        self.calls = []
+
+    def extract(self, file_path: str) -> ExtractionResult:
+        self.calls.append(('extract', [os.path.splitext(file_path)[1]]))
+        return self._result(file_path)
+
+    def extract_many(self, file_paths: list) -> list:
+        self.calls.append(('extract_many', [os.path.splitext(file_path)[1] for file_path in file_paths]))
+        return [self._result(file_path) for file_path in file_paths]
+
+    def _result(self, file_path: str) -> ExtractionResult:
+        with open(file_path, 'rb') as f:
+            return ExtractionResult(ExtractionConstants.STATUS_OK, f.read().decode(errors='replace'),
+                                    mime_type='text/plain')
+
+
+def make_email(attachments: list) -> bytes:
+    msg = EmailMessage()
+    msg['From'] = 'Jan Peeters <jan@client.be>'
+    msg['To'] = 'alice@example.com'
+    msg['Subject'] = 'Documents'
+    msg['Date'] = 'Mon, 04 Mar 2019 10:00:00 +0100'
+    msg.set_content('See the attached documents.')
+    for filename, mime_type, content in attachments:
+        maintype, subtype = mime_type.split('/')
+        msg.add_attachment(content, maintype=maintype, subtype=subtype, filename=filename)
+    return msg.as_bytes()
+
+
+def make_large_email(linesep: str = '\n') -> bytes:
+    forwarded = EmailMessage()
+    forwarded['From'] = 'bob@client.be'
+    forwarded['Subject'] = 'Scans'
+    forwarded.set_content('Forwarded scans.')
+    forwarded.add_attachment(bytes(range(256)) * 40, maintype='image', subtype='png', filename='scan.png')
+    msg = EmailMessage()
+    msg['From'] = 'Jan Peeters <jan@client.be>'
+    msg['To'] = 'alice@example.com'
+    msg['Subject'] = 'Big documents'
+    msg['Date'] = 'Mon, 04 Mar 2019 10:00:00 +0100'
+    msg.set_content('See the attached documents.')
+    msg.add_alternative('<p>See the attached documents.</p>', subtype='html')
+    msg.add_attachment(os.urandom(20000), maintype='application', subtype='pdf', filename='offer.pdf')
+    msg.add_attachment('Ligne accentuée numéro 1 = 2\n' * 500, subtype='plain', cte='quoted-printable',
+                       filename='notes.txt')
+    msg.add_attachment(b'small', maintype='application', subtype='zip', filename='small.zip')
+    msg.add_attachment(os.urandom(5000), maintype='application', subtype='zip', filename='archive.zip')
+    msg.add_attachment(forwarded)
+    return msg.as_bytes().replace(b'\n', linesep.encode())
+
+
+class TestEmailParser(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.pool = _RecordingPool()
+        cache = ExtractionCache(path=os.path.join(directory, 'cache.db'))
+        self.addCleanup(cache.close)
+        self.parser = EmailParser(attachments_directory=os.path.join(directory, 'attachments'),
+                                  extraction_cache=cache, extraction_pool=self.pool,
+                                  attachment_policy=AttachmentPolicy())
+
+    def test_legacy_office_attachments_are_extracted_together(self):
+        email = self.parser.parse_email(make_email([
+            ('letter.doc', 'application/msword', b'letter'),
+            ('notes.txt', 'application/octet-stream', b'notes'),
+            ('budget.xls', 'application/octet-stream', b'budget'),
+        ]))
+        self.assertEqual(self.pool.calls, [('extract', ['.txt']), ('extract_many', ['.doc', '.xls'])])
+        attachments = email[ATTACHMENTS]
+        self.assertEqual([attachment[ATTACHMENT_FILENAME] for attachment in attachments],
+                         ['letter.doc', 'notes.txt', 'budget.xls'])
+        self.assertEqual([attachment[ATTACHMENT_EXTRACTED_TEXT] for attachment in attachments],
+                         ['letter', 'notes', 'budget'])
+        self.assertEqual(attachments[1][ATTACHMENT_MIME_TYPE], 'text/plain')
+
+        # Extracted once per content
+        self.parser.parse_email(make_email([('copy.doc', 'application/msword', b'letter')]))
+        self.assertEqual(len(self.pool.calls), 2)
+
+    def _write(self, data: bytes) -> str:
+        fd, path = tempfile.mkstemp(suffix='.eml')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_large_email_gives_the_same_result(self):
+        spool_directory = tempfile.mkdtemp()
+        self.parser.part_spooler = PartSpooler(threshold=1024, chunk_size=100, directory=spool_directory)
+        for linesep in ('\n', '\r\n'):
+            data = make_large_email(linesep)
+            large = self.parser.parse_large_email(self._write(data))
+            self.assertEqual(os.listdir(spool_directory), [])
+            email = self.parser.parse_email(data)
+            self.assertEqual(large[EMAIL_ID], email[EMAIL_ID])
+            self.assertEqual(large[BODY], email[BODY])
+            self.assertEqual([(attachment[ATTACHMENT_FILENAME], attachment[ATTACHMENT_ID], attachment[ATTACHMENT_SIZE])
+                              for attachment in large[ATTACHMENTS]],
+                             [(attachment[ATTACHMENT_FILENAME], attachment[ATTACHMENT_ID], attachment[ATTACHMENT_SIZE])
+                              for attachment in email[ATTACHMENTS]])
+            self.assertEqual(len(large[ATTACHMENTS]), 5)
+
+    def test_big_bodies_are_spooled_while_reading(self):
+        spooler = PartSpooler(threshold=1024, chunk_size=100)
+        spooled = spooler.parse(self._write(make_large_email()))
+        # The PDF, the text, the archive and the scan of the enclosed message, the small archive stays in the message
+        self.assertEqual(len(spooled.bodies), 4)
+        self.assertEqual(len(spooled.parts), 4)
+        for part in spooled.message.walk():
+            if not part.is_multipart() and part.get_content_type() != 'message/rfc822':
+                self.assertLess(len(part.get_payload()), 20000)
+        spooler.remove(spooled)
+        self.assertFalse(any(os.path.exists(part.path) for part in spooled.bodies))
+
+    def test_policy_is_checked_before_decoding(self):
+        self.parser.part_spooler = PartSpooler(threshold=1024)
+        self.parser.attachment_policy = AttachmentPolicy({'rules': [{'mime_types': ['application/zip'],
+                                                                     'action': 'skip'}]})
+        with mock.patch.object(self.parser.part_spooler, 'decode', wraps=self.parser.part_spooler.decode) as decode:
+            email = self.parser.parse_large_email(self._write(make_large_email()))
+        self.assertEqual(decode.call_count, 3)
+        self.assertEqual([attachment[ATTACHMENT_FILENAME] for attachment in email[ATTACHMENTS]],
+                         ['offer.pdf', 'notes.txt', 'scan.png'])
+
+
+if __name__ == '__main__':
+    unittest.main()
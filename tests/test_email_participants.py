@@ -0,0 +1,95 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from config.db_constants import DBConstants
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.email_database import EmailDatabase
+
+
+class TestEmailParticipants(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+
+    def tearDown(self):
+        self.connections.close()
+
+    def search(self, **kwargs) -> list:
+        retriever = DatabaseRetriever(db_name=self.path, **kwargs)
+        retriever.join().where()
+        return sorted(row[0] for row in retriever.execute())
+
+    def test_filters(self):
+        db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        for email_id, sender, recipients in [('1', 'bob@client.be', ['alice@example.com', 'carol@example.com']),
+                                             ('2', 'alice@example.com', ['bob@client.be']),
+                                             ('3', 'carol@example.com', ['dave@example.com'])]:
+            db.insert_email(email_id, 'path', 'name', 'subject', 'body')
+            db.link_participants(email_id, [db.insert_email_address(sender, return_existing_id=True)],
+                                 DBConstants.FROM_ROLE)
+            db.link_participants(email_id, [db.insert_email_address(address, return_existing_id=True)
+                                            for address in recipients], DBConstants.TO_ROLE)
+        contact_id = db.insert_contact('Bob', 'Builder')
+        db.link('Contacts_EmailAddresses', 'contact_id', 'email_address_id', contact_id,
+                db.insert_email_address('bob@client.be', return_existing_id=True))
+        db.link('Contacts_Alias', 'contact_id', 'alias_id', contact_id, db.insert_alias('Bobby'))
+
+        self.assertEqual(self.search(addresses=['BOB@client.be']), ['1', '2'])
+        self.assertEqual(self.search(addresses=['dave@example.com', 'bob@client.be']), ['1', '2', '3'])
+        self.assertEqual(self.search(contacts=[('bob', 'builder')]), ['1', '2'])
+        self.assertEqual(self.search(aliases=['bobby']), ['1', '2'])
+        self.assertEqual(self.search(words=['dave'], words_localization=['address']), ['3'])
+
+        retriever = DatabaseRetriever(db_name=self.path, addresses=['bob@client.be'])
+        retriever.join().where()
+        plan = ' '.join(row[3] for row in self.connections.reader().execute(
+            f"EXPLAIN QUERY PLAN {retriever.build_query()}"))
+        self.assertIn('idx_email_participants_address', plan)
+
+    def test_word_searches_are_subqueries(self):
+        db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        db.insert_email('1', 'path', 'name', 'subject', 'body')
+        db.link_participants('1', [db.insert_email_address(address, return_existing_id=True)
+                                   for address in ('bob@client.be', 'bobby@client.be')], DBConstants.TO_ROLE)
+        contact_id = db.insert_contact('Bob', 'Builder')
+        for address in ('bob@client.be', 'bobby@client.be'):
+            db.link('Contacts_EmailAddresses', 'contact_id', 'email_address_id', contact_id,
+                    db.insert_email_address(address, return_existing_id=True))
+        for alias in ('Bob', 'Bobby'):
+            db.link('Contacts_Alias', 'contact_id', 'alias_id', contact_id, db.insert_alias(alias))
+        for name in ('bob.pdf', 'bob.txt'):
+            db.insert_attachment(name, name, 'Notes from bob')
+            db.link('Email_Attachments', 'email_id', 'attachment_id', '1', name)
+
+        retriever = DatabaseRetriever(db_name=self.path, words=['bob'], words_localization=['everywhere'])
+        retriever.join().where()
+        self.assertNotIn(' JOIN ', retriever.build_query().split(' WHERE ', 1)[0])
+        self.assertEqual(retriever.execute(), [('1',)])
+        for localization in ('contact', 'alias', 'address', 'attachment_name', 'attachment'):
+            self.assertEqual(self.search(words=['bob'], words_localization=[localization]), ['1'], localization)
+
+    def test_migration(self):
+        # Link tables of the versions before Email_Participants
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE EmailAddresses(id INTEGER PRIMARY KEY, email_address TEXT UNIQUE NOT NULL "
+                         "COLLATE NOCASE)")
+            conn.execute("INSERT INTO EmailAddresses VALUES (1, 'bob@client.be'), (2, 'alice@example.com')")
+            for table in DBConstants.LEGACY_PARTICIPANT_TABLES:
+                conn.execute(f"CREATE TABLE {table}(email_id TEXT, email_address_id INTEGER, "
+                             f"UNIQUE(email_id, email_address_id))")
+            conn.execute("INSERT INTO Email_From VALUES ('1', 1)")
+            conn.execute("INSERT INTO Email_To VALUES ('1', 2), ('2', 1)")
+        conn.close()
+        EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        reader = self.connections.reader()
+        self.assertEqual(reader.execute("SELECT * FROM Email_Participants ORDER BY 1, 2").fetchall(),
+                         [('1', 1, 'from'), ('1', 2, 'to'), ('2', 1, 'to')])
+        tables = {row[0] for row in reader.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertFalse(tables & set(DBConstants.LEGACY_PARTICIPANT_TABLES))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.email_database import EmailDatabase
+
+
+class TestEmailTimestamp(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+
+    def tearDown(self):
+        self.connections.close()
+
+    def search(self, start_date: str = "", end_date: str = "") -> tuple[list, str]:
+        retriever = DatabaseRetriever(db_name=self.path, start_date=start_date, end_date=end_date)
+        retriever.join().where()
+        return sorted(row[0] for row in retriever.execute()), retriever.build_query()
+
+    def test_date_range(self):
+        db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        for email_id, date in [('1', '2019-02-28 12:00:00'), ('2', '2019-03-04 10:00:00'),
+                               ('3', '2019-03-31 23:00:00'), ('4', '2019-04-02 08:00:00')]:
+            db.insert_email(email_id, 'path', 'name', 'subject', 'body',
+                            timestamp=datetime.strptime(date, '%Y-%m-%d %H:%M:%S').timestamp())
+        db.insert_email('5', 'path', 'name', 'subject', 'body')
+
+        ids, query = self.search('2019-03-01 00:00:00', '2019-03-31 23:59:59')
+        self.assertEqual(ids, ['2', '3'])
+        self.assertNotIn("'", query)
+        self.assertEqual(self.search(start_date='2019-03-05 00:00:00')[0], ['3', '4'])
+        self.assertEqual(self.search(end_date='2019-03-05 00:00:00')[0], ['1', '2'])
+        plan = ' '.join(row[3] for row in self.connections.reader().execute(f"EXPLAIN QUERY PLAN {query}"))
+        self.assertIn('COVERING INDEX idx_emails_timestamp', plan)
+
+    def test_existing_database_is_backfilled(self):
+        # Emails table of the versions without the timestamp column
+        with sqlite3.connect(self.path) as conn:
+            conn.execute("CREATE TABLE Emails (id TEXT PRIMARY KEY, filepath TEXT, filename TEXT, subject TEXT, "
+                         "body TEXT)")
+            conn.execute("CREATE TABLE Timestamp(id INTEGER PRIMARY KEY, timestamp REAL UNIQUE NOT NULL)")
+            conn.execute("CREATE TABLE Email_Timestamp(email_id TEXT, timestamp_id INTEGER)")
+            conn.execute("INSERT INTO Emails (id) VALUES ('1'), ('2')")
+            conn.execute("INSERT INTO Timestamp VALUES (1, 1551690000.0)")
+            conn.execute("INSERT INTO Email_Timestamp VALUES ('1', 1)")
+        conn.close()
+        EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        self.assertEqual(self.connections.reader().execute("SELECT id, timestamp FROM Emails ORDER BY id").fetchall(),
+                         [('1', 1551690000), ('2', None)])
+
+
+if __name__ == '__main__':
+    unittest.main()
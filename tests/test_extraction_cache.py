@@ -0,0 +1,38 @@
+import os
+import tempfile
+import unittest
+from utils.extraction_cache import ExtractionCache
+
+
+class TestExtractionCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'cache.db')
+        self.cache = ExtractionCache(path=self.path, max_bytes=100)
+
+    def tearDown(self):
+        self.cache.close()
+
+    def test_lookup(self):
+        self.assertEqual(self.cache.lookup('digest'), (False, None))
+        self.cache.store('digest', 'text')
+        self.cache.store('empty', None)
+        self.assertEqual(self.cache.lookup('digest'), (True, 'text'))
+        self.assertEqual(self.cache.lookup('empty'), (True, None))
+        self.assertEqual(self.cache.stats()['hit_rate'], 2 / 3)
+
+    def test_eviction(self):
+        self.cache.store('old', 'x' * 60)
+        self.cache.store('new', 'y' * 60)
+        self.assertFalse(self.cache.lookup('old')[0])
+        self.assertTrue(self.cache.lookup('new')[0])
+
+    def test_version(self):
+        self.cache.store('digest', 'text')
+        other_version = ExtractionCache(path=self.path, version=self.cache.version + 1)
+        self.assertFalse(other_version.lookup('digest')[0])
+        other_version.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
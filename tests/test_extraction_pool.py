@@ -0,0 +1,125 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from config.extraction_constants import ExtractionConstants
+from utils.backend_registry import backends
+from utils.extraction_pool import ExtractionPool
+from utils.office_converter import OfficeConverter
+from tests.test_office_converter import FAKE_SOFFICE
+
+
+class _FakeExtractor:
+    """Behaves according to the content of the file, the workers are forked with the patch applied."""
+
+    def __init__(self, file_path):
+        with open(file_path) as f:
+            self.command = f.read()
+        self.file_path = file_path
+        self.file_mime_type = 'text/plain'
+        self.page_count = None
+
+    def extract_text(self):
+        if self.command == 'sleep':
+            time.sleep(30)
+        elif self.command == 'spawn':
+            child = subprocess.Popen(['sleep', '30'])
+            with open(f"{self.file_path}.pid", 'w') as f:
+                f.write(str(child.pid))
+            time.sleep(30)
+        elif self.command == 'crash':
+            os._exit(3)
+        elif self.command == 'error':
+            raise ValueError('broken file')
+        elif self.command == 'memory':
+            raise MemoryError()
+        return f"text of {self.command}"
+
+
+def _is_running(pid: str) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(') ')[1][0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+class TestExtractionPool(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch('utils.extraction_pool.FileContentExtractor', _FakeExtractor)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.directory = tempfile.mkdtemp()
+        self.pool = ExtractionPool(size=1, timeout=2, memory_limit=None, jobs_per_worker=3, start_method='fork')
+        self.addCleanup(self.pool.shutdown)
+
+    def _file(self, command: str) -> str:
+        path = os.path.join(self.directory, command)
+        with open(path, 'w') as f:
+            f.write(command)
+        return path
+
+    def test_ok(self):
+        result = self.pool.extract(self._file('document'))
+        self.assertEqual(result.status, ExtractionConstants.STATUS_OK)
+        self.assertEqual(result.text, 'text of document')
+
+    def test_failures_are_typed(self):
+        self.assertEqual(self.pool.extract(self._file('error')).status, ExtractionConstants.STATUS_ERROR)
+        self.assertEqual(self.pool.extract(self._file('memory')).status, ExtractionConstants.STATUS_MEMORY_LIMIT)
+        crashed = self.pool.extract(self._file('crash'))
+        self.assertEqual(crashed.status, ExtractionConstants.STATUS_CRASHED)
+        self.assertIn('3', crashed.error)
+        # The pool replaced the dead workers
+        self.assertEqual(self.pool.extract(self._file('document')).status, ExtractionConstants.STATUS_OK)
+
+    def test_timeout(self):
+        start = time.monotonic()
+        self.assertEqual(self.pool.extract(self._file('sleep')).status, ExtractionConstants.STATUS_TIMEOUT)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(self.pool.extract(self._file('document')).text, 'text of document')
+
+    def test_timeout_kills_the_processes_of_the_worker(self):
+        path = self._file('spawn')
+        self.assertEqual(self.pool.extract(path).status, ExtractionConstants.STATUS_TIMEOUT)
+        with open(f"{path}.pid") as f:
+            pid = f.read()
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and _is_running(pid):
+            time.sleep(0.05)
+        self.assertFalse(_is_running(pid))
+
+    def test_legacy_office_documents_are_converted_together(self):
+        calls = os.path.join(self.directory, 'calls')
+        binary = os.path.join(self.directory, 'soffice')
+        with open(binary, 'w') as f:
+            f.write(FAKE_SOFFICE.format(python=sys.executable, calls=calls))
+        os.chmod(binary, 0o755)
+        converter = OfficeConverter(binary=binary, batch_window=30)
+        self.addCleanup(converter.close)
+        pool = ExtractionPool(size=2, timeout=10, memory_limit=None, start_method='fork', office_converter=converter)
+        self.addCleanup(pool.shutdown)
+        paths = [self._file('letter.doc'), self._file('document'), self._file('broken.doc'), self._file('memo.doc')]
+        detect_mime = backends.detect_mime
+        with mock.patch.object(backends, 'detect_mime', lambda file_path: 'application/msword'
+                               if file_path.endswith('.doc') else detect_mime(file_path=file_path)):
+            results = pool.extract_many(paths)
+        self.assertEqual([result.text for result in results],
+                         ['text of docx:letter.doc', 'text of document', None, 'text of docx:memo.doc'])
+        self.assertEqual(results[0].mime_type, 'application/msword')
+        self.assertEqual(results[2].status, ExtractionConstants.STATUS_ERROR)
+        with open(calls) as f:
+            self.assertEqual(len(f.readlines()), 1)
+
+    def test_workers_are_recycled(self):
+        for _ in range(7):
+            self.assertEqual(self.pool.extract(self._file('document')).status, ExtractionConstants.STATUS_OK)
+
+
+if __name__ == '__main__':
+    unittest.main()
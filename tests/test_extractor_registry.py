@@ -0,0 +1,35 @@
+import unittest
+
+from utils.extractor_registry import ExtractorRegistry, extractors
+from utils.file_content_extractor import FileContentExtractor
+
+
+class TestExtractorRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ExtractorRegistry()
+
+    def test_lookup(self):
+        exact = self.registry.register('image/png')(lambda extractor: 'png')
+        pattern = self.registry.register('image/*')(lambda extractor: 'image')
+        self.assertIs(self.registry.lookup('image/png'), exact)
+        self.assertIs(self.registry.lookup('image/gif'), pattern)
+        self.assertIsNone(self.registry.lookup('video/mp4'))
+
+    def test_stats(self):
+        self.registry.record('text/plain', bytes_in=100, chars_out=90, seconds=0.5)
+        self.registry.record('text/plain', bytes_in=50, chars_out=0, seconds=0.25, failed=True)
+        self.assertEqual(self.registry.stats(), {'text/plain': {'files': 2, 'failures': 1, 'bytes_in': 150,
+                                                                'chars_out': 90, 'seconds': 0.75}})
+        self.registry.reset_stats()
+        self.assertEqual(self.registry.stats(), {})
+
+    def test_file_content_extractor_records_extractions(self):
+        extractors.reset_stats()
+        self.assertEqual(FileContentExtractor(content=b'plain text\n').extract_text(), 'plain text\n')
+        stats = extractors.stats()['text/plain']
+        self.assertEqual((stats['files'], stats['bytes_in'], stats['chars_out']), (1, 11, 11))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from utils.html_to_text import HtmlToText
+
+HTML = """<html><head><title>Newsletter</title><style>p {color: red}</style></head><body>
+<div style="display: none">Preheader</div>
+<p>Hello&nbsp;<b>world</b>,</p><p>second   paragraph</p>
+<table><tr><td>a</td><td>b</td></tr></table>
+<ul><li>one<li>two</ul><img src="https://tracker.example.com/pixel.gif">
+<script>var x = 1;</script>
+</body></html>"""
+
+
+class TestHtmlToText(unittest.TestCase):
+
+    def test_convert(self):
+        self.assertEqual(HtmlToText().convert(HTML), "Hello world,\nsecond paragraph\na\tb\n- one\n- two")
+
+    def test_streaming(self):
+        converter = HtmlToText()
+        for i in range(0, len(HTML), 5):
+            converter.feed(HTML[i:i + 5])
+        self.assertEqual(converter.close(), HtmlToText().convert(HTML))
+
+    def test_hidden_element_with_unclosed_child(self):
+        converter = HtmlToText()
+        self.assertEqual(converter.convert('<div style="display:none">Preheader<p>teaser</div><p>Real content</p>'),
+                         'Real content')
+        self.assertEqual(converter.convert('<table><tr><td style="display:none"><span>x</td><td>Invoice 42</td>'
+                                           '</tr></table>'), 'Invoice 42')
+        self.assertEqual(converter.convert('<div hidden>Preheader</span></div>Body'), 'Body')
+
+    def test_empty(self):
+        self.assertEqual(HtmlToText().convert(''), '')
+
+
+if __name__ == '__main__':
+    unittest.main()
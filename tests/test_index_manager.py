@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+from config.db_constants import DBConstants
+from database.connection_manager import ConnectionManager
+from database.email_database import EmailDatabase
+from database.query_log import QueryLog
+
+
+class TestIndexManager(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.connections = ConnectionManager(db_name=os.path.join(self.directory, 'test.db'),
+                                             profile=DBConstants.BULK_LOAD_PROFILE)
+        self.db = EmailDatabase(db_name=self.connections.db_name, connection_manager=self.connections)
+        self.query = ("SELECT DISTINCT e.id FROM EmailAddresses ead JOIN Email_Participants ep ON ead.id = "
+                      "ep.email_address_id JOIN Emails e ON e.id = ep.email_id WHERE ead.email_address = ?")
+
+    def tearDown(self):
+        self.connections.close()
+
+    def test_deferred_during_bulk_load(self):
+        self.assertEqual(self.db.indexes.missing_indexes(), list(DBConstants.SECONDARY_INDEXES))
+        with self.db.bulk_load():
+            self.db.insert_email('id', 'path', 'name', 'subject', 'body')
+            self.assertTrue(self.db.indexes.missing_indexes())
+        self.assertEqual(self.db.indexes.missing_indexes(), [])
+
+    def test_advise(self):
+        with self.connections.writer() as conn:
+            conn.executemany("INSERT INTO Emails (id) VALUES (?)", [(str(i),) for i in range(1000)])
+            conn.executemany("INSERT INTO EmailAddresses (email_address) VALUES (?)",
+                             [(f'{i}@example.com',) for i in range(100)])
+            conn.executemany("INSERT INTO Email_Participants VALUES (?, ?, 'from')",
+                             [(str(i), i % 100 + 1) for i in range(1000)])
+        advice = self.db.indexes.advise([(self.query, ['a@example.com']), (self.query, ['b@example.com'])])
+        self.assertEqual(len(advice), 1)
+        self.assertEqual(advice[0]['index'], 'idx_email_participants_address')
+        self.db.indexes.create_indexes()
+        self.assertEqual(self.db.indexes.advise([(self.query, ['a@example.com'])]), [])
+
+    def test_query_log(self):
+        log = QueryLog(path=os.path.join(self.directory, 'logs', 'queries.jsonl'), max_bytes=300)
+        for i in range(3):
+            log.append(self.query, [f'{i}@example.com'])
+        self.assertTrue(os.path.exists(log.path + '.1'))
+        self.assertEqual([params for _, params in log.read()], [['0@example.com'], ['1@example.com'],
+                                                                ['2@example.com']])
+
+
+if __name__ == '__main__':
+    unittest.main()
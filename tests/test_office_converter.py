@@ -0,0 +1,88 @@
+import os
+import stat
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.office_converter import OfficeConverter
+
+# Stands in for LibreOffice: writes <name>.<target> in the output directory for each input file, except the
+# files containing 'broken', and counts its invocations
+FAKE_SOFFICE = """#!{python}
+import os, sys
+args = sys.argv[1:]
+target = args[args.index('--convert-to') + 1]
+outdir = args[args.index('--outdir') + 1]
+assert any(arg.startswith('-env:UserInstallation=file://') for arg in args)
+os.makedirs(outdir, exist_ok=True)
+with open({calls!r}, 'a') as f:
+    f.write('call\\n')
+for path in args[args.index('--outdir') + 2:]:
+    with open(path, 'rb') as f:
+        data = f.read()
+    if b'broken' in data:
+        continue
+    name = os.path.splitext(os.path.basename(path))[0]
+    with open(os.path.join(outdir, name + '.' + target), 'wb') as f:
+        f.write(target.encode() + b':' + data)
+"""
+
+
+class TestOfficeConverter(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.calls = os.path.join(directory, 'calls')
+        binary = os.path.join(directory, 'soffice')
+        with open(binary, 'w') as f:
+            f.write(FAKE_SOFFICE.format(python=sys.executable, calls=self.calls))
+        os.chmod(binary, os.stat(binary).st_mode | stat.S_IEXEC)
+        self.converter = OfficeConverter(binary=binary, batch_window=0.5)
+        self.addCleanup(self.converter.close)
+
+    def _invocations(self) -> int:
+        with open(self.calls) as f:
+            return len(f.readlines())
+
+    def test_convert(self):
+        self.assertEqual(self.converter.convert('application/msword', content=b'document'), b'docx:document')
+
+    def test_conversions_are_batched(self):
+        futures = [self.converter.submit('application/msword', content=f'document {i}'.encode()) for i in range(5)]
+        results = [future.result() for future in futures]
+        self.assertEqual(results, [f'docx:document {i}'.encode() for i in range(5)])
+        self.assertEqual(self._invocations(), 1)
+
+    def test_submit_many_does_not_wait_for_the_batch_window(self):
+        converter = OfficeConverter(binary=self.converter.binary, batch_window=30)
+        self.addCleanup(converter.close)
+        started = time.monotonic()
+        futures = converter.submit_many([('application/msword', None, f'document {i}'.encode()) for i in range(3)])
+        self.assertEqual([future.result() for future in futures], [f'docx:document {i}'.encode() for i in range(3)])
+        self.assertEqual(converter.convert('application/msword', content=b'alone'), b'docx:alone')
+        self.assertLess(time.monotonic() - started, 30)
+        self.assertEqual(self._invocations(), 2)
+
+    def test_batch_groups_targets(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            document = executor.submit(self.converter.convert, 'application/msword', content=b'text')
+            sheet = executor.submit(self.converter.convert, 'application/vnd.ms-excel', content=b'cells')
+            self.assertEqual(document.result(), b'docx:text')
+            self.assertEqual(sheet.result(), b'xlsx:cells')
+
+    def test_failed_conversion(self):
+        broken = self.converter.submit('application/msword', content=b'broken')
+        fine = self.converter.submit('application/msword', content=b'fine')
+        with self.assertRaises(FileNotFoundError):
+            broken.result()
+        self.assertEqual(fine.result(), b'docx:fine')
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            self.converter.submit('application/pdf', content=b'%PDF')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import pickle
+import unittest
+from datetime import datetime, timezone
+from parser.parsed_email import ParsedEmail
+from config.email_constants import *
+
+
+class TestParsedEmail(unittest.TestCase):
+
+    def setUp(self):
+        self.email = ParsedEmail(
+            email_id='abc',
+            subject='Hello',
+            date=datetime(2019, 3, 4, 10, 0, 0, tzinfo=timezone.utc),
+            from_=ParsedEmail.pairs(['bob'], ['bob@example.com']),
+            to=ParsedEmail.pairs(['alice', ''], ['alice@example.com', 'carol@example.com']),
+            body='Body',
+        )
+
+    def test_dict_view(self):
+        self.assertEqual(self.email[EMAIL_ID], 'abc')
+        self.assertEqual(self.email[FROM_NAME], ['bob'])
+        self.assertEqual(self.email[TO_ADDRESSES], ['alice@example.com', 'carol@example.com'])
+        self.assertEqual(self.email[CC_NAMES], [])
+        self.assertEqual(self.email[ATTACHMENTS], [])
+        self.assertEqual(len(self.email.as_dict()), 17)
+
+    def test_derived_dates(self):
+        self.assertEqual(self.email[DATE_STR], '2019-03-04 10:00:00')
+        self.assertEqual(self.email[DATE_ISO], '2019-03-04T10:00:00+00:00')
+        self.assertEqual(self.email[TIMESTAMP], 1551693600.0)
+
+    def test_missing_date(self):
+        email = ParsedEmail(email_id='abc', subject=None, date=None)
+        self.assertIsNone(email[DATE_STR])
+        self.assertIsNone(email[TIMESTAMP])
+
+    def test_unknown_key(self):
+        with self.assertRaises(KeyError):
+            self.email['unknown']
+
+    def test_pickle_roundtrip(self):
+        restored = pickle.loads(pickle.dumps(self.email))
+        self.assertEqual(restored.as_dict(), self.email.as_dict())
+        self.assertLess(len(pickle.dumps(self.email)), len(pickle.dumps(self.email.as_dict())))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+from utils.pdf_extractor import PdfExtractor
+
+try:
+    import pymupdf as fitz
+except ImportError:
+    try:
+        import fitz
+    except ImportError:
+        fitz = None
+
+
+@unittest.skipIf(fitz is None, "PyMuPDF is not installed")
+class TestPdfExtractor(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.path = os.path.join(tempfile.mkdtemp(), 'document.pdf')
+        doc = fitz.open()
+        for number in range(12):
+            page = doc.new_page()
+            page.insert_text((72, 72), f"Page number {number}")
+        doc.save(cls.path)
+        doc.close()
+
+    def test_extract(self):
+        pdf = PdfExtractor().extract(file_path=self.path)
+        self.assertEqual(pdf.page_count, 12)
+        self.assertFalse(pdf.truncated)
+        self.assertIn('Page number 0', pdf.text)
+        self.assertIn('Page number 11', pdf.text)
+        self.assertLess(pdf.text.index('Page number 2'), pdf.text.index('Page number 10'))
+
+    def test_content(self):
+        with open(self.path, 'rb') as f:
+            pdf = PdfExtractor().extract(content=f.read())
+        self.assertIn('Page number 5', pdf.text)
+
+    def test_page_budget(self):
+        pdf = PdfExtractor(max_pages=3).extract(file_path=self.path)
+        self.assertTrue(pdf.truncated)
+        self.assertIn('Page number 2', pdf.text)
+        self.assertNotIn('Page number 3', pdf.text)
+
+    def test_char_budget(self):
+        pdf = PdfExtractor(max_chars=20).extract(file_path=self.path)
+        self.assertTrue(pdf.truncated)
+        self.assertEqual(len(pdf.text), 20)
+
+    def test_text_filling_the_budget_is_not_truncated(self):
+        text = PdfExtractor().extract(file_path=self.path).text
+        pdf = PdfExtractor(max_chars=len(text)).extract(file_path=self.path)
+        self.assertFalse(pdf.truncated)
+        self.assertEqual(pdf.text, text)
+
+    def test_ranges_are_cancelled_once_the_budget_is_exhausted(self):
+        futures = []
+
+        class RecordingExecutor(ProcessPoolExecutor):
+            def submit(self, *args, **kwargs):
+                futures.append(super().submit(*args, **kwargs))
+                return futures[-1]
+
+        with mock.patch('utils.pdf_extractor.ProcessPoolExecutor', RecordingExecutor):
+            pdf = PdfExtractor(max_chars=20, parallel_page_threshold=4, page_range_size=1,
+                               max_workers=2).extract(file_path=self.path)
+        self.assertTrue(pdf.truncated)
+        self.assertEqual(len(pdf.text), 20)
+        self.assertEqual(len(futures), 12)
+        self.assertTrue(any(future.cancelled() for future in futures))
+
+    def test_parallel_ranges_keep_page_order(self):
+        sequential = PdfExtractor(max_workers=1).extract(file_path=self.path)
+        parallel = PdfExtractor(parallel_page_threshold=4, page_range_size=5, max_workers=2).extract(file_path=self.path)
+        self.assertEqual(parallel.text, sequential.text)
+        self.assertEqual(parallel.page_count, 12)
+
+    def test_invalid_pdf(self):
+        with self.assertRaises(ValueError):
+            PdfExtractor().extract(content=b'not a pdf')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+from utils.reply_stripper import ReplyStripper
+
+
+class TestReplyStripper(unittest.TestCase):
+
+    def setUp(self):
+        self.stripper = ReplyStripper()
+
+    def test_reply_header_english(self):
+        body = "Sounds good.\n\nOn Mon, 4 Mar 2019 at 10:00, Bob <bob@example.com> wrote:\n> Shall we meet?\n"
+        self.assertEqual(self.stripper.strip(body), "Sounds good.")
+
+    def test_reply_header_wrapped_french(self):
+        body = "D'accord.\n\nLe lun. 4 mars 2019 à 10:00, Bob <bob@example.com>\na écrit :\n> On se voit ?"
+        self.assertEqual(self.stripper.strip(body), "D'accord.")
+
+    def test_reply_header_dutch(self):
+        body = "Prima.\n\nOp 4 mrt. 2019 om 10:00 schreef Bob <bob@example.com>:\n> Zullen we afspreken?"
+        self.assertEqual(self.stripper.strip(body), "Prima.")
+
+    def test_outlook_header(self):
+        body = "See below.\n\nFrom: Bob\nSent: Monday, March 4, 2019 10:00\nTo: Alice\nSubject: Meeting\n\nHello"
+        self.assertEqual(self.stripper.strip(body), "See below.")
+
+    def test_inline_answers_are_kept(self):
+        body = "> Question one?\nAnswer one.\n> Question two?\nAnswer two."
+        self.assertEqual(self.stripper.strip(body), "Answer one.\nAnswer two.")
+
+    def test_signature_and_footer(self):
+        body = ("Hello,\n\nThe report is attached.\n\nThis email and any attachments are confidential and intended "
+                "solely for the addressee.")
+        self.assertEqual(self.stripper.strip(body), "Hello,\n\nThe report is attached.")
+        self.assertEqual(self.stripper.strip("Thanks\n-- \nBob\n+32 2 123 45 67"), "Thanks")
+
+    def test_repeated_blocks(self):
+        signature = "Bob Builder\nProject manager, Example Corp"
+        for i in range(3):
+            self.stripper.strip(f"Message {i}\n\n{signature}", sender='bob@example.com')
+        self.assertEqual(self.stripper.strip(f"Last message\n\n{signature}", sender='bob@example.com'), "Last message")
+        self.assertEqual(self.stripper.strip(f"Last message\n\n{signature}", sender='eve@example.com'),
+                         f"Last message\n\n{signature}")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import tempfile
+import unittest
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.email_database import EmailDatabase
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+        self.db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        self.db.insert_email('1', 'path', 'name', 'Réunion de l\'été', 'Le café est prêt\n> près de la gare',
+                             new_body='Le café est prêt')
+        self.db.insert_email('2', 'path', 'name', 'Vergadering', 'De koffie staat klaar bij het station')
+        self.db.insert_attachment('a', 'offerte.pdf', 'Offerte voor de levering van koffie')
+        self.db.link('Email_Attachments', 'email_id', 'attachment_id', '2', 'a')
+
+    def tearDown(self):
+        self.connections.close()
+
+    def search(self, word: str, localization: str) -> list:
+        retriever = DatabaseRetriever(db_name=self.path, words=[word], words_localization=[localization])
+        retriever.join().where()
+        return sorted(row[0] for row in retriever.execute())
+
+    def test_diacritics_are_folded(self):
+        self.assertTrue(self.db.search_index.available)
+        self.assertEqual(self.search('ete', 'subject'), ['1'])
+        self.assertEqual(self.search('CAFÉ', 'body'), ['1'])
+
+    def test_body_and_full_body(self):
+        self.assertEqual(self.search('gare', 'body'), [])
+        self.assertEqual(self.search('gare', 'full_body'), ['1'])
+
+    def test_prefix_phrase_and_near(self):
+        self.assertEqual(self.search('koff*', 'body'), ['2'])
+        self.assertEqual(self.search('staat klaar', 'body'), ['2'])
+        self.assertEqual(self.search('klaar staat', 'body'), [])
+        self.assertEqual(self.search('NEAR(koffie station, 4)', 'body'), ['2'])
+        self.assertEqual(self.search('NEAR(koffie station, 1)', 'body'), [])
+
+    def test_attachments(self):
+        self.assertEqual(self.search('levering', 'attachment'), ['2'])
+        self.assertEqual(self.search('offerte', 'attachment_name'), ['2'])
+
+    def test_existing_database_is_indexed(self):
+        self.db.search_index.rebuild()
+        self.assertEqual(self.search("l'ete", 'subject'), ['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
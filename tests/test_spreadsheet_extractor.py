@@ -0,0 +1,93 @@
+import io
+import unittest
+import zipfile
+
+from utils.spreadsheet_extractor import SpreadsheetExtractor
+
+ODS_CONTENT = """<?xml version="1.0" encoding="UTF-8"?>
+<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+    xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+    xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0">
+  <office:body><office:spreadsheet><table:table table:name="Sheet1">
+    <table:table-row>
+      <table:table-cell><text:p>Name</text:p></table:table-cell>
+      <table:table-cell><text:p>Amount</text:p></table:table-cell>
+      <table:table-cell table:number-columns-repeated="16382"/>
+    </table:table-row>
+    <table:table-row>
+      <table:table-cell><text:p>Alice</text:p></table:table-cell>
+      <table:table-cell/>
+      <table:table-cell><text:p>12</text:p></table:table-cell>
+    </table:table-row>
+    <table:table-row table:number-rows-repeated="1048570"><table:table-cell table:number-columns-repeated="16384"/></table:table-row>
+    <table:table-row table:number-rows-repeated="2">
+      <table:table-cell table:number-columns-repeated="2"><text:p>x</text:p></table:table-cell>
+    </table:table-row>
+  </table:table></office:spreadsheet></office:body>
+</office:document-content>
+"""
+
+
+def make_ods(content: str = ODS_CONTENT) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr('mimetype', 'application/vnd.oasis.opendocument.spreadsheet')
+        archive.writestr('content.xml', content)
+    return buffer.getvalue()
+
+
+def make_padded_ods(rows: int) -> bytes:
+    # One column, each row padded to the width of the sheet as LibreOffice saves it
+    row = ('<table:table-row><table:table-cell><text:p>{}</text:p></table:table-cell>'
+           '<table:table-cell table:number-columns-repeated="16383"/></table:table-row>')
+    start, end = ODS_CONTENT.index('<table:table-row>'), ODS_CONTENT.index('</table:table>')
+    return make_ods(ODS_CONTENT[:start] + ''.join(row.format(i) for i in range(rows)) + ODS_CONTENT[end:])
+
+
+def make_xlsx(rows: int) -> bytes:
+    from openpyxl import Workbook
+    workbook = Workbook()
+    sheet = workbook.active
+    for i in range(rows):
+        sheet.append([f'row {i}', i, None])
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+class TestSpreadsheetExtractor(unittest.TestCase):
+
+    def test_ods(self):
+        text = SpreadsheetExtractor().extract_ods(content=make_ods())
+        self.assertEqual(text, 'Name\tAmount\nAlice\t\t12\nx\tx\nx\tx\n')
+
+    def test_ods_row_budget(self):
+        text = SpreadsheetExtractor(max_rows=2).extract_ods(content=make_ods())
+        self.assertEqual(text, 'Name\tAmount\nAlice\t\t12\n')
+
+    def test_padding_is_not_counted_in_the_cell_budget(self):
+        extractor = SpreadsheetExtractor()
+        text = extractor.extract_ods(content=make_padded_ods(20000))
+        self.assertEqual(text.count('\n'), 20000)
+        self.assertTrue(text.endswith('19999\n'))
+        text = SpreadsheetExtractor(max_cells=3).extract_ods(content=make_padded_ods(5))
+        self.assertEqual(text, '0\n1\n2\n')
+
+    def test_xlsx(self):
+        try:
+            content = make_xlsx(3)
+        except ImportError:
+            self.skipTest("openpyxl is not installed")
+        self.assertEqual(SpreadsheetExtractor().extract_xlsx(content=content), 'row 0\t0\nrow 1\t1\nrow 2\t2\n')
+
+    def test_xlsx_budgets(self):
+        try:
+            content = make_xlsx(100)
+        except ImportError:
+            self.skipTest("openpyxl is not installed")
+        self.assertEqual(SpreadsheetExtractor(max_rows=5).extract_xlsx(content=content).count('\n'), 5)
+        self.assertEqual(len(SpreadsheetExtractor(max_chars=30).extract_xlsx(content=content)), 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
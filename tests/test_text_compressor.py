@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from config.email_constants import BODY, NEW_BODY, ATTACHMENTS, ATTACHMENT_EXTRACTED_TEXT
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.email_database import EmailDatabase
+
+SIGNATURE = ("\n\nMet vriendelijke groeten,\nJan Peeters\nAankoopdienst - Client NV\nKerkstraat 12, 9000 Gent\n"
+             "Dit bericht is vertrouwelijk en uitsluitend bestemd voor de geadresseerde.\n")
+
+
+class TestTextCompressor(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+        self.db = EmailDatabase(db_name=self.path, connection_manager=self.connections, compression=True)
+        self.bodies = {str(i): f"Bestelling PO-{i:05d} is verzonden." + SIGNATURE for i in range(20)}
+        for email_id, body in self.bodies.items():
+            self.db.insert_email(email_id, 'path', 'name', 'Levering', body, new_body=body[:35])
+        self.db.insert_attachment('a', 'offerte.pdf', 'Offerte voor de levering van koffie. ' * 10)
+        self.db.link('Email_Attachments', 'email_id', 'attachment_id', '3', 'a')
+
+    def tearDown(self):
+        self.connections.close()
+
+    def stored_body(self, email_id: str):
+        return self.connections.reader().execute("SELECT body FROM Emails WHERE id = ?", (email_id,)).fetchone()[0]
+
+    def test_texts_are_stored_compressed(self):
+        stored = self.stored_body('1')
+        self.assertIsInstance(stored, bytes)
+        self.assertLess(len(stored), len(self.bodies['1'].encode()))
+        # Too short to be compressed
+        self.assertIsInstance(self.connections.reader().execute(
+            "SELECT new_body FROM Emails WHERE id = '1'").fetchone()[0], str)
+
+    def test_hydrate(self):
+        retriever = DatabaseRetriever(db_name=self.path)
+        emails = retriever.hydrate(['3', '1'])
+        self.assertEqual([email[BODY] for email in emails], [self.bodies['3'], self.bodies['1']])
+        self.assertEqual(emails[1][NEW_BODY], self.bodies['1'][:35])
+        self.assertEqual(emails[0][ATTACHMENTS][0][ATTACHMENT_EXTRACTED_TEXT],
+                         'Offerte voor de levering van koffie. ' * 10)
+
+    def test_searches_read_compressed_texts(self):
+        for full_text in (True, False):
+            retriever = DatabaseRetriever(db_name=self.path, words=['geadresseerde'], words_localization=['full_body'])
+            retriever.full_text = full_text
+            retriever.join().where()
+            self.assertEqual(len(retriever.execute()), 20)
+        self.db.search_index.rebuild()
+        retriever = DatabaseRetriever(db_name=self.path, words=['koffie'], words_localization=['attachment'])
+        retriever.join().where()
+        self.assertEqual(retriever.execute(), [('3',)])
+
+    def test_train_and_recompress(self):
+        size = len(self.stored_body('1'))
+        dictionary_id = self.db.compressor.train()
+        self.assertEqual(dictionary_id, 1)
+        self.assertGreater(self.db.compressor.recompress(), 0)
+        stored = self.stored_body('1')
+        self.assertEqual(int.from_bytes(stored[:2], 'big'), dictionary_id)
+        self.assertLess(len(stored), size / 2)
+        self.assertEqual(self.db.compressor.decompress(stored), self.bodies['1'])
+
+        self.db.compressor.enabled = False
+        self.db.compressor.recompress()
+        self.assertEqual(self.stored_body('1'), self.bodies['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from config.db_constants import DBConstants
+from database.connection_manager import ConnectionManager
+from database.database_retriever import DatabaseRetriever
+from database.email_database import EmailDatabase
+
+
+class TestTrigramIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'test.db')
+        self.connections = ConnectionManager(db_name=self.path)
+        self.db = EmailDatabase(db_name=self.path, connection_manager=self.connections)
+        for email_id, subject, address, filename in [('1', 'Order PO-2019-00042', 'bob@client.be', 'invoice42.pdf'),
+                                                     ('2', 'Meeting', 'alice@example.com', 'agenda.docx')]:
+            self.db.insert_email(email_id, 'path', 'name', subject, 'body')
+            address_id = self.db.insert_email_address(address, return_existing_id=True)
+            self.db.link_participants(email_id, [address_id], DBConstants.FROM_ROLE)
+            self.db.insert_attachment(f'a{email_id}', filename, None)
+            self.db.link('Email_Attachments', 'email_id', 'attachment_id', email_id, f'a{email_id}')
+
+    def tearDown(self):
+        self.connections.close()
+
+    def search(self, word: str, localization: str) -> tuple[list, str]:
+        retriever = DatabaseRetriever(db_name=self.path, words=[word], words_localization=[localization])
+        retriever.join().where()
+        return sorted(row[0] for row in retriever.execute()), retriever.show_query()
+
+    def test_substring_search(self):
+        self.assertEqual(self.db.trigram_index.tables, set(DBConstants.TRIGRAM_INDEXES))
+        ids, query = self.search('CLIENT.B', 'address')
+        self.assertEqual(ids, ['1'])
+        self.assertIn(DBConstants.EMAIL_ADDRESSES_TRIGRAM_TABLE, query)
+        self.assertEqual(self.search('voice4', 'attachment_name')[0], ['1'])
+        self.assertEqual(self.search('00042', 'subject')[0], ['1'])
+
+    def test_short_words_fall_back_to_like(self):
+        ids, query = self.search('ex', 'address')
+        self.assertEqual(ids, ['2'])
+        self.assertNotIn(DBConstants.EMAIL_ADDRESSES_TRIGRAM_TABLE, query)
+
+    def test_rebuild(self):
+        self.db.trigram_index.rebuild()
+        self.assertEqual(self.search('agend', 'attachment_name')[0], ['2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,349 @@
+import bz2
+import gzip
+import lzma
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import zipfile
+from io import BytesIO
+from typing import Iterator, NamedTuple, Optional
+
+from config.file_constants import ArchiveConstants
+from utils.backend_registry import backends
+from utils.logging_setup import log_file_content_extractor
+from .iarchive_reader import IArchiveReader
+
+
+class ArchiveLimitError(ValueError):
+    pass
+
+
+class ArchiveMember(NamedTuple):
+    name: str
+    data: bytes
+    mime_type: str
+
+
+class ArchiveReader(IArchiveReader):
+    """
+    Reads zip, tar, gzip, bzip2, xz and 7z archives in memory, member by member, and opens nested archives.
+
+    Members are read in chunks and their real size is counted, the sizes declared in the archive only let
+    members be skipped early. The 7z members are counted while py7zr writes them. Members bigger than
+    max_member_size are skipped and archives nested deeper than max_depth are not opened. Reading stops with
+    ArchiveLimitError when there are more than max_members members, more than max_total_size expanded bytes
+    or an expansion ratio above max_expansion_ratio. Other formats (rar) are extracted by patool to a
+    temporary directory, in a child process whose files cannot exceed the remaining budget and which is
+    killed once the directory holds more members or bytes than the limits allow.
+    """
+
+    def __init__(self, max_depth: int = ArchiveConstants.MAX_DEPTH, max_members: int = ArchiveConstants.MAX_MEMBERS,
+                 max_member_size: int = ArchiveConstants.MAX_MEMBER_SIZE,
+                 max_total_size: int = ArchiveConstants.MAX_TOTAL_SIZE,
+                 max_expansion_ratio: float = ArchiveConstants.MAX_EXPANSION_RATIO):
+        self.max_depth = max_depth
+        self.max_members = max_members
+        self.max_member_size = max_member_size
+        self.max_total_size = max_total_size
+        self.max_expansion_ratio = max_expansion_ratio
+
+    def is_archive(self, mime_type: str) -> bool:
+        return (mime_type in ArchiveConstants.ZIP_MIME_TYPES or mime_type in ArchiveConstants.TAR_MIME_TYPES
+                or mime_type in ArchiveConstants.COMPRESSED_MIME_TYPES
+                or mime_type in ArchiveConstants.SEVEN_ZIP_MIME_TYPES
+                or mime_type in ArchiveConstants.PATOOL_MIME_TYPES)
+
+    def members(self, mime_type: str, file_path: str = None, content: bytes = None) -> Iterator[ArchiveMember]:
+        if not file_path and content is None:
+            raise ValueError("Either file_path or content must be provided.")
+        budget = _Budget(archive_size=os.path.getsize(file_path) if file_path else len(content))
+        yield from self._members(mime_type, file_path, content, prefix='', depth=1, budget=budget)
+
+    def _members(self, mime_type: str, file_path: Optional[str], content: Optional[bytes], prefix: str, depth: int,
+                 budget: '_Budget') -> Iterator[ArchiveMember]:
+        for name, data in self._read_archive(mime_type, file_path, content, budget):
+            name = f"{prefix}{name}"
+            member_mime = backends.detect_mime(content=data) if data else 'inode/x-empty'
+            if not self.is_archive(member_mime):
+                yield ArchiveMember(name, data, member_mime)
+            elif depth < self.max_depth:
+                yield from self._members(member_mime, None, data, prefix=f"{name}/", depth=depth + 1, budget=budget)
+            else:
+                log_file_content_extractor.warning(f"Archive {name} not opened, nested deeper than {self.max_depth}")
+
+    def _read_archive(self, mime_type: str, file_path: Optional[str], content: Optional[bytes],
+                      budget: '_Budget') -> Iterator[tuple[str, bytes]]:
+        source = file_path if file_path else BytesIO(content)
+        if mime_type in ArchiveConstants.ZIP_MIME_TYPES:
+            return self._zip_members(source, budget)
+        if mime_type in ArchiveConstants.TAR_MIME_TYPES:
+            return self._tar_members(source, budget)
+        if mime_type in ArchiveConstants.COMPRESSED_MIME_TYPES:
+            return self._compressed_members(mime_type, file_path, content, budget)
+        if mime_type in ArchiveConstants.SEVEN_ZIP_MIME_TYPES:
+            return self._seven_zip_members(source, budget)
+        return self._patool_members(file_path, content, budget)
+
+    def _zip_members(self, source, budget: '_Budget') -> Iterator[tuple[str, bytes]]:
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                budget.add_member(self.max_members)
+                if self._too_big(info.filename, info.file_size):
+                    continue
+                try:
+                    with archive.open(info) as stream:
+                        data = self._read(stream, info.filename, budget)
+                except (RuntimeError, NotImplementedError, zipfile.BadZipFile) as e:
+                    # Encrypted member or unsupported compression method
+                    log_file_content_extractor.warning(f"Archive member {info.filename} not read: {e}")
+                    continue
+                if data is not None:
+                    yield info.filename, data
+
+    def _tar_members(self, source, budget: '_Budget') -> Iterator[tuple[str, bytes]]:
+        return self._tar_archive_members(self._open_tar(source), budget)
+
+    def _open_tar(self, source) -> tarfile.TarFile:
+        if isinstance(source, str):
+            return tarfile.open(name=source, mode='r:*')
+        return tarfile.open(fileobj=source, mode='r:*')
+
+    def _tar_archive_members(self, archive: tarfile.TarFile, budget: '_Budget') -> Iterator[tuple[str, bytes]]:
+        with archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                budget.add_member(self.max_members)
+                if self._too_big(info.name, info.size):
+                    continue
+                data = self._read(archive.extractfile(info), info.name, budget)
+                if data is not None:
+                    yield info.name, data
+
+    def _compressed_members(self, mime_type: str, file_path: Optional[str], content: Optional[bytes],
+                            budget: '_Budget') -> Iterator[tuple[str, bytes]]:
+        try:
+            archive = self._open_tar(file_path if file_path else BytesIO(content))
+        except tarfile.ReadError:
+            archive = None  # Not a compressed tar archive, a single compressed file
+        if archive is not None:
+            yield from self._tar_archive_members(archive, budget)
+            return
+        opener = {'application/x-bzip2': bz2.open, 'application/x-xz': lzma.open}.get(mime_type, gzip.open)
+        name = os.path.splitext(os.path.basename(file_path))[0] if file_path else 'content'
+        budget.add_member(self.max_members)
+        with opener(file_path if file_path else BytesIO(content)) as stream:
+            data = self._read(stream, name, budget)
+        if data is not None:
+            yield name, data
+
+    def _seven_zip_members(self, source, budget: '_Budget') -> Iterator[tuple[str, bytes]]:
+        py7zr = backends.module('py7zr')
+        with py7zr.SevenZipFile(source, mode='r') as archive:
+            names = []
+            for info in archive.list():
+                if info.is_directory:
+                    continue
+                budget.add_member(self.max_members)
+                if not self._too_big(info.filename, info.uncompressed):
+                    names.append(info.filename)
+            if not names:
+                return
+            # The solid blocks are decompressed once. The writers count the bytes of the members, the other
+            # members of a block are decompressed for their checksum and capped by max_extract_size
+            archive.max_extract_size = budget.allowance(self.max_total_size, self.max_expansion_ratio)
+            factory = _MemberWriterFactory(reader=self, budget=budget)
+            bomb_error = getattr(backends.module('py7zr.exceptions'), 'DecompressionBombError', ())
+            try:
+                archive.extract(targets=names, factory=factory)
+            except bomb_error as e:
+                raise ArchiveLimitError(str(e))
+        for name in names:
+            writer = factory.writers.get(name)
+            if writer is None:
+                continue
+            if writer.size() > self.max_member_size:
+                self._too_big(name, writer.size())
+                continue
+            yield name, writer.buffer.getvalue()
+
+    def _patool_members(self, file_path: Optional[str], content: Optional[bytes],
+                        budget: '_Budget') -> Iterator[tuple[str, bytes]]:
+        temp_dir = tempfile.mkdtemp()
+        try:
+            archive_path = file_path
+            if not archive_path:
+                archive_path = os.path.join(temp_dir, 'archive')
+                with open(archive_path, 'wb') as f:
+                    f.write(content)
+            output_dir = os.path.join(temp_dir, 'members')
+            self._patool_extract(archive_path, output_dir, budget, stderr_path=os.path.join(temp_dir, 'stderr'))
+            for root, dirs, files in os.walk(output_dir):
+                for file in files:
+                    path = os.path.join(root, file)
+                    name = os.path.relpath(path, output_dir)
+                    budget.add_member(self.max_members)
+                    if self._too_big(name, os.path.getsize(path)):
+                        continue
+                    with open(path, 'rb') as stream:
+                        data = self._read(stream, name, budget)
+                    if data is not None:
+                        yield name, data
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _patool_extract(self, archive_path: str, output_dir: str, budget: '_Budget', stderr_path: str) -> None:
+        """Runs patool in its own process group, killed as soon as the output directory exceeds the limits."""
+        allowance = budget.allowance(self.max_total_size, self.max_expansion_ratio)
+        with open(stderr_path, 'wb') as stderr:
+            command = [sys.executable, '-c', _PATOOL_EXTRACT, archive_path, output_dir, str(allowance)]
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=stderr, start_new_session=True)
+        try:
+            while process.poll() is None:
+                time.sleep(ArchiveConstants.PATOOL_POLL_INTERVAL)
+                self._check_output(output_dir, budget, allowance)
+        finally:
+            if process.poll() is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                process.wait()
+        # A member written up to the file size limit stops the extractor
+        self._check_output(output_dir, budget, allowance if process.returncode == 0 else allowance - 1)
+        if process.returncode != 0:
+            with open(stderr_path, 'rb') as f:
+                error = f.read().decode(errors='replace').strip().splitlines()
+            raise backends.module('patoolib.util').PatoolError(error[-1] if error else "patool extraction failed")
+
+    def _check_output(self, output_dir: str, budget: '_Budget', allowance: int) -> None:
+        members = 0
+        size = 0
+        for root, dirs, files in os.walk(output_dir):
+            for file in files:
+                members += 1
+                try:
+                    size += os.path.getsize(os.path.join(root, file))
+                except OSError:
+                    continue
+        if budget.members + members > self.max_members:
+            raise ArchiveLimitError(f"More than {self.max_members} members")
+        if size > allowance:
+            raise ArchiveLimitError(f"More than {budget.expanded + allowance} expanded bytes")
+
+    def _too_big(self, name: str, size: int) -> bool:
+        if size > self.max_member_size:
+            log_file_content_extractor.warning(f"Archive member {name} skipped, {size} bytes")
+            return True
+        return False
+
+    def _read(self, stream, name: str, budget: '_Budget') -> Optional[bytes]:
+        """Reads a member in chunks, returns None if it is bigger than the member size limit."""
+        chunks = []
+        size = 0
+        while True:
+            chunk = stream.read(ArchiveConstants.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            budget.add_bytes(len(chunk), self.max_total_size, self.max_expansion_ratio)
+            if size > self.max_member_size:
+                self._too_big(name, size)
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+
+class _Budget:
+    """Members and expanded bytes counted over an archive and all its nested archives."""
+
+    def __init__(self, archive_size: int):
+        self.archive_size = max(archive_size, 1)
+        self.members = 0
+        self.expanded = 0
+
+    def add_member(self, max_members: int) -> None:
+        self.members += 1
+        if self.members > max_members:
+            raise ArchiveLimitError(f"More than {max_members} members")
+
+    def allowance(self, max_total_size: int, max_expansion_ratio: float) -> int:
+        """Number of bytes which can still be expanded without exceeding the limits."""
+        limit = min(max_total_size, max(ArchiveConstants.RATIO_CHECK_SIZE, self.archive_size * max_expansion_ratio))
+        return max(int(limit) - self.expanded, 0)
+
+    def add_bytes(self, size: int, max_total_size: int, max_expansion_ratio: float) -> None:
+        self.expanded += size
+        if self.expanded > max_total_size:
+            raise ArchiveLimitError(f"More than {max_total_size} expanded bytes")
+        if self.expanded > ArchiveConstants.RATIO_CHECK_SIZE \
+                and self.expanded > self.archive_size * max_expansion_ratio:
+            raise ArchiveLimitError(f"Expansion ratio above {max_expansion_ratio}")
+
+
+class _MemberWriter:
+    """py7zr output of a 7z member, counts the bytes written in the budget and drops them past the member limit."""
+
+    def __init__(self, reader: ArchiveReader, budget: _Budget):
+        self.reader = reader
+        self.budget = budget
+        self.buffer = BytesIO()
+        self.written = 0
+
+    def write(self, data: bytes) -> int:
+        self.written += len(data)
+        self.budget.add_bytes(len(data), self.reader.max_total_size, self.reader.max_expansion_ratio)
+        if self.written <= self.reader.max_member_size:
+            self.buffer.write(data)
+        elif self.buffer.tell():
+            self.buffer = BytesIO()
+        return len(data)
+
+    def read(self, size: int = None) -> bytes:
+        return self.buffer.read(size)
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.buffer.seek(offset, whence)
+
+    def flush(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return self.written
+
+    def close(self) -> None:
+        pass
+
+
+class _MemberWriterFactory:
+    """py7zr writer factory creating a _MemberWriter per extracted member."""
+
+    def __init__(self, reader: ArchiveReader, budget: _Budget):
+        self.reader = reader
+        self.budget = budget
+        self.writers = {}
+
+    def create(self, filename: str) -> _MemberWriter:
+        writer = _MemberWriter(reader=self.reader, budget=self.budget)
+        self.writers[filename] = writer
+        return writer
+
+
+# Run by a child process, the files it writes are capped to the bytes remaining in the budget
+_PATOOL_EXTRACT = """
+import resource, sys
+import patoolib
+limit = int(sys.argv[3])
+soft, hard = resource.getrlimit(resource.RLIMIT_FSIZE)
+if hard != resource.RLIM_INFINITY:
+    limit = min(limit, hard)
+resource.setrlimit(resource.RLIMIT_FSIZE, (limit, hard))
+patoolib.extract_archive(sys.argv[1], outdir=sys.argv[2], verbosity=-1, interactive=False)
+"""
@@ -0,0 +1,70 @@
+import json
+import os
+from fnmatch import fnmatchcase
+
+from config.extraction_constants import AttachmentPolicyConstants
+from .iattachment_policy import IAttachmentPolicy
+
+
+class AttachmentPolicy(IAttachmentPolicy):
+    """
+    Declarative policy deciding whether an attachment is extracted, stored only, deferred or skipped.
+
+    The policy is a dictionary with the keys of AttachmentPolicyConstants.DEFAULT_POLICY, usually loaded
+    from a JSON file with from_file. The rules are checked in order and the first one matching the MIME
+    type and size gives the action. When the extraction time budget of the email or of the run is spent,
+    the attachments which would be extracted are deferred.
+    """
+
+    def __init__(self, policy: dict = None):
+        policy = policy if policy is not None else AttachmentPolicyConstants.DEFAULT_POLICY
+        self.rules = [self._check_rule(rule) for rule in policy.get('rules', [])]
+        self.default_action = self._check_action(policy.get('default_action', AttachmentPolicyConstants.EXTRACT))
+        self.email_time_budget = policy.get('email_time_budget')
+        self.run_time_budget = policy.get('run_time_budget')
+
+    @classmethod
+    def from_file(cls, path: str = AttachmentPolicyConstants.CONFIG_PATH) -> 'AttachmentPolicy':
+        """Loads the policy from a JSON file, the default policy is used if the file does not exist."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def decide(self, mime_type: str, size: int, email_seconds: float = 0, run_seconds: float = 0) -> str:
+        mime_type = (mime_type or '').lower()
+        action = self.default_action
+        for rule in self.rules:
+            if self._matches(rule, mime_type, size):
+                action = rule['action']
+                break
+        if action == AttachmentPolicyConstants.EXTRACT and self._budget_spent(email_seconds, run_seconds):
+            return AttachmentPolicyConstants.DEFER
+        return action
+
+    def _matches(self, rule: dict, mime_type: str, size: int) -> bool:
+        if 'mime_types' in rule and not any(fnmatchcase(mime_type, pattern) for pattern in rule['mime_types']):
+            return False
+        if rule.get('min_size') is not None and size < rule['min_size']:
+            return False
+        if rule.get('max_size') is not None and size > rule['max_size']:
+            return False
+        return True
+
+    def _budget_spent(self, email_seconds: float, run_seconds: float) -> bool:
+        return (self.email_time_budget is not None and email_seconds >= self.email_time_budget) \
+            or (self.run_time_budget is not None and run_seconds >= self.run_time_budget)
+
+    def _check_rule(self, rule: dict) -> dict:
+        self._check_action(rule.get('action'))
+        unknown = set(rule) - {'mime_types', 'min_size', 'max_size', 'action'}
+        if unknown:
+            raise ValueError(f"Unknown attachment policy rule keys: {sorted(unknown)}")
+        if 'mime_types' in rule:
+            rule = dict(rule, mime_types=[pattern.lower() for pattern in rule['mime_types']])
+        return rule
+
+    def _check_action(self, action: str) -> str:
+        if action not in AttachmentPolicyConstants.ACTIONS:
+            raise ValueError(f"Unknown attachment policy action: {action}")
+        return action
@@ -0,0 +1,210 @@
+import argparse
+import gzip
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
+from config.email_parser_constants import EmailParserConstants
+from utils.logging_setup import log_email_parser_info, log_email_parser_debug
+from .iattachment_store import IAttachmentStore
+
+
+class AttachmentStore(IAttachmentStore):
+    """
+    Content-addressed attachment files, sharded by the first characters of their digest:
+    <directory>/ab/cd/<digest>.
+
+    Each directory holds a bounded number of entries, which keeps the lookups fast with millions of
+    attachments. Files are written to a temporary file in their shard and renamed, so a reader or another
+    worker never sees a partial file. The shards already created are remembered.
+
+    This is the blob store of the attachments: a content is stored once whatever the names it was sent
+    under, the database keeps its digest, size, MIME type and extension. readable_path() gives the
+    extractors a copy named with the extension. With compression='gzip' the files are stored gzipped and
+    read back through open() or readable_path().
+    """
+
+    # Files of the former layouts: <digest> followed by the extension of the attachment and/or '.gz'
+    _NAMED = re.compile(r'^([0-9a-f]{64})(\.[^/]*)?$')
+
+    def __init__(self, directory: str = EmailParserConstants.ATTACHMENTS_DIRECTORY,
+                 shard_levels: int = EmailParserConstants.ATTACHMENT_SHARD_LEVELS,
+                 shard_width: int = EmailParserConstants.ATTACHMENT_SHARD_WIDTH,
+                 compression: str = EmailParserConstants.ATTACHMENT_COMPRESSION,
+                 chunk_size: int = EmailParserConstants.ATTACHMENT_COPY_CHUNK_SIZE):
+        if compression not in (None, 'gzip'):
+            raise ValueError(f"Unsupported attachment compression: {compression}")
+        self.directory = directory
+        self.shard_levels = shard_levels
+        self.shard_width = shard_width
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self._created_directories = set()
+        self._lock = threading.Lock()
+
+    def path_for(self, digest: str) -> str:
+        name = f"{digest}.gz" if self.compression else digest
+        return os.path.join(self._shard(digest), name)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.isfile(self.path_for(digest))
+
+    def store_bytes(self, digest: str, content: bytes) -> str:
+        path = self.path_for(digest)
+        if os.path.isfile(path):
+            log_email_parser_debug.debug(f"Attachment {digest} already exists")
+            return path
+        log_email_parser_info.info(f"Download attachment {path}")
+        self._write(digest, path, io.BytesIO(content))
+        return path
+
+    def store_stream(self, digest: str, stream: BinaryIO) -> str:
+        path = self.path_for(digest)
+        if os.path.isfile(path):
+            log_email_parser_debug.debug(f"Attachment {digest} already exists")
+            return path
+        self._write(digest, path, stream)
+        return path
+
+    def store_file(self, digest: str, source_path: str) -> str:
+        path = self.path_for(digest)
+        if os.path.isfile(path):
+            log_email_parser_debug.debug(f"Attachment {digest} already exists")
+            os.remove(source_path)
+            return path
+        log_email_parser_info.info(f"Move attachment {path}")
+        if self.compression:
+            with open(source_path, 'rb') as source:
+                self._write(digest, path, source)
+            os.remove(source_path)
+            return path
+        shard = self._create_shard(digest)
+        try:
+            os.replace(source_path, path)
+        except OSError:
+            # Other file system: copied next to its final path first, then renamed
+            descriptor, temp_path = tempfile.mkstemp(dir=shard, prefix='.tmp-')
+            os.close(descriptor)
+            shutil.move(source_path, temp_path)
+            os.replace(temp_path, path)
+        return path
+
+    def open(self, digest: str) -> BinaryIO:
+        path = self.path_for(digest)
+        return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+    @contextmanager
+    def readable_path(self, path: str, extension: str = None) -> Iterator[str]:
+        compressed = path.endswith('.gz')
+        if not compressed and not extension:
+            yield path
+            return
+        # <digest>.<extension>, for the extractors relying on the extension
+        name = os.path.basename(path)[:-3] if compressed else os.path.basename(path)
+        directory = tempfile.mkdtemp() if compressed else tempfile.mkdtemp(dir=os.path.dirname(path), prefix='.tmp-')
+        named_path = os.path.join(directory, f"{name}.{extension}" if extension else name)
+        try:
+            if compressed:
+                with gzip.open(path, 'rb') as source, open(named_path, 'wb') as target:
+                    shutil.copyfileobj(source, target, self.chunk_size)
+            else:
+                # A hard link, a symbolic link would be detected as such instead of by its content
+                try:
+                    os.link(path, named_path)
+                except OSError:
+                    shutil.copyfile(path, named_path)
+            yield named_path
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def migrate(self) -> int:
+        moved = 0
+        for directory in [self.directory, *self._shards()]:
+            with os.scandir(directory) as entries:
+                names = [entry.name for entry in entries if entry.is_file() and self._NAMED.match(entry.name)]
+            for name in names:
+                digest = self._NAMED.match(name).group(1)
+                source = os.path.join(directory, name)
+                target = self.path_for(digest)
+                if source == target:
+                    continue
+                if not os.path.exists(target):
+                    # Rewritten, so that the compression setting of the store applies
+                    with self._open_stored(source, digest) as f:
+                        self._write(digest, target, f)
+                os.remove(source)
+                moved += 1
+        return moved
+
+    def _open_stored(self, path: str, digest: str) -> BinaryIO:
+        """Opens a file of a former layout, decompressed. <digest>.gz is also an uncompressed .gz attachment."""
+        if not path.endswith('.gz'):
+            return open(path, 'rb')
+        if os.path.basename(path) == f"{digest}.gz" and self._file_digest(path) == digest:
+            return open(path, 'rb')
+        return gzip.open(path, 'rb')
+
+    def _file_digest(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _shards(self) -> list:
+        """Directories of the deepest shard level."""
+        directories = [self.directory]
+        for _ in range(self.shard_levels):
+            directories = [entry.path for directory in directories for entry in os.scandir(directory)
+                           if entry.is_dir() and len(entry.name) == self.shard_width]
+        return directories
+
+    def _write(self, digest: str, path: str, stream: BinaryIO) -> None:
+        shard = self._create_shard(digest)
+        descriptor, temp_path = tempfile.mkstemp(dir=shard, prefix='.tmp-')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                if self.compression:
+                    # mtime=0: the same content always gives the same file
+                    with gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as compressed:
+                        shutil.copyfileobj(stream, compressed, self.chunk_size)
+                else:
+                    shutil.copyfileobj(stream, f, self.chunk_size)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _shard(self, digest: str) -> str:
+        parts = [digest[i * self.shard_width:(i + 1) * self.shard_width] for i in range(self.shard_levels)]
+        return os.path.join(self.directory, *parts)
+
+    def _create_shard(self, digest: str) -> str:
+        shard = self._shard(digest)
+        if shard not in self._created_directories:
+            os.makedirs(shard, exist_ok=True)
+            with self._lock:
+                self._created_directories.add(shard)
+        return shard
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Moves the attachments of the former layouts into the sharded layout.")
+    parser.add_argument('directory', nargs='?', default=EmailParserConstants.ATTACHMENTS_DIRECTORY,
+                        help="Attachments directory")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+    moved = AttachmentStore(directory=args.directory).migrate()
+    print(f"{moved} attachments moved into the sharded layout of {args.directory}")
+
+
+if __name__ == "__main__":
+    main()
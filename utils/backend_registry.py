@@ -0,0 +1,67 @@
+import importlib
+import os
+import threading
+from types import ModuleType
+
+from .ibackend_registry import IBackendRegistry
+
+
+class BackendRegistry(IBackendRegistry):
+    """
+    Imports the heavy extraction backends (PyPDF2, python-docx, openpyxl, odfpy, vobject, patool, gnupg...)
+    on first use, and keeps one MIME detector and one GPG handle per process.
+
+    Creating a gnupg.GPG spawns 'gpg --version' and a magic.Magic loads the libmagic database, so they are
+    created once and reused by every FileContentExtractor. The handles are created again in a forked child.
+    """
+
+    def __init__(self):
+        self._modules = {}
+        self._lock = threading.RLock()
+        self._pid = os.getpid()
+        self._mime_detector = None
+        self._gpg = None
+
+    def module(self, name: str) -> ModuleType:
+        try:
+            return self._modules[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._modules:
+                self._modules[name] = importlib.import_module(name)
+            return self._modules[name]
+
+    def detect_mime(self, file_path: str = None, content: bytes = None) -> str:
+        detector = self._get_mime_detector()
+        if file_path:
+            return detector.from_file(file_path)
+        return detector.from_buffer(content)
+
+    def gpg(self):
+        self._check_process()
+        if self._gpg is None:
+            with self._lock:
+                if self._gpg is None:
+                    self._gpg = self.module('gnupg').GPG()
+        return self._gpg
+
+    def _get_mime_detector(self):
+        self._check_process()
+        if self._mime_detector is None:
+            with self._lock:
+                if self._mime_detector is None:
+                    # magic.Magic serializes its own calls, the instance can be shared between threads
+                    self._mime_detector = self.module('magic').Magic(mime=True)
+        return self._mime_detector
+
+    def _check_process(self) -> None:
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._lock = threading.RLock()
+            self._mime_detector = None
+            self._gpg = None
+
+
+# Shared by all the extractors of the process
+backends = BackendRegistry()
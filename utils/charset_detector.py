@@ -0,0 +1,164 @@
+import codecs
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from config.charset_constants import CharsetConstants
+from .icharset_detector import ICharsetDetector
+
+
+class CharsetDetector(ICharsetDetector):
+    """
+    Detects the encoding of email bodies and text attachments in a single pass.
+
+    The detection order is: byte order mark, declared charset (unless it is a permissive single-byte
+    charset contradicted by valid UTF-8), pure ASCII, strict UTF-8, the encoding previously detected for
+    the same sender, and finally a byte-frequency heuristic over CharsetConstants.CANDIDATE_ENCODINGS.
+    Label lookups and per-sender results are cached, instances are thread-safe.
+    """
+
+    def __init__(self, sender_cache_size: int = CharsetConstants.SENDER_CACHE_SIZE):
+        self.sender_cache_size = sender_cache_size
+        self._label_cache = {}
+        self._sender_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def normalize_label(self, label: str) -> str | None:
+        if not label:
+            return None
+        label = label.strip().strip('"\'').lower()
+        try:
+            return self._label_cache[label]
+        except KeyError:
+            pass
+        try:
+            codec = codecs.lookup(label).name
+            codec = CharsetConstants.LABEL_ALIASES.get(codec, codec)
+        except LookupError:
+            codec = None
+        self._label_cache[label] = codec
+        return codec
+
+    def detect(self, data: bytes, declared: str = None, sender: str = None) -> str:
+        for bom, encoding in CharsetConstants.BOMS:
+            if data.startswith(bom):
+                return encoding
+
+        declared_codec = self.normalize_label(declared)
+        if declared_codec and self._decodes(data, declared_codec):
+            if declared_codec not in CharsetConstants.PERMISSIVE_ENCODINGS or data.isascii() \
+                    or not self._decodes(data, 'utf-8'):
+                return declared_codec
+            return 'utf-8'  # Mislabelled UTF-8, common with latin-1 and windows-1252 labels
+
+        if data.isascii() or self._decodes(data, 'utf-8'):
+            return 'utf-8'
+
+        sender_codec = self._cached_sender_codec(sender)
+        if sender_codec and self._decodes(data, sender_codec):
+            return sender_codec
+
+        encoding = self._guess_from_byte_frequency(data[:CharsetConstants.HEURISTIC_SAMPLE_SIZE])
+        self._remember_sender_codec(sender, encoding)
+        return encoding
+
+    def decode(self, data: bytes, declared: str = None, sender: str = None) -> str:
+        if data is None:
+            return None
+        encoding = self.detect(data, declared=declared, sender=sender)
+        if encoding.startswith('utf-8') or encoding.startswith('utf-16') or encoding.startswith('utf-32'):
+            # Strip the byte order mark if any, the generic utf-16/utf-32 codecs need it to pick the byte order
+            for bom, bom_encoding in CharsetConstants.BOMS:
+                if bom_encoding == encoding and data.startswith(bom):
+                    data = data[len(bom):]
+                    encoding = encoding.replace('-sig', '')
+                    break
+        return data.decode(encoding, errors='replace')
+
+    def _decodes(self, data: bytes, encoding: str) -> bool:
+        try:
+            data.decode(encoding)
+            return True
+        except (UnicodeDecodeError, LookupError):
+            return False
+
+    def _cached_sender_codec(self, sender: str) -> str | None:
+        if not sender:
+            return None
+        with self._lock:
+            codec = self._sender_cache.get(sender)
+            if codec:
+                self._sender_cache.move_to_end(sender)
+            return codec
+
+    def _remember_sender_codec(self, sender: str, encoding: str) -> None:
+        if not sender:
+            return
+        with self._lock:
+            self._sender_cache[sender] = encoding
+            self._sender_cache.move_to_end(sender)
+            while len(self._sender_cache) > self.sender_cache_size:
+                self._sender_cache.popitem(last=False)
+
+    def _guess_from_byte_frequency(self, sample: bytes) -> str:
+        high_bytes, isolated_high_bytes = self._count_high_bytes(sample)
+        # Double-byte encodings produce runs of high bytes, Western European texts mostly isolated ones
+        try_multibyte = isolated_high_bytes * 2 < high_bytes
+        best_encoding, best_score = CharsetConstants.CANDIDATE_ENCODINGS[0], float('-inf')
+        for encoding in CharsetConstants.CANDIDATE_ENCODINGS:
+            if encoding in CharsetConstants.MULTIBYTE_ENCODINGS and not try_multibyte:
+                continue
+            try:
+                # A big sample can be cut in the middle of a multibyte character
+                text = sample.decode(encoding, errors='strict' if len(sample) < CharsetConstants.HEURISTIC_SAMPLE_SIZE
+                                     else 'ignore')
+            except UnicodeDecodeError:
+                continue
+            score = self._score(text, multibyte=encoding in CharsetConstants.MULTIBYTE_ENCODINGS) / (high_bytes or 1)
+            if score > best_score:
+                best_encoding, best_score = encoding, score
+        return best_encoding
+
+    def _count_high_bytes(self, sample: bytes) -> tuple[int, int]:
+        """Returns the number of bytes above 0x7F and how many of them are not next to another one."""
+        high_bytes = isolated = run = 0
+        for byte in sample:
+            if byte > 0x7F:
+                high_bytes += 1
+                run += 1
+            else:
+                isolated += run == 1
+                run = 0
+        isolated += run == 1
+        return high_bytes, isolated
+
+    def _score(self, text: str, multibyte: bool) -> float:
+        score = 0.0
+        previous = ''
+        for char in text:
+            if char.isascii():
+                previous = char
+                continue
+            if char in CharsetConstants.COMMON_ACCENTED_LETTERS:
+                # An accented capital letter in the middle of a lowercase word is a typical wrong guess
+                score += -0.5 if char.isupper() and previous.islower() else 1.0
+            elif multibyte and 0x3040 <= ord(char) <= 0x30FF:
+                score += 2.5  # Kana, only frequent in Japanese texts decoded with a Japanese codec
+            elif multibyte and self._is_cjk(char):
+                score += 2.0  # One character for two high bytes
+            elif char in CharsetConstants.COMMON_PUNCTUATION:
+                score += 0.5
+            elif char.isalpha():
+                score += 0.25
+            elif unicodedata.category(char) in ('Cc', 'Co', 'Cn'):
+                score -= 2.0
+            previous = char
+        return score
+
+    def _is_cjk(self, char: str) -> bool:
+        code = ord(char)
+        return 0x4E00 <= code <= 0x9FFF or 0xAC00 <= code <= 0xD7AF
+
+
+# Shared instance, so the label and sender caches are reused by the parser and the file extractors
+charset_detector = CharsetDetector()
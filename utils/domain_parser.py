@@ -0,0 +1,51 @@
+from typing import Optional
+
+from config.email_parser_constants import DomainConstants
+from .idomain_parser import IDomainParser
+
+
+class DomainParser(IDomainParser):
+    """
+    Splits the email addresses into local part and domain, and finds the registrable domain of a domain.
+
+    The registrable domain is stored with its labels reversed ('be.client'), so the organisations of a
+    country or of a public suffix share a prefix and a domain filter is a range of the index.
+    """
+
+    def __init__(self, multi_label_suffixes: set = None):
+        self.multi_label_suffixes = multi_label_suffixes if multi_label_suffixes is not None \
+            else DomainConstants.MULTI_LABEL_PUBLIC_SUFFIXES
+
+    def local_part(self, email_address: Optional[str]) -> Optional[str]:
+        if not email_address or '@' not in email_address:
+            return None
+        return email_address.rpartition('@')[0] or None
+
+    def domain(self, email_address: Optional[str]) -> Optional[str]:
+        if not email_address or '@' not in email_address:
+            return None
+        return self.normalize(email_address.rpartition('@')[2])
+
+    def normalize(self, domain: Optional[str]) -> Optional[str]:
+        """Lower case domain without the '@' or the dots around it ('@Client.be.' becomes 'client.be')."""
+        domain = domain.strip().lstrip('@').strip('.').lower() if domain else ''
+        return domain or None
+
+    def registrable_domain(self, domain: Optional[str]) -> Optional[str]:
+        domain = self.normalize(domain)
+        if not domain:
+            return None
+        labels = domain.split('.')
+        suffix_length = 2 if '.'.join(labels[-2:]) in self.multi_label_suffixes else 1
+        if len(labels) <= suffix_length:
+            return None
+        return '.'.join(labels[-suffix_length - 1:])
+
+    def reverse(self, domain: Optional[str]) -> Optional[str]:
+        return '.'.join(reversed(domain.split('.'))) if domain else None
+
+    def reversed_registrable_domain(self, domain: Optional[str]) -> Optional[str]:
+        return self.reverse(self.registrable_domain(domain))
+
+
+domain_parser = DomainParser()
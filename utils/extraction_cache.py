@@ -0,0 +1,98 @@
+import sqlite3
+import threading
+import time
+
+from config.extraction_constants import ExtractionConstants
+from utils.logging_setup import log_file_content_extractor
+from .iextraction_cache import IExtractionCache
+
+
+class ExtractionCache(IExtractionCache):
+    """
+    On-disk cache (SQLite) of the texts extracted from attachments.
+
+    Entries are keyed by the attachment digest and the extractor version, so a repeated attachment costs
+    one lookup instead of a full extraction, and changing ExtractionConstants.EXTRACTOR_VERSION invalidates
+    the cache. When the stored texts exceed max_bytes, the least recently used ones are evicted.
+    """
+
+    def __init__(self, path: str = ExtractionConstants.CACHE_PATH, max_bytes: int = ExtractionConstants.CACHE_MAX_BYTES,
+                 version: int = ExtractionConstants.EXTRACTOR_VERSION):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS ExtractionCache(
+                digest TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                text TEXT,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY(digest, version)
+            );
+            CREATE INDEX IF NOT EXISTS idx_extraction_cache_last_access ON ExtractionCache(last_access);
+        """)
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ExtractionCache").fetchone()[0]
+
+    def lookup(self, digest: str) -> tuple[bool, str | None]:
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM ExtractionCache WHERE digest = ? AND version = ?",
+                                     (digest, self.version)).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            self._conn.execute("UPDATE ExtractionCache SET last_access = ? WHERE digest = ? AND version = ?",
+                               (time.time(), digest, self.version))
+            self._conn.commit()
+            return True, row[0]
+
+    def store(self, digest: str, text: str | None) -> None:
+        size = len(text.encode('utf-8')) if text else 0
+        with self._lock:
+            previous = self._conn.execute("SELECT size FROM ExtractionCache WHERE digest = ? AND version = ?",
+                                          (digest, self.version)).fetchone()
+            self._conn.execute("INSERT OR REPLACE INTO ExtractionCache (digest, version, text, size, last_access) "
+                               "VALUES (?, ?, ?, ?, ?)", (digest, self.version, text, size, time.time()))
+            self._size += size - (previous[0] if previous else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        target = self.max_bytes * ExtractionConstants.CACHE_EVICTION_RATIO
+        evicted = 0
+        while self._size > target:
+            rows = self._conn.execute("SELECT digest, version, size FROM ExtractionCache "
+                                      "ORDER BY last_access LIMIT 1000").fetchall()
+            if not rows:
+                break
+            for digest, version, size in rows:
+                self._conn.execute("DELETE FROM ExtractionCache WHERE digest = ? AND version = ?", (digest, version))
+                self._size -= size
+                evicted += 1
+                if self._size <= target:
+                    break
+        log_file_content_extractor.info(f"Extraction cache: {evicted} texts evicted, {self._size} bytes left")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ExtractionCache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': entries,
+                'bytes': self._size,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,210 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import resource
+import signal
+import tempfile
+import threading
+from typing import NamedTuple, Optional
+
+from config.extraction_constants import ExtractionConstants
+from config.file_constants import OfficeConstants
+from utils.backend_registry import backends
+from utils.file_content_extractor import FileContentExtractor
+from utils.logging_setup import log_file_content_extractor
+from utils.office_converter import OfficeConverter, office_converter as shared_office_converter, process_start_lock
+from .iextraction_pool import IExtractionPool
+
+
+class ExtractionResult(NamedTuple):
+    status: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    mime_type: Optional[str] = None  # detected by the extractor
+    page_count: Optional[int] = None
+
+
+class ExtractionPool(IExtractionPool):
+    """
+    Runs FileContentExtractor in a pool of worker processes, so a malformed file cannot block or exhaust
+    the ingest.
+
+    Each job gets a wall-clock timeout: a worker which does not answer in time is killed and replaced.
+    Workers run with an address space limit (RLIMIT_AS) and are replaced after jobs_per_worker extractions.
+    Each worker leads its own process group, so the processes started by an extractor are killed with it.
+    Timeouts, crashes and memory errors are returned as typed results instead of exceptions. Workers are
+    started on first use.
+
+    extract_many converts the legacy Office documents of a group of files with one LibreOffice invocation,
+    started from this process, and extracts the converted documents in the workers.
+    """
+
+    def __init__(self, size: int = ExtractionConstants.POOL_SIZE, timeout: float = ExtractionConstants.JOB_TIMEOUT,
+                 memory_limit: int = ExtractionConstants.WORKER_MEMORY_LIMIT,
+                 jobs_per_worker: int = ExtractionConstants.JOBS_PER_WORKER,
+                 start_method: str = ExtractionConstants.POOL_START_METHOD,
+                 office_converter: OfficeConverter = None):
+        self.size = size
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.jobs_per_worker = jobs_per_worker
+        self.office_converter = office_converter if office_converter else shared_office_converter
+        self._context = multiprocessing.get_context(start_method)
+        self._idle = queue.LifoQueue()
+        self._started = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        atexit.register(self.shutdown)
+
+    def extract(self, file_path: str) -> ExtractionResult:
+        worker = self._acquire()
+        try:
+            result = worker.run(file_path=file_path, timeout=self.timeout)
+        except BaseException:
+            worker.kill()
+            raise
+        finally:
+            self._release(worker)
+        if result.status != ExtractionConstants.STATUS_OK:
+            log_file_content_extractor.warning(f"Extraction {result.status} for {file_path}: {result.error}")
+        return result
+
+    def extract_many(self, file_paths: list) -> list:
+        mime_types = [backends.detect_mime(file_path=file_path) for file_path in file_paths]
+        conversions = [index for index, mime_type in enumerate(mime_types)
+                       if self.office_converter.needs_conversion(mime_type)]
+        # LibreOffice runs while the other files are extracted by the workers
+        futures = self.office_converter.submit_many([(mime_types[index], file_paths[index], None)
+                                                     for index in conversions])
+        results = [None if index in conversions else self.extract(file_path)
+                   for index, file_path in enumerate(file_paths)]
+        for index, future in zip(conversions, futures):
+            results[index] = self._extract_converted(file_path=file_paths[index], mime_type=mime_types[index],
+                                                     conversion=future)
+        return results
+
+    def _extract_converted(self, file_path: str, mime_type: str, conversion) -> ExtractionResult:
+        try:
+            converted = conversion.result()
+        except Exception as e:
+            log_file_content_extractor.warning(f"Extraction {ExtractionConstants.STATUS_ERROR} for {file_path}: {e}")
+            return ExtractionResult(ExtractionConstants.STATUS_ERROR, error=f"{type(e).__name__}: {e}",
+                                    mime_type=mime_type)
+        with tempfile.TemporaryDirectory() as directory:
+            converted_path = os.path.join(directory, f"converted.{OfficeConstants.CONVERSIONS[mime_type][1]}")
+            with open(converted_path, 'wb') as f:
+                f.write(converted)
+            result = self.extract(converted_path)
+        # The type of the attachment, not of its converted copy
+        return result._replace(mime_type=mime_type)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def _acquire(self) -> '_Worker':
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The extraction pool is shut down.")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+            if self._started < self.size:
+                self._started += 1
+                return _Worker(context=self._context, memory_limit=self.memory_limit)
+        return self._idle.get()
+
+    def _release(self, worker: '_Worker') -> None:
+        if not worker.is_alive() or worker.jobs >= self.jobs_per_worker:
+            # Replaced right away, another thread may be waiting for an idle worker
+            worker.stop()
+            worker = _Worker(context=self._context, memory_limit=self.memory_limit) if not self._closed else None
+        if self._closed:
+            if worker:
+                worker.stop()
+            return
+        self._idle.put(worker)
+
+
+class _Worker:
+    def __init__(self, context, memory_limit: int):
+        self.jobs = 0
+        self._conn, child_conn = context.Pipe()
+        # Not a daemon: the extractors can start their own processes (PDF page ranges)
+        self._process = context.Process(target=_worker_main, args=(child_conn, memory_limit), daemon=False)
+        with process_start_lock:
+            self._process.start()
+        child_conn.close()
+
+    def run(self, file_path: str, timeout: float) -> ExtractionResult:
+        self.jobs += 1
+        try:
+            self._conn.send(file_path)
+            if not self._conn.poll(timeout):
+                self.kill()
+                return ExtractionResult(ExtractionConstants.STATUS_TIMEOUT, error=f"No result after {timeout} seconds")
+            result = ExtractionResult(*self._conn.recv())
+            if result.status == ExtractionConstants.STATUS_MEMORY_LIMIT:
+                self._process.join()  # The worker exits after a memory error, it must not get another job
+            return result
+        except (EOFError, OSError):
+            self._process.join(1)
+            return ExtractionResult(ExtractionConstants.STATUS_CRASHED,
+                                    error=f"Worker exited with code {self._process.exitcode}")
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    def kill(self) -> None:
+        self._kill_group()
+        self._process.kill()
+        self._process.join()
+
+    def stop(self) -> None:
+        if self._process.is_alive():
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+            self._process.join(1)
+            if self._process.is_alive():
+                self.kill()
+        # The processes left by a crashed worker
+        self._kill_group()
+        self._conn.close()
+
+    def _kill_group(self) -> None:
+        try:
+            os.killpg(self._process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass  # The worker has not called setsid yet or the group is empty
+
+
+def _worker_main(conn, memory_limit: int) -> None:
+    os.setsid()
+    if memory_limit:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    while True:
+        try:
+            file_path = conn.recv()
+        except EOFError:
+            break
+        if file_path is None:
+            break
+        try:
+            extractor = FileContentExtractor(file_path=file_path)
+            text = extractor.extract_text()
+            conn.send((ExtractionConstants.STATUS_OK, text, None, extractor.file_mime_type, extractor.page_count))
+        except MemoryError:
+            conn.send((ExtractionConstants.STATUS_MEMORY_LIMIT, None, f"Memory limit of {memory_limit} bytes reached"))
+            break  # The state of the process is not reliable anymore, the pool replaces it
+        except Exception as e:
+            conn.send((ExtractionConstants.STATUS_ERROR, None, f"{type(e).__name__}: {e}"))
+    conn.close()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import time
+
+from config.file_constants import PdfConstants
+from utils.extractor_registry import extractors
+from utils.file_content_extractor import FileContentExtractor
+from utils.pdf_extractor import PdfExtractor
+
+
+def benchmark(corpus: str, repeat: int = 1, compare_pdf_backends: bool = False) -> dict:
+    """
+    Runs the registered extractors over every file of a directory and returns the statistics per MIME type.
+
+    :param corpus: Directory of sample files, read recursively.
+    :param repeat: Number of passes over the corpus.
+    :param compare_pdf_backends: Also extracts each PDF with every available PDF backend on its own, the
+                                 results are reported as 'application/pdf [backend]'.
+    """
+    extractors.reset_stats()
+    paths = [os.path.join(root, file) for root, dirs, files in os.walk(corpus) for file in sorted(files)]
+    for _ in range(repeat):
+        for path in paths:
+            try:
+                extractor = FileContentExtractor(file_path=path)
+                extractor.extract_text()
+            except Exception as e:
+                print(f"{path}: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            if compare_pdf_backends and extractor.file_mime_type == 'application/pdf':
+                _benchmark_pdf_backends(path)
+    return extractors.stats()
+
+
+def _benchmark_pdf_backends(path: str) -> None:
+    size = os.path.getsize(path)
+    for name, _ in PdfConstants.BACKENDS:
+        started = time.perf_counter()
+        try:
+            text = PdfExtractor(backend_names=(name,)).extract(file_path=path).text
+        except ValueError:
+            text = None  # Backend missing or failing
+        extractors.record(f"application/pdf [{name}]", bytes_in=size, chars_out=len(text) if text else 0,
+                          seconds=time.perf_counter() - started, failed=text is None)
+
+
+def format_stats(stats: dict) -> str:
+    """Formats the statistics as a table sorted by total extraction time."""
+    header = f"{'MIME type':<72} {'files':>6} {'failed':>6} {'MB in':>9} {'chars out':>11} {'seconds':>9} " \
+             f"{'MB/s':>8} {'files/s':>8}"
+    lines = [header, '-' * len(header)]
+    for mime_type, row in sorted(stats.items(), key=lambda item: item[1]['seconds'], reverse=True):
+        megabytes = row['bytes_in'] / (1024 * 1024)
+        seconds = row['seconds'] or 1e-9
+        lines.append(f"{mime_type:<72} {row['files']:>6} {row['failures']:>6} {megabytes:>9.2f} "
+                     f"{row['chars_out']:>11} {row['seconds']:>9.3f} {megabytes / seconds:>8.2f} "
+                     f"{row['files'] / seconds:>8.1f}")
+    return '\n'.join(lines)
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="Throughput of the attachment text extractors per MIME type.")
+    parser.add_argument('corpus', help="Directory of sample attachments")
+    parser.add_argument('--repeat', type=int, default=1, help="Number of passes over the corpus")
+    parser.add_argument('--compare-pdf-backends', action='store_true',
+                        help="Also time each PDF backend on its own")
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.corpus):
+        parser.error(f"Not a directory: {args.corpus}")
+    print(format_stats(benchmark(args.corpus, repeat=args.repeat, compare_pdf_backends=args.compare_pdf_backends)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import threading
+from fnmatch import fnmatchcase
+from typing import Callable, Optional
+
+from .iextractor_registry import IExtractorRegistry
+
+
+class ExtractorRegistry(IExtractorRegistry):
+    """
+    Text extractors keyed by MIME type, with the bytes read, characters produced and time spent per type.
+
+    The statistics are kept per process: the extractions run by the worker pool are counted in the workers.
+    """
+
+    def __init__(self):
+        self._extractors = {}
+        self._patterns = []
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def register(self, *mime_types: str) -> Callable:
+        def decorator(extractor: Callable) -> Callable:
+            for mime_type in mime_types:
+                if any(char in mime_type for char in '*?['):
+                    self._patterns.append((mime_type, extractor))
+                else:
+                    self._extractors[mime_type] = extractor
+            return extractor
+        return decorator
+
+    def lookup(self, mime_type: str) -> Optional[Callable]:
+        extractor = self._extractors.get(mime_type)
+        if extractor is None:
+            for pattern, pattern_extractor in self._patterns:
+                if fnmatchcase(mime_type, pattern):
+                    return pattern_extractor
+        return extractor
+
+    def mime_types(self) -> list:
+        """Returns the registered MIME types and patterns."""
+        return list(self._extractors) + [pattern for pattern, _ in self._patterns]
+
+    def record(self, mime_type: str, bytes_in: int, chars_out: int, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(mime_type, {'files': 0, 'failures': 0, 'bytes_in': 0, 'chars_out': 0,
+                                                       'seconds': 0.0})
+            stats['files'] += 1
+            stats['failures'] += failed
+            stats['bytes_in'] += bytes_in
+            stats['chars_out'] += chars_out
+            stats['seconds'] += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {mime_type: dict(stats) for mime_type, stats in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+# Extractors of FileContentExtractor, registered in utils.file_content_extractor
+extractors = ExtractorRegistry()
@@ -1,27 +1,24 @@
 from utils.logging_setup import log_file_content_extractor
-from config.file_constants import FileConstants
+from utils.backend_registry import backends
+from utils.charset_detector import charset_detector
+from utils.html_to_text import HtmlToText
+from utils.pdf_extractor import PdfExtractor
+from utils.archive_reader import ArchiveReader, ArchiveLimitError
+from utils.office_converter import office_converter
+from utils.spreadsheet_extractor import SpreadsheetExtractor
+from utils.extractor_registry import extractors
+from config.file_constants import OfficeConstants, ArchiveConstants
 import os
-import subprocess
-import PyPDF2
-from docx import Document
-import magic
-import patoolib
-import shutil
+import time
 import tempfile
-import vobject
-import gnupg
 from io import BytesIO
-from bs4 import BeautifulSoup
-from odf.opendocument import load
-from odf.text import P
-from openpyxl import load_workbook
 
 
 class FileContentExtractor:
     def __init__(self, file_path=None, content=None):
         self.file_path = file_path
         self.content = content
-        self.gpg = gnupg.GPG()
+        self.page_count = None
 
         if not file_path and not content:
             raise ValueError("Either file_path or content must be provided.")
@@ -31,158 +28,87 @@ class FileContentExtractor:
         self._check_content_source()
 
     def _check_content_source(self):
-        mime = magic.Magic(mime=True)
         if self.file_path:
-            self.file_mime_type = mime.from_file(self.file_path)
+            self.file_mime_type = backends.detect_mime(file_path=self.file_path)
         elif self.content:
-            self.file_mime_type = mime.from_buffer(self.content)
-    def extract_text(self):
-        match self.file_mime_type:
-            case 'application/pdf':
-                return self._extract_text_from_pdf()
-            case 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-                return self._extract_text_from_docx()
-            case 'application/msword':
-                return self._extract_text_from_doc()
-            case 'application/vnd.oasis.opendocument.text':
-                return self._extract_text_from_odt()
-            case 'application/vnd.oasis.opendocument.spreadsheet':
-                # Todo !!!
-                pass
-            case 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet':
-                return self._extract_text_from_excel()
-            case 'application/vnd.ms-excel':
-                # Todo !!!
-                pass
-            case 'application/vnd.ms-outlook':
-                # Todo !!!
-                pass
-            case 'text/plain' | 'text/x-shellscript':
-                return self._extract_text_from_txt()
-            case 'text/html':
-                return self._extract_text_from_html()
-            case 'text/rtf':
-                return self._extract_text_from_rtf()
-            case 'text/vcard' | 'text/x-vcard':
-                return self._extract_text_from_vcf()
-            case 'text/calendar':
-                return self._extract_text_from_calendar()
-            case 'inode/x-empty':
-                print("Empty file detected. No content to extract.")
-                return ""
-            case mime if 'image' in mime:
-                print("Image extension detected")
-            case mime if 'video' in mime:
-                print("Video extension detected")
-            case mime if self._is_archive(mime):
-                return self._extract_from_archive()
-            case 'application/pgp-keys':
-                return self._extract_text_from_pgp_key()
-            case 'application/pgp-encrypted':
-                return self._decrypt_pgp_encrypted_file()
-            case 'application/pgp-signature':
-                # Todo !!!
-                pass
-            case _:
-                #raise ValueError(f"Unsupported file type: {self.file_mime_type}")
-                log_file_content_extractor.debug(f"Unsupported file type: {self.file_mime_type}")
-
-    def _is_archive(self, mime_type):
-        # Les types MIME pour les archives
-        archive_mime_types = [
-            'application/zip',
-            'application/x-rar',
-            'application/x-rar-compressed',
-            'application/x-7z-compressed',
-            'application/gzip',
-            'application/x-tar',
-            'application/x-bzip2',
-        ]
-        return mime_type in archive_mime_types
-
-    def _extract_from_archive(self):
-        temp_dir = tempfile.mkdtemp()
-        try:
-            if self.file_path:
-                # Extraire les fichiers de l'archive dans un dossier temporaire
-                patoolib.extract_archive(self.file_path, outdir=temp_dir)
-            elif self.content:
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    temp_file.write(self.content)
-                    temp_file.close()
-                    patoolib.extract_archive(temp_file.name, outdir=temp_dir)
-
-            extracted_text = []
-            # Parcourir les fichiers extraits et les traiter récursivement
-            for root, dirs, files in os.walk(temp_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    sub_extractor = FileContentExtractor(file_path=file_path)
-                    try:
-                        text = sub_extractor.extract_text()
-                        if text:
-                            extracted_text.append(sub_extractor.extract_text())
-                    except ValueError as e:
-                        print(f"Unsupported file type {file} inside archive: {e}")
+            self.file_mime_type = backends.detect_mime(content=self.content)
 
-            return "\n".join(extracted_text)
-        finally:
-            # Nettoyer le dossier temporaire
-            shutil.rmtree(temp_dir)
-
-    def _extract_text_from_pdf(self):
-        text = ""
+    @property
+    def gpg(self):
+        return backends.gpg()
 
-        # First attempt using PyPDF2
+    def extract_text(self):
+        extractor = extractors.lookup(self.file_mime_type)
+        if extractor is None:
+            #raise ValueError(f"Unsupported file type: {self.file_mime_type}")
+            log_file_content_extractor.debug(f"Unsupported file type: {self.file_mime_type}")
+            return None
+        started = time.perf_counter()
+        text = None
         try:
-            if self.file_path:
-                with open(self.file_path, 'rb') as file:
-                    reader = PyPDF2.PdfReader(file)
-                    for page in reader.pages:
-                        text += page.extract_text()
-            elif self.content:
-                reader = PyPDF2.PdfReader(BytesIO(self.content))
-                for page in reader.pages:
-                    text += page.extract_text()
+            text = extractor(self)
             return text
+        finally:
+            extractors.record(self.file_mime_type, bytes_in=self._size(), chars_out=len(text) if text else 0,
+                              seconds=time.perf_counter() - started, failed=text is None)
 
-        except Exception as e:
-            print(f"PyPDF2 failed: {e}")
-
-        # Second attempt using PyMuPDF (fitz)
-        import fitz
-        try:
-            if self.file_path:
-                doc = fitz.open(self.file_path)
-            elif self.content:
-                doc = fitz.open(stream=self.content, filetype="pdf")
-
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            doc.close()
-            return text
+    def _size(self):
+        return os.path.getsize(self.file_path) if self.file_path else len(self.content)
 
-        except Exception as e:
-            print(f"PyMuPDF failed: {e}")
+    @extractors.register('inode/x-empty')
+    def _extract_text_from_empty_file(self):
+        log_file_content_extractor.debug("Empty file detected. No content to extract.")
+        return ""
 
-        # Final attempt using pdfminer.six
-        from pdfminer.high_level import extract_text as pdfminer_extract_text
+    @extractors.register(*ArchiveConstants.ZIP_MIME_TYPES, *ArchiveConstants.TAR_MIME_TYPES,
+                         *ArchiveConstants.COMPRESSED_MIME_TYPES, *ArchiveConstants.SEVEN_ZIP_MIME_TYPES,
+                         *ArchiveConstants.PATOOL_MIME_TYPES)
+    def _extract_from_archive(self):
+        extracted_text = []
+        conversions = []
         try:
-            if self.file_path:
-                text = pdfminer_extract_text(self.file_path)
-            elif self.content:
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    temp_file.write(self.content)
-                    temp_file.close()
-                    text = pdfminer_extract_text(temp_file.name)
-                    os.remove(temp_file.name)
-            return text
+            members = ArchiveReader().members(mime_type=self.file_mime_type, file_path=self.file_path,
+                                              content=self.content)
+            for member in members:
+                if not member.data:
+                    continue
+                if office_converter.needs_conversion(member.mime_type):
+                    # Converted together by one LibreOffice invocation once all the members are read
+                    conversions.append(member)
+                    continue
+                try:
+                    text = FileContentExtractor(content=member.data).extract_text()
+                except Exception as e:
+                    log_file_content_extractor.debug(f"Unsupported file type {member.name} inside archive: {e}")
+                    continue
+                if text:
+                    extracted_text.append(text)
+        except ArchiveLimitError as e:
+            log_file_content_extractor.warning(f"Archive {self.file_path} partially extracted: {e}")
+
+        futures = office_converter.submit_many([(member.mime_type, None, member.data) for member in conversions])
+        for member, conversion in zip(conversions, futures):
+            try:
+                text = self._extract_text_from_converted(mime_type=member.mime_type, converted=conversion.result())
+            except Exception as e:
+                log_file_content_extractor.debug(f"Conversion of {member.name} inside archive failed: {e}")
+                continue
+            if text:
+                extracted_text.append(text)
 
-        except Exception as e:
-            raise Exception(f"Failed to extract text from PDF using all available methods: {e}")
+        return "\n".join(extracted_text)
+
+    @extractors.register('application/pdf')
+    def _extract_text_from_pdf(self):
+        pdf = PdfExtractor().extract(file_path=self.file_path, content=self.content)
+        self.page_count = pdf.page_count
+        if pdf.truncated:
+            log_file_content_extractor.info(f"PDF text truncated to the extraction budget: {self.file_path}")
+        return pdf.text
 
+    @extractors.register('application/vnd.openxmlformats-officedocument.wordprocessingml.document')
     def _extract_text_from_docx(self):
+        Document = backends.module('docx').Document
         if self.file_path:
             doc = Document(self.file_path)
         elif self.content:
@@ -190,36 +116,33 @@ class FileContentExtractor:
 
         return "\n".join([para.text for para in doc.paragraphs])
 
-    def _extract_text_from_doc(self):
-        if self.file_path:
-            output_docx_path = os.path.splitext(self.file_path)[0] + ".docx"
-            subprocess.run([
-                'libreoffice', '--headless', '--convert-to', 'docx',
-                self.file_path, '--outdir', os.path.dirname(self.file_path)
-            ])
-            if not os.path.exists(output_docx_path):
-                raise FileNotFoundError(f"Conversion failed, {output_docx_path} not found.")
-            self.file_path = output_docx_path
-            text = self._extract_text_from_docx()
-            os.remove(output_docx_path)
-            return text
-        elif self.content:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".doc") as temp_file:
-                temp_file.write(self.content)
-                temp_file.close()
-                temp_extractor = FileContentExtractor(file_path=temp_file.name)
-                text = temp_extractor._extract_text_from_doc()
-                os.remove(temp_file.name)
-                return text
-
+    @extractors.register('application/msword', 'application/vnd.ms-powerpoint')
+    def _extract_text_from_legacy_office(self):
+        """
+        Extracts text content from a legacy Office document (doc, xls, ppt), converted by LibreOffice.
+        """
+        converted = office_converter.convert(self.file_mime_type, file_path=self.file_path, content=self.content)
+        return self._extract_text_from_converted(mime_type=self.file_mime_type, converted=converted)
+
+    def _extract_text_from_converted(self, mime_type, converted):
+        extractor = FileContentExtractor(content=converted)
+        match OfficeConstants.CONVERSIONS[mime_type][1]:
+            case 'docx':
+                return extractor._extract_text_from_docx()
+            case 'xlsx':
+                return extractor._extract_text_from_excel()
+            case 'pdf':
+                return extractor._extract_text_from_pdf()
+
+    @extractors.register('application/vnd.oasis.opendocument.text')
     def _extract_text_from_odt(self):
         """
         Extracts text content from an ODT file (OpenDocument Text).
         """
         try:
-            doc = load(self.file_path)
+            doc = backends.module('odf.opendocument').load(self.file_path if self.file_path else BytesIO(self.content))
             paragraphs = []
-            for element in doc.getElementsByType(P):
+            for element in doc.getElementsByType(backends.module('odf.text').P):
                 paragraphs.append(str(element))
 
             return "\n".join(paragraphs)
@@ -227,63 +150,52 @@ class FileContentExtractor:
             print(f"Error processing ODT file: {e}")
             return ""
 
+    @extractors.register('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
     def _extract_text_from_excel(self):
-        text = ""
-        if self.file_path:
-            workbook = load_workbook(filename=self.file_path, data_only=True)
-        else:
-            workbook = load_workbook(filename=BytesIO(self.content), data_only=True)
+        return SpreadsheetExtractor().extract_xlsx(file_path=self.file_path, content=self.content)
 
-        for sheet in workbook.worksheets:
-            for row in sheet.iter_rows(values_only=True):
-                row_text = "\t".join([str(cell) if cell is not None else "" for cell in row])
-                text += row_text + "\n"
-        return text
+    @extractors.register('application/vnd.oasis.opendocument.spreadsheet')
+    def _extract_text_from_ods(self):
+        return SpreadsheetExtractor().extract_ods(file_path=self.file_path, content=self.content)
 
-    def _extract_text_from_txt(self):
+    @extractors.register('application/vnd.ms-excel')
+    def _extract_text_from_xls(self):
+        try:
+            return SpreadsheetExtractor().extract_xls(file_path=self.file_path, content=self.content)
+        except ImportError:
+            # xlrd is optional, LibreOffice converts the workbook to XLSX instead
+            return self._extract_text_from_legacy_office()
+
+    def _read_bytes(self) -> bytes:
         if self.file_path:
             with open(self.file_path, 'rb') as file:
-                content = file.read()
-        elif self.content:
-            content = self.content
-        text = None
-        for encoding in FileConstants.SUPPORTED_ENCODINGS:
-            try:
-                text = content.decode(encoding)
-                break
-            except UnicodeDecodeError:
-                log_file_content_extractor.warning(f"Failed to decode with {encoding}")
-        if text is None:
-            raise UnicodeDecodeError("Unable to decode text with supported encodings.")
-        return text
+                return file.read()
+        return self.content
 
+    @extractors.register('text/plain', 'text/x-shellscript')
+    def _extract_text_from_txt(self):
+        return charset_detector.decode(self._read_bytes())
+
+    @extractors.register('text/html')
     def _extract_text_from_html(self):
         """
         Extracts text content from an HTML file (text/html).
         """
         try:
-            if self.file_path:
-                with open(self.file_path, 'r', encoding='utf-8') as file:
-                    html_content = file.read()
-            elif self.content:
-                html_content = self.content.decode('utf-8')
-
-            soup = BeautifulSoup(html_content, 'html.parser')
-            return soup.get_text(separator='\n', strip=True)
+            html_content = charset_detector.decode(self._read_bytes())
+            return HtmlToText().convert(html_content)
 
         except Exception as e:
             print(f"Error processing HTML file: {e}")
             return ""
 
+    @extractors.register('text/rtf')
     def _extract_text_from_rtf(self):
-        from striprtf.striprtf import rtf_to_text
-        if self.file_path:
-            with open(self.file_path, 'r') as file:
-                rtf_content = file.read()
-        elif self.content:
-            rtf_content = self.content.decode('utf-8')
+        rtf_to_text = backends.module('striprtf.striprtf').rtf_to_text
+        rtf_content = charset_detector.decode(self._read_bytes())
         return rtf_to_text(rtf_content)
 
+    @extractors.register('application/pgp-keys')
     def _extract_text_from_pgp_key(self):
         if self.file_path:
             with open(self.file_path, 'r') as key_file:
@@ -292,6 +204,7 @@ class FileContentExtractor:
             key_data = self.content.decode('utf-8')
         return key_data
 
+    @extractors.register('application/pgp-encrypted')
     def _decrypt_pgp_encrypted_file(self):
         if self.file_path:
             with open(self.file_path, 'rb') as f:
@@ -314,7 +227,9 @@ class FileContentExtractor:
         os.remove(temp_file.name)
         return extracted_text
 
+    @extractors.register('text/vcard', 'text/x-vcard')
     def _extract_text_from_vcf(self):
+        vobject = backends.module('vobject')
         contacts_info = []
 
         if self.file_path:
@@ -346,18 +261,15 @@ class FileContentExtractor:
 
         return "\n".join(contacts_info)
 
+    @extractors.register('text/calendar')
     def _extract_text_from_calendar(self):
         """
         Extracts text content from a calendar file (text/calendar).
         """
         try:
-            if self.file_path:
-                with open(self.file_path, 'r') as file:
-                    calendar_data = file.read()
-            elif self.content:
-                calendar_data = self.content.decode('utf-8')
+            calendar_data = charset_detector.decode(self._read_bytes())
 
-            calendar = vobject.readOne(calendar_data)
+            calendar = backends.module('vobject').readOne(calendar_data)
             extracted_text = []
             for component in calendar.components():
                 for name, prop in component.contents.items():
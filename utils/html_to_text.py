@@ -0,0 +1,116 @@
+import re
+from html.parser import HTMLParser
+
+from config.file_constants import HtmlConstants
+from .ihtml_to_text import IHtmlToText
+
+
+class HtmlToText(IHtmlToText):
+    """
+    Streaming HTML to plain text converter.
+
+    Works on html.parser events without building a tree: the text of scripts, styles, the head and hidden
+    elements is dropped, block elements become line breaks, cells are separated by tabulations and the
+    whitespace is collapsed. Markup, CSS, links and tracking images are not kept in the output.
+    """
+
+    _SPACES = re.compile(r'[ \t\r\n\f\v\xa0]+')
+    _BLANK_LINES = re.compile(r'\n{3,}')
+
+    def __init__(self):
+        self._parser = None
+        self._reset()
+
+    def feed(self, html: str) -> None:
+        self._parser.feed(html)
+
+    def close(self) -> str:
+        self._parser.close()
+        text = ''.join(self._parser.pieces)
+        text = '\n'.join(line.strip(' \t') for line in text.split('\n'))
+        text = self._BLANK_LINES.sub('\n\n', text).strip()
+        self._reset()
+        return text
+
+    def convert(self, html: str) -> str:
+        if not html:
+            return ''
+        self.feed(html)
+        return self.close()
+
+    def _reset(self) -> None:
+        self._parser = _TextCollector(spaces=self._SPACES)
+
+
+class _TextCollector(HTMLParser):
+    def __init__(self, spaces: re.Pattern):
+        super().__init__(convert_charrefs=True)
+        self.spaces = spaces
+        self.pieces = []
+        self.skip_depth = 0
+        self.hidden_stack = []  # Names of the open hidden elements
+        self.pre_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in HtmlConstants.SKIPPED_TAGS:
+            self.skip_depth += 1
+            return
+        if tag not in HtmlConstants.VOID_TAGS and (self.hidden_stack or self._is_hidden(attrs)):
+            self.hidden_stack.append(tag)
+            return
+        if self.skip_depth:
+            return
+        if tag == 'pre':
+            self.pre_depth += 1
+        if tag in HtmlConstants.BLOCK_TAGS:
+            self._newline()
+            if tag == 'li':
+                self.pieces.append('- ')
+        elif tag in HtmlConstants.CELL_TAGS:
+            self.pieces.append('\t')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in HtmlConstants.BLOCK_TAGS and not self.skip_depth and not self.hidden_stack:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if tag in HtmlConstants.SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.hidden_stack:
+            # Close the unclosed children too, end tags of elements that are not open are ignored
+            if tag in self.hidden_stack:
+                del self.hidden_stack[len(self.hidden_stack) - 1 - self.hidden_stack[::-1].index(tag):]
+            return
+        if self.skip_depth:
+            return
+        if tag == 'pre':
+            self.pre_depth = max(0, self.pre_depth - 1)
+        if tag in HtmlConstants.BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if self.skip_depth or self.hidden_stack:
+            return
+        if not self.pre_depth:
+            data = self.spaces.sub(' ', data)
+            # The parser can split a text node, the space may already have been emitted
+            if data.startswith(' ') and (not self.pieces or self.pieces[-1].endswith(('\n', ' ', '\t'))):
+                data = data[1:]
+            if not data:
+                return
+        self.pieces.append(data)
+
+    def _newline(self):
+        if self.pieces and not self.pieces[-1].endswith('\n'):
+            self.pieces.append('\n')
+
+    def _is_hidden(self, attrs) -> bool:
+        for name, value in attrs:
+            if name == 'hidden':
+                return True
+            if name == 'style' and value:
+                style = value.replace(' ', '').lower()
+                if any(hidden in style for hidden in HtmlConstants.HIDDEN_STYLES):
+                    return True
+        return False
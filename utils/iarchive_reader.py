@@ -0,0 +1,22 @@
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+class IArchiveReader(ABC):
+    @abstractmethod
+    def is_archive(self, mime_type: str) -> bool:
+        """Returns True if the MIME type is an archive format the reader can open."""
+        pass
+
+    @abstractmethod
+    def members(self, mime_type: str, file_path: str = None, content: bytes = None) -> Iterator:
+        """
+        Iterates over the files of an archive, nested archives included, in memory.
+
+        :param mime_type: MIME type of the archive.
+        :param file_path: Path of the archive.
+        :param content: Content of the archive, if no file path is given.
+        :return: Iterator of ArchiveMember(name, data, mime_type), nested archives are not returned themselves.
+        :raises ArchiveLimitError: If the archive exceeds the member count, total size or expansion ratio limits.
+        """
+        pass
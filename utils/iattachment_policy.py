@@ -0,0 +1,16 @@
+from abc import ABC, abstractmethod
+
+
+class IAttachmentPolicy(ABC):
+    @abstractmethod
+    def decide(self, mime_type: str, size: int, email_seconds: float = 0, run_seconds: float = 0) -> str:
+        """
+        Decides what is done with an attachment.
+
+        :param mime_type: MIME type declared in the email.
+        :param size: Size of the attachment in bytes.
+        :param email_seconds: Time already spent extracting the attachments of the email.
+        :param run_seconds: Time already spent extracting attachments during the run.
+        :return: One of AttachmentPolicyConstants.ACTIONS.
+        """
+        pass
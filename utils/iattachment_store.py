@@ -0,0 +1,42 @@
+from abc import abstractmethod
+
+from .iblob_store import IBlobStore
+
+
+class IAttachmentStore(IBlobStore):
+    @abstractmethod
+    def path_for(self, digest: str) -> str:
+        """
+        Returns the path of an attachment in the sharded layout.
+
+        :param digest: SHA-256 of the attachment content.
+        """
+        pass
+
+    @abstractmethod
+    def store_bytes(self, digest: str, content: bytes) -> str:
+        """
+        Writes an attachment if it is not already stored.
+
+        :return: Path of the attachment.
+        """
+        pass
+
+    @abstractmethod
+    def store_file(self, digest: str, source_path: str) -> str:
+        """
+        Moves a file into the store if the attachment is not already stored, the source file is removed.
+
+        :return: Path of the attachment.
+        """
+        pass
+
+    @abstractmethod
+    def migrate(self) -> int:
+        """
+        Moves the attachments of the former layouts (<directory>/<digest>.<ext>, <directory>/ab/cd/<digest>.<ext>)
+        to <directory>/ab/cd/<digest>, written with the compression of the store.
+
+        :return: Number of files moved.
+        """
+        pass
@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+from types import ModuleType
+
+
+class IBackendRegistry(ABC):
+    @abstractmethod
+    def module(self, name: str) -> ModuleType:
+        """
+        Returns an extraction backend module, imported on first use.
+
+        :param name: Module name, ex. 'PyPDF2' or 'odf.opendocument'.
+        :return: The imported module.
+        """
+        pass
+
+    @abstractmethod
+    def detect_mime(self, file_path: str = None, content: bytes = None) -> str:
+        """
+        Detects the MIME type of a file or of a content with the detector shared by the process.
+
+        :param file_path: Path of the file.
+        :param content: Content, if no file path is given.
+        :return: MIME type.
+        """
+        pass
+
+    @abstractmethod
+    def gpg(self):
+        """Returns the GPG handle shared by the process."""
+        pass
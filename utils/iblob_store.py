@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+from contextlib import AbstractContextManager
+from typing import BinaryIO
+
+
+class IBlobStore(ABC):
+    """Content-addressed storage of the attachment bytes, the database only keeps their digest."""
+
+    @abstractmethod
+    def exists(self, digest: str) -> bool:
+        pass
+
+    @abstractmethod
+    def store_stream(self, digest: str, stream: BinaryIO) -> str:
+        """
+        Copies a stream into the store chunk by chunk if the content is not already stored.
+
+        :return: Location of the content.
+        """
+        pass
+
+    @abstractmethod
+    def open(self, digest: str) -> BinaryIO:
+        """Opens the stored content for reading, decompressed."""
+        pass
+
+    @abstractmethod
+    def readable_path(self, path: str, extension: str = None) -> AbstractContextManager[str]:
+        """
+        Returns the path of an uncompressed copy of a stored file, valid until the block exits.
+
+        :param extension: Extension given to the copy, for the extractors relying on it.
+        """
+        pass
@@ -0,0 +1,37 @@
+from abc import ABC, abstractmethod
+
+
+class ICharsetDetector(ABC):
+    @abstractmethod
+    def normalize_label(self, label: str) -> str | None:
+        """
+        Returns the Python codec used for a charset label, or None if the label is unknown.
+
+        :param label: Charset label, ex. from a Content-Type header.
+        :return: Codec name or None.
+        """
+        pass
+
+    @abstractmethod
+    def detect(self, data: bytes, declared: str = None, sender: str = None) -> str:
+        """
+        Detects the encoding of the data.
+
+        :param data: Bytes to decode.
+        :param declared: Declared charset label, if any.
+        :param sender: Sender of the data, used to reuse the encoding detected for its previous messages.
+        :return: Codec name.
+        """
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes, declared: str = None, sender: str = None) -> str:
+        """
+        Decodes the data in a single pass with the detected encoding.
+
+        :param data: Bytes to decode.
+        :param declared: Declared charset label, if any.
+        :param sender: Sender of the data.
+        :return: Decoded text.
+        """
+        pass
@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class IDomainParser(ABC):
+    @abstractmethod
+    def local_part(self, email_address: Optional[str]) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def domain(self, email_address: Optional[str]) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def normalize(self, domain: Optional[str]) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def registrable_domain(self, domain: Optional[str]) -> Optional[str]:
+        """Domain registered by the organisation: 'client.be' for 'mail.client.be', None for a public suffix."""
+        pass
+
+    @abstractmethod
+    def reverse(self, domain: Optional[str]) -> Optional[str]:
+        """Labels in reverse order, 'client.be' becomes 'be.client'."""
+        pass
+
+    @abstractmethod
+    def reversed_registrable_domain(self, domain: Optional[str]) -> Optional[str]:
+        pass
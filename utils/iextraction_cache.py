@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+
+
+class IExtractionCache(ABC):
+    @abstractmethod
+    def lookup(self, digest: str) -> tuple[bool, str | None]:
+        """
+        Looks up the text extracted from an attachment.
+
+        :param digest: SHA-256 of the attachment content.
+        :return: (found, text), text can be None for attachments without extractable text.
+        """
+        pass
+
+    @abstractmethod
+    def store(self, digest: str, text: str | None) -> None:
+        """
+        Stores the text extracted from an attachment, evicting the least recently used texts if the cache is full.
+
+        :param digest: SHA-256 of the attachment content.
+        :param text: Extracted text.
+        """
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        Returns the hits, misses, hit rate, number of entries and size of the cache.
+        """
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
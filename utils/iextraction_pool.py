@@ -0,0 +1,30 @@
+from abc import ABC, abstractmethod
+
+
+class IExtractionPool(ABC):
+    @abstractmethod
+    def extract(self, file_path: str):
+        """
+        Extracts the text of a file in a worker process.
+
+        :param file_path: Path of the file.
+        :return: ExtractionResult(status, text, error, mime_type, page_count), status is one of the
+                 ExtractionConstants.STATUS_* values.
+        """
+        pass
+
+    @abstractmethod
+    def extract_many(self, file_paths: list) -> list:
+        """
+        Extracts the texts of several files. Their legacy Office documents are converted together by one
+        LibreOffice invocation.
+
+        :param file_paths: Paths of the files.
+        :return: ExtractionResults, in the order of the paths.
+        """
+        pass
+
+    @abstractmethod
+    def shutdown(self) -> None:
+        """Stops the worker processes."""
+        pass
@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+
+class IExtractorRegistry(ABC):
+    @abstractmethod
+    def register(self, *mime_types: str) -> Callable:
+        """
+        Decorator registering a text extractor for MIME types.
+
+        :param mime_types: MIME types or shell-style patterns (ex. 'image/*').
+        :return: Decorator, the extractor is called with the FileContentExtractor and returns the text.
+        """
+        pass
+
+    @abstractmethod
+    def lookup(self, mime_type: str) -> Optional[Callable]:
+        """Returns the extractor of a MIME type, exact types first then patterns, None if there is none."""
+        pass
+
+    @abstractmethod
+    def mime_types(self) -> list:
+        """Returns the registered MIME types and patterns."""
+        pass
+
+    @abstractmethod
+    def record(self, mime_type: str, bytes_in: int, chars_out: int, seconds: float, failed: bool = False) -> None:
+        """Adds an extraction to the statistics of a MIME type."""
+        pass
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """
+        Returns the statistics per MIME type: {mime_type: {'files', 'failures', 'bytes_in', 'chars_out', 'seconds'}}.
+        """
+        pass
+
+    @abstractmethod
+    def reset_stats(self) -> None:
+        """Clears the statistics."""
+        pass
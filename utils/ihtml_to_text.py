@@ -0,0 +1,31 @@
+from abc import ABC, abstractmethod
+
+
+class IHtmlToText(ABC):
+    @abstractmethod
+    def feed(self, html: str) -> None:
+        """
+        Feeds a chunk of HTML to the converter.
+
+        :param html: HTML chunk, can be cut anywhere.
+        """
+        pass
+
+    @abstractmethod
+    def close(self) -> str:
+        """
+        Flushes the converter and returns the text of everything fed so far.
+
+        :return: Plain text.
+        """
+        pass
+
+    @abstractmethod
+    def convert(self, html: str) -> str:
+        """
+        Converts a whole HTML document to plain text.
+
+        :param html: HTML document.
+        :return: Plain text.
+        """
+        pass
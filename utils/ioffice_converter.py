@@ -0,0 +1,49 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+
+
+class IOfficeConverter(ABC):
+    @abstractmethod
+    def submit(self, mime_type: str, file_path: str = None, content: bytes = None) -> Future:
+        """
+        Queues the conversion of a legacy Office document (doc, xls, ppt).
+
+        :param mime_type: MIME type of the document, a key of OfficeConstants.CONVERSIONS.
+        :param file_path: Path of the document.
+        :param content: Content of the document, if no file path is given.
+        :return: Future of the converted document content.
+        """
+        pass
+
+    @abstractmethod
+    def submit_many(self, documents: list) -> list:
+        """
+        Queues documents to be converted together, right away: they do not wait for the batch window.
+
+        :param documents: (mime_type, file_path, content) tuples, same meaning as the arguments of submit.
+        :return: Futures of the converted document contents, in the order of the documents.
+        """
+        pass
+
+    @abstractmethod
+    def convert(self, mime_type: str, file_path: str = None, content: bytes = None) -> bytes:
+        """
+        Converts a legacy Office document and waits for the result.
+
+        :return: Converted document content.
+        :raises FileNotFoundError: If LibreOffice is not installed or the conversion failed.
+        """
+        pass
+
+    @abstractmethod
+    def needs_conversion(self, mime_type: str) -> bool:
+        """
+        Tells whether a document must be converted before its text is extracted. XLS workbooks are read
+        directly when xlrd is installed.
+        """
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """Stops the batching thread and removes the working directory."""
+        pass
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+
+class IPdfExtractor(ABC):
+    @abstractmethod
+    def extract(self, file_path: str = None, content: bytes = None):
+        """
+        Extracts the text of a PDF within the page and character budgets.
+
+        :param file_path: Path of the PDF.
+        :param content: Content of the PDF, if no file path is given.
+        :return: PdfText(text, page_count, truncated).
+        :raises ValueError: If no backend could read the PDF.
+        """
+        pass
@@ -0,0 +1,15 @@
+from abc import ABC, abstractmethod
+
+
+class IReplyStripper(ABC):
+    @abstractmethod
+    def strip(self, body: str, sender: str = None) -> str:
+        """
+        Returns the new content of an email body, without the quoted history, the legal footers and the
+        signatures.
+
+        :param body: Plain text body of the email.
+        :param sender: Sender address, used to detect the blocks repeated in all the messages of a sender.
+        :return: The new text written in this email.
+        """
+        pass
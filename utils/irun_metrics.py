@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+
+
+class IRunMetrics(ABC):
+    @abstractmethod
+    def increment(self, name: str, value: float = 1) -> None:
+        """
+        Adds a value to a counter.
+
+        :param name: Name of the counter, created at 0 if needed.
+        :param value: Value added.
+        """
+        pass
+
+    @abstractmethod
+    def get(self, name: str) -> float:
+        """Returns the value of a counter, 0 if it does not exist."""
+        pass
+
+    @abstractmethod
+    def snapshot(self) -> dict:
+        """Returns a copy of all the counters."""
+        pass
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Sets all the counters back to 0."""
+        pass
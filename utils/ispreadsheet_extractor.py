@@ -0,0 +1,28 @@
+from abc import ABC, abstractmethod
+
+
+class ISpreadsheetExtractor(ABC):
+    @abstractmethod
+    def extract_xlsx(self, file_path: str = None, content: bytes = None) -> str:
+        """
+        Extracts the text of an XLSX workbook, one line per row and cells separated by tabulations.
+
+        :param file_path: Path of the workbook.
+        :param content: Content of the workbook, if no file path is given.
+        :return: Text of the workbook, within the row, cell and character budgets.
+        """
+        pass
+
+    @abstractmethod
+    def extract_ods(self, file_path: str = None, content: bytes = None) -> str:
+        """Extracts the text of an ODS workbook, like extract_xlsx."""
+        pass
+
+    @abstractmethod
+    def extract_xls(self, file_path: str = None, content: bytes = None) -> str:
+        """
+        Extracts the text of a legacy XLS workbook, like extract_xlsx.
+
+        :raises ImportError: If xlrd is not installed.
+        """
+        pass
@@ -0,0 +1,194 @@
+import atexit
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+from config.file_constants import OfficeConstants
+from utils.backend_registry import backends
+from utils.logging_setup import log_file_content_extractor
+from .ioffice_converter import IOfficeConverter
+
+# Held while a process is started. A process forked by another thread while LibreOffice is starting would
+# inherit the pipe subprocess reads until the exec, and the start would wait for that process to exit.
+process_start_lock = threading.Lock()
+
+
+class OfficeConverter(IOfficeConverter):
+    """
+    Converts legacy Office documents (doc, xls, ppt) with LibreOffice, in batches.
+
+    Conversions submitted within batch_window seconds are converted by a single LibreOffice invocation,
+    which pays the start-up cost once. The documents given together to submit_many are converted right away,
+    without waiting for the batch window. The documents are converted in a private working directory with a
+    private LibreOffice profile, created once per process and reused by every invocation: a running
+    desktop instance is never used and nothing is written next to the source files.
+    """
+
+    def __init__(self, binary: str = None, batch_window: float = OfficeConstants.BATCH_WINDOW,
+                 max_batch_size: int = OfficeConstants.MAX_BATCH_SIZE):
+        self.binary = binary
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._pending = []
+        self._condition = threading.Condition()
+        self._thread = None
+        self._work_dir = None
+        self._pid = None
+        atexit.register(self.close)
+
+    def submit(self, mime_type: str, file_path: str = None, content: bytes = None) -> Future:
+        return self._enqueue([(mime_type, file_path, content)], batch_window=True)[0]
+
+    def submit_many(self, documents: list) -> list:
+        return self._enqueue(documents, batch_window=False)
+
+    def convert(self, mime_type: str, file_path: str = None, content: bytes = None) -> bytes:
+        # Nothing else would join the batch, waiting for the batch window is useless
+        return self.submit_many([(mime_type, file_path, content)])[0].result()
+
+    def needs_conversion(self, mime_type: str) -> bool:
+        if mime_type == 'application/vnd.ms-excel':
+            try:
+                backends.module('xlrd')
+                return False
+            except ImportError:
+                return True
+        return mime_type in OfficeConstants.CONVERSIONS
+
+    def close(self) -> None:
+        with self._condition:
+            thread, self._thread = self._thread, None
+            self._condition.notify_all()
+        if thread and thread.is_alive():
+            thread.join()
+        if self._work_dir and self._pid == os.getpid():
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    def _enqueue(self, documents: list, batch_window: bool) -> list:
+        jobs = []
+        for mime_type, file_path, content in documents:
+            if mime_type not in OfficeConstants.CONVERSIONS:
+                raise ValueError(f"No conversion for {mime_type}")
+            if not file_path and content is None:
+                raise ValueError("Either file_path or content must be provided.")
+            jobs.append(_Job(mime_type, file_path, content, Future(), batch_window))
+        if not jobs:
+            return []
+        with self._condition:
+            self._start()
+            self._pending.extend(jobs)
+            self._condition.notify()
+        return [job.future for job in jobs]
+
+    def _start(self) -> None:
+        if self._pid != os.getpid():
+            # New process (fork): LibreOffice profiles cannot be shared by two running instances
+            self._pid = os.getpid()
+            self._work_dir = None
+            self._thread = None
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='office-converter', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        current = threading.current_thread()
+        while True:
+            with self._condition:
+                while not self._pending and self._thread is current:
+                    self._condition.wait()
+                if self._thread is not current and not self._pending:
+                    return
+                # Wait a little for other conversions to share the LibreOffice invocation
+                deadline = time.monotonic() + self.batch_window
+                while (len(self._pending) < self.max_batch_size and time.monotonic() < deadline
+                       and all(job.batch_window for job in self._pending)):
+                    self._condition.wait(deadline - time.monotonic())
+                batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+            targets = {}
+            for job in batch:
+                targets.setdefault(OfficeConstants.CONVERSIONS[job.mime_type][1], []).append(job)
+            for target, jobs in targets.items():
+                try:
+                    self._convert_batch(target, jobs)
+                except Exception as e:
+                    for job in jobs:
+                        if not job.future.done():
+                            job.future.set_exception(e)
+
+    def _convert_batch(self, target: str, jobs: list) -> None:
+        binary = self._binary()
+        batch_dir = tempfile.mkdtemp(dir=self._get_work_dir())
+        try:
+            input_dir = os.path.join(batch_dir, 'input')
+            output_dir = os.path.join(batch_dir, 'output')
+            os.makedirs(input_dir)
+            inputs = []
+            for i, job in enumerate(jobs):
+                # Numbered copies, two attachments can have the same file name
+                path = os.path.join(input_dir, f"{i}.{OfficeConstants.CONVERSIONS[job.mime_type][0]}")
+                if job.file_path:
+                    shutil.copyfile(job.file_path, path)
+                else:
+                    with open(path, 'wb') as f:
+                        f.write(job.content)
+                inputs.append(path)
+            profile = Path(self._get_work_dir(), 'profile').as_uri()
+            command = [binary, f"-env:UserInstallation={profile}", '--headless', '--norestore', '--nologo',
+                       '--convert-to', target, '--outdir', output_dir, *inputs]
+            started = time.perf_counter()
+            with process_start_lock:
+                process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                process.wait(timeout=OfficeConstants.BATCH_TIMEOUT + OfficeConstants.FILE_TIMEOUT * len(jobs))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                raise
+            log_file_content_extractor.info(f"LibreOffice converted {len(jobs)} files to {target} "
+                                            f"in {time.perf_counter() - started:.2f}s")
+            for i, job in enumerate(jobs):
+                output_path = os.path.join(output_dir, f"{i}.{target}")
+                if os.path.exists(output_path):
+                    with open(output_path, 'rb') as f:
+                        job.future.set_result(f.read())
+                else:
+                    job.future.set_exception(FileNotFoundError(
+                        f"Conversion failed, {os.path.basename(job.file_path or 'content')} not converted to {target}."))
+        finally:
+            shutil.rmtree(batch_dir, ignore_errors=True)
+
+    def _binary(self) -> str:
+        if not self.binary:
+            for name in OfficeConstants.BINARIES:
+                self.binary = shutil.which(name)
+                if self.binary:
+                    break
+            else:
+                raise FileNotFoundError("LibreOffice is not installed, legacy Office documents cannot be converted.")
+        return self.binary
+
+    def _get_work_dir(self) -> str:
+        if not self._work_dir:
+            self._work_dir = tempfile.mkdtemp(prefix='office_converter_')
+        return self._work_dir
+
+
+class _Job:
+    __slots__ = ('mime_type', 'file_path', 'content', 'future', 'batch_window')
+
+    def __init__(self, mime_type: str, file_path: str, content: bytes, future: Future, batch_window: bool):
+        self.mime_type = mime_type
+        self.file_path = file_path
+        self.content = content
+        self.future = future
+        self.batch_window = batch_window  # Whether the job waits for other conversions to join its batch
+
+
+# Shared by the extractors of the process, so their conversions are batched together
+office_converter = OfficeConverter()
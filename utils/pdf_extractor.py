@@ -0,0 +1,127 @@
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from types import ModuleType
+from typing import NamedTuple
+
+from config.file_constants import PdfConstants
+from utils.backend_registry import backends
+from utils.logging_setup import log_file_content_extractor
+from utils.text_buffer import TextBuffer
+from .ipdf_extractor import IPdfExtractor
+
+
+class PdfText(NamedTuple):
+    text: str
+    page_count: int
+    truncated: bool
+
+
+class PdfExtractor(IPdfExtractor):
+    """
+    Extracts the text of PDF files with the fastest available backend: PyMuPDF, then pypdf/PyPDF2, then
+    pdfminer. The next backend is only used when the previous one is missing or fails.
+
+    At most max_pages pages and max_chars characters are extracted. With PyMuPDF, documents of
+    parallel_page_threshold pages or more are split into page ranges extracted by several processes.
+    """
+
+    def __init__(self, max_pages: int = PdfConstants.MAX_PAGES, max_chars: int = PdfConstants.MAX_CHARS,
+                 parallel_page_threshold: int = PdfConstants.PARALLEL_PAGE_THRESHOLD,
+                 page_range_size: int = PdfConstants.PAGE_RANGE_SIZE, max_workers: int = PdfConstants.MAX_WORKERS,
+                 backend_names: tuple = None):
+        """
+        :param backend_names: Names of the backends to use, in PdfConstants.BACKENDS order. All by default.
+        """
+        self.backend_names = backend_names
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.parallel_page_threshold = parallel_page_threshold
+        self.page_range_size = page_range_size
+        self.max_workers = max_workers
+
+    def extract(self, file_path: str = None, content: bytes = None) -> PdfText:
+        if not file_path and content is None:
+            raise ValueError("Either file_path or content must be provided.")
+        errors = []
+        for name, module_names in PdfConstants.BACKENDS:
+            if self.backend_names and name not in self.backend_names:
+                continue
+            module = _load_backend(module_names)
+            if module is None:
+                continue
+            try:
+                return getattr(self, f"_extract_with_{name}")(module, file_path, content)
+            except Exception as e:
+                log_file_content_extractor.warning(f"PDF backend {name} failed on {file_path or 'content'}: {e}")
+                errors.append(f"{name}: {e}")
+        raise ValueError(f"Failed to extract text from PDF using all available methods: {'; '.join(errors)}")
+
+    def _extract_with_pymupdf(self, fitz: ModuleType, file_path: str, content: bytes) -> PdfText:
+        doc = fitz.open(file_path) if file_path else fitz.open(stream=content, filetype='pdf')
+        with doc:
+            page_count = doc.page_count
+            pages = min(page_count, self.max_pages)
+            parallel = file_path and self.max_workers > 1 and pages >= self.parallel_page_threshold
+            buffer = TextBuffer(self.max_chars)
+            for number in range(0 if parallel else pages):
+                if not buffer.append(doc.load_page(number).get_text()):
+                    break
+        if parallel:
+            return self._extract_ranges_in_parallel(file_path, page_count, pages)
+        return PdfText(buffer.text(), page_count, buffer.truncated or pages < page_count)
+
+    def _extract_ranges_in_parallel(self, file_path: str, page_count: int, pages: int) -> PdfText:
+        ranges = [(file_path, start, min(start + self.page_range_size, pages), self.max_chars)
+                  for start in range(0, pages, self.page_range_size)]
+        buffer = TextBuffer(self.max_chars)
+        executor = ProcessPoolExecutor(max_workers=min(self.max_workers, len(ranges)))
+        try:
+            for future in [executor.submit(_extract_page_range, *page_range) for page_range in ranges]:
+                if not buffer.append(future.result()):
+                    break
+        finally:
+            # The ranges which are not started yet are dropped once the budget is exhausted
+            executor.shutdown(cancel_futures=True)
+        return PdfText(buffer.text(), page_count, buffer.truncated or pages < page_count)
+
+    def _extract_with_pypdf(self, pypdf: ModuleType, file_path: str, content: bytes) -> PdfText:
+        if file_path:
+            with open(file_path, 'rb') as file:
+                return self._read_pypdf_pages(pypdf.PdfReader(file))
+        return self._read_pypdf_pages(pypdf.PdfReader(BytesIO(content)))
+
+    def _read_pypdf_pages(self, reader) -> PdfText:
+        page_count = len(reader.pages)
+        pages = min(page_count, self.max_pages)
+        buffer = TextBuffer(self.max_chars)
+        for number in range(pages):
+            if not buffer.append(reader.pages[number].extract_text() or ''):
+                break
+        return PdfText(buffer.text(), page_count, buffer.truncated or pages < page_count)
+
+    def _extract_with_pdfminer(self, pdfminer: ModuleType, file_path: str, content: bytes) -> PdfText:
+        source = file_path if file_path else BytesIO(content)
+        text = pdfminer.extract_text(source, maxpages=self.max_pages)
+        buffer = TextBuffer(self.max_chars)
+        buffer.append(text)
+        # pdfminer does not give the number of pages, form feeds separate them
+        return PdfText(buffer.text(), text.count('\f'), buffer.truncated)
+
+
+def _load_backend(module_names: tuple) -> ModuleType | None:
+    for module_name in module_names:
+        try:
+            return backends.module(module_name)
+        except ImportError:
+            continue
+    return None
+
+
+def _extract_page_range(file_path: str, start: int, stop: int, max_chars: int) -> str:
+    fitz = _load_backend(PdfConstants.BACKENDS[0][1])
+    buffer = TextBuffer(max_chars)
+    with fitz.open(file_path) as doc:
+        for number in range(start, stop):
+            if not buffer.append(doc.load_page(number).get_text()):
+                break
+    return buffer.text()
@@ -0,0 +1,116 @@
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from config.email_parser_constants import ReplyStripperConstants
+from .ireply_stripper import IReplyStripper
+
+
+class ReplyStripper(IReplyStripper):
+    """
+    Separates the new content of an email body from the quoted history, the legal footers and the
+    signatures.
+
+    The history starts at the first "On ... wrote:" line (several languages), "Original Message"
+    separator or Outlook From/Sent header block. Lines quoted with '>' are removed everywhere, so inline
+    answers are kept. The text is then cut at the signature delimiter or at a legal footer, and the
+    trailing paragraphs already seen several times in the previous messages of the same sender are dropped.
+    """
+
+    def __init__(self, repeated_block_threshold: int = ReplyStripperConstants.REPEATED_BLOCK_THRESHOLD):
+        self.repeated_block_threshold = repeated_block_threshold
+        flags = re.IGNORECASE
+        self._reply_headers = [re.compile(pattern, flags) for pattern in ReplyStripperConstants.REPLY_HEADER_PATTERNS]
+        self._original_message = re.compile(ReplyStripperConstants.ORIGINAL_MESSAGE_PATTERN, flags)
+        self._outlook_from = re.compile(ReplyStripperConstants.OUTLOOK_FROM_PATTERN, flags)
+        self._outlook_sent = re.compile(ReplyStripperConstants.OUTLOOK_SENT_PATTERN, flags)
+        self._signature = re.compile(ReplyStripperConstants.SIGNATURE_PATTERN)
+        self._mobile_signature = re.compile(ReplyStripperConstants.MOBILE_SIGNATURE_PATTERN, flags)
+        self._legal_footer = re.compile(ReplyStripperConstants.LEGAL_FOOTER_PATTERN, flags)
+        self._sender_blocks = OrderedDict()  # sender -> {block hash: count}
+        self._lock = threading.Lock()
+
+    def strip(self, body: str, sender: str = None) -> str:
+        if not body:
+            return body
+        lines = body.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+        lines = lines[:self._history_start(lines)]
+        lines = [line for line in lines if not line.lstrip().startswith('>')]
+        lines = lines[:self._signature_start(lines)]
+        paragraphs = self._paragraphs(lines)
+        paragraphs = self._remove_legal_footer(paragraphs)
+        paragraphs = self._remove_repeated_blocks(paragraphs, sender)
+        return '\n\n'.join('\n'.join(paragraph) for paragraph in paragraphs).strip()
+
+    def _history_start(self, lines: list) -> int:
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+            if self._original_message.match(line):
+                return i
+            next_line = lines[i + 1].strip() if i + 1 < len(lines) else ''
+            for pattern in self._reply_headers:
+                if pattern.match(line) or (next_line and pattern.match(f"{line} {next_line}")):
+                    return i
+            if self._outlook_from.match(line):
+                for following in lines[i + 1:i + 1 + ReplyStripperConstants.OUTLOOK_HEADER_LINES]:
+                    if self._outlook_sent.match(following.strip()):
+                        return i
+        return len(lines)
+
+    def _signature_start(self, lines: list) -> int:
+        for i, line in enumerate(lines):
+            if self._signature.match(line.rstrip('\n')) or self._mobile_signature.match(line.strip()):
+                return i
+        return len(lines)
+
+    def _paragraphs(self, lines: list) -> list:
+        paragraphs, current = [], []
+        for line in lines:
+            line = line.rstrip()
+            if line:
+                current.append(line)
+            elif current:
+                paragraphs.append(current)
+                current = []
+        if current:
+            paragraphs.append(current)
+        return paragraphs
+
+    def _remove_legal_footer(self, paragraphs: list) -> list:
+        # Only the second half of the message is searched, a first paragraph is never a footer
+        for i in range(max(1, len(paragraphs) // 2), len(paragraphs)):
+            if self._legal_footer.search(' '.join(paragraphs[i])):
+                return paragraphs[:i]
+        return paragraphs
+
+    def _remove_repeated_blocks(self, paragraphs: list, sender: str) -> list:
+        if not sender or not paragraphs:
+            return paragraphs
+        hashes = [self._block_hash(paragraph) for paragraph in paragraphs]
+        with self._lock:
+            seen = self._sender_blocks.pop(sender, {})
+            self._sender_blocks[sender] = seen
+            while len(self._sender_blocks) > ReplyStripperConstants.SENDER_HISTORY_SIZE:
+                self._sender_blocks.popitem(last=False)
+
+            end = len(paragraphs)
+            while end > 1 and hashes[end - 1] and seen.get(hashes[end - 1], 0) >= self.repeated_block_threshold:
+                end -= 1
+
+            for block_hash in hashes:
+                if block_hash:
+                    seen[block_hash] = seen.get(block_hash, 0) + 1
+            if len(seen) > ReplyStripperConstants.BLOCKS_PER_SENDER:
+                # Keep the most frequent blocks only
+                for block_hash in sorted(seen, key=seen.get)[:len(seen) - ReplyStripperConstants.BLOCKS_PER_SENDER]:
+                    del seen[block_hash]
+        return paragraphs[:end]
+
+    def _block_hash(self, paragraph: list) -> str | None:
+        text = ' '.join(' '.join(paragraph).split()).lower()
+        if len(text) < ReplyStripperConstants.REPEATED_BLOCK_MIN_LENGTH:
+            return None
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
@@ -0,0 +1,31 @@
+import threading
+
+from .irun_metrics import IRunMetrics
+
+
+class RunMetrics(IRunMetrics):
+    """Thread-safe counters of an ingest run, logged by the aggregator at the end of the run."""
+
+    def __init__(self):
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+
+# Counters of the current run, shared by the parser and the aggregator
+run_metrics = RunMetrics()
@@ -0,0 +1,137 @@
+import zipfile
+from io import BytesIO
+from xml.etree import ElementTree
+
+from config.file_constants import SpreadsheetConstants
+from utils.backend_registry import backends
+from utils.logging_setup import log_file_content_extractor
+from utils.text_buffer import TextBuffer
+from .ispreadsheet_extractor import ISpreadsheetExtractor
+
+
+class SpreadsheetExtractor(ISpreadsheetExtractor):
+    """
+    Streaming text extraction of XLSX, ODS and XLS workbooks.
+
+    XLSX workbooks are read with openpyxl in read-only mode, ODS content is parsed with iterparse and each
+    row is dropped once written, XLS sheets are loaded one at a time with xlrd. The text is written row by
+    row into a join buffer until the row, cell or character budget is exhausted. Empty rows and trailing
+    empty cells are not written.
+    """
+
+    def __init__(self, max_rows: int = SpreadsheetConstants.MAX_ROWS, max_cells: int = SpreadsheetConstants.MAX_CELLS,
+                 max_chars: int = SpreadsheetConstants.MAX_CHARS):
+        self.max_rows = max_rows
+        self.max_cells = max_cells
+        self.max_chars = max_chars
+
+    def extract_xlsx(self, file_path: str = None, content: bytes = None) -> str:
+        load_workbook = backends.module('openpyxl').load_workbook
+        workbook = load_workbook(filename=file_path if file_path else BytesIO(content), read_only=True, data_only=True)
+        writer = self._writer()
+        try:
+            for sheet in workbook.worksheets:
+                for row in sheet.iter_rows(values_only=True):
+                    if not writer.write_row(row):
+                        return self._text(writer, file_path)
+        finally:
+            workbook.close()
+        return self._text(writer, file_path)
+
+    def extract_ods(self, file_path: str = None, content: bytes = None) -> str:
+        writer = self._writer()
+        with zipfile.ZipFile(file_path if file_path else BytesIO(content)) as archive:
+            with archive.open('content.xml') as stream:
+                self._write_ods_rows(stream, writer)
+        return self._text(writer, file_path)
+
+    def extract_xls(self, file_path: str = None, content: bytes = None) -> str:
+        xlrd = backends.module('xlrd')
+        book = xlrd.open_workbook(filename=file_path, file_contents=content, on_demand=True)
+        writer = self._writer()
+        try:
+            for index in range(book.nsheets):
+                sheet = book.sheet_by_index(index)
+                try:
+                    for row_index in range(sheet.nrows):
+                        if not writer.write_row(sheet.row_values(row_index)):
+                            return self._text(writer, file_path)
+                finally:
+                    book.unload_sheet(index)
+        finally:
+            book.release_resources()
+        return self._text(writer, file_path)
+
+    def _write_ods_rows(self, stream, writer: '_RowWriter') -> None:
+        table = f"{{{SpreadsheetConstants.ODS_TABLE_NAMESPACE}}}"
+        row_tag, cell_tags = f"{table}table-row", (f"{table}table-cell", f"{table}covered-table-cell")
+        paragraph_tag = f"{{{SpreadsheetConstants.ODS_TEXT_NAMESPACE}}}p"
+        parents = []
+        row, paragraphs = [], []
+        empty = 0  # Empty cells not written yet, they are dropped when they end the row
+        for event, element in ElementTree.iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                parents.append(element)
+                if element.tag in cell_tags:
+                    paragraphs = []
+                continue
+            parents.pop()
+            if element.tag == paragraph_tag:
+                paragraphs.append(''.join(element.itertext()))
+            elif element.tag in cell_tags:
+                repeated = min(int(element.get(f"{table}number-columns-repeated", 1)),
+                               SpreadsheetConstants.MAX_REPEATED)
+                value = ' '.join(paragraphs)
+                if value:
+                    row.extend([''] * min(empty, SpreadsheetConstants.MAX_REPEATED) + [value] * repeated)
+                    empty = 0
+                else:
+                    empty += repeated
+                element.clear()
+            elif element.tag == row_tag:
+                repeated = int(element.get(f"{table}number-rows-repeated", 1))
+                if any(row):
+                    for _ in range(min(repeated, SpreadsheetConstants.MAX_REPEATED)):
+                        if not writer.write_row(row):
+                            return
+                row, empty = [], 0
+                # The rows already written are removed from the tree, the memory used does not grow
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+
+    def _writer(self) -> '_RowWriter':
+        return _RowWriter(max_rows=self.max_rows, max_cells=self.max_cells, max_chars=self.max_chars)
+
+    def _text(self, writer: '_RowWriter', file_path: str) -> str:
+        if writer.truncated:
+            log_file_content_extractor.info(f"Spreadsheet text truncated to the extraction budget: {file_path}")
+        return writer.buffer.text()
+
+
+class _RowWriter:
+    def __init__(self, max_rows: int, max_cells: int, max_chars: int):
+        self.max_rows = max_rows
+        self.max_cells = max_cells
+        self.buffer = TextBuffer(max_chars)
+        self.rows = 0
+        self.cells = 0
+        self.truncated = False
+
+    def write_row(self, cells) -> bool:
+        """Writes a row, returns False when a budget is exhausted."""
+        values = ['' if cell is None else str(cell) for cell in cells]
+        while values and not values[-1]:
+            values.pop()
+        if not values:
+            return True
+        # Only the written cells are counted, not the padding of ODS rows or of wide XLSX dimensions
+        if self.rows >= self.max_rows or self.cells + len(values) > self.max_cells:
+            self.truncated = True
+            return False
+        self.rows += 1
+        self.cells += len(values)
+        if not self.buffer.append('\t'.join(values) + '\n'):
+            self.truncated = True
+            return False
+        return True
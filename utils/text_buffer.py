@@ -0,0 +1,21 @@
+class TextBuffer:
+    """Collects text pieces up to a number of characters and joins them once."""
+
+    def __init__(self, max_chars: int):
+        self.remaining = max_chars
+        self.pieces = []
+        self.truncated = False
+
+    def append(self, text: str) -> bool:
+        """Adds a piece of text, returns False when it does not fit in the remaining budget."""
+        if len(text) > self.remaining:
+            self.pieces.append(text[:self.remaining])
+            self.remaining = 0
+            self.truncated = True
+            return False
+        self.pieces.append(text)
+        self.remaining -= len(text)
+        return True
+
+    def text(self) -> str:
+        return ''.join(self.pieces)